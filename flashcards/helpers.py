@@ -12,6 +12,10 @@ from phrases.models import Phrase
 from .models import PracticeSession, PracticeSessionDetail, FlashcardReview
 from .serializers import PracticeSessionSerializer, PracticeSessionDetailSerializer
 
+from gamification.services.achievement_rules import achievement_engine
+from gamification.services.points_buffer import points_buffer
+from gamification.services.practice_stats_service import PracticeStatsService
+
 def choose_phrases_for_user(user, count):
     qs = Phrase.objects.filter(user=user)
     total = qs.count()
@@ -32,4 +36,17 @@ def award_points_for_answer(session, was_correct, base=10):
     if was_correct:
         session.points_earned += base
     else:
-        session.points_earned += 0
\ No newline at end of file
+        session.points_earned += 0
+
+
+def finish_session_stats(user, session):
+    """Gamification side of a completed session, shared by every finish view"""
+    # answers, correct answers and minutes of the session, one upsert of today's stats
+    PracticeStatsService.record_session(session)
+    # write-behind points of the session are written now
+    if points_buffer.enabled:
+        points_buffer.flush(user_id=user.pk)
+    try:
+        achievement_engine.emit(user, 'session_completed', session=session)
+    except Exception:
+        pass
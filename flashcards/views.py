@@ -24,7 +24,8 @@ import random
 
 from .helpers import (
     choose_phrases_for_user,
-    award_points_for_answer
+    award_points_for_answer,
+    finish_session_stats,
 )
 
 
@@ -322,6 +323,7 @@ class CompletePracticeSessionView(APIView):
         session.completed_at = timezone.now()
         session.duration_seconds = (session.completed_at - session.started_at).seconds
         session.save()
+        finish_session_stats(request.user, session)
 
         return Response(PracticeSessionSerializer(session).data)
 
@@ -459,6 +461,7 @@ class MatchingFinishView(APIView):
         if session.started_at:
             session.duration_seconds = (session.completed_at - session.started_at).seconds
         session.save()
+        finish_session_stats(request.user, session)
 
         return Response({"session": PracticeSessionSerializer(session).data})
 
@@ -570,4 +573,5 @@ class TimedFinishView(APIView):
         if session.started_at:
             session.duration_seconds = (session.completed_at - session.started_at).seconds
         session.save()
+        finish_session_stats(request.user, session)
         return Response({"session": PracticeSessionSerializer(session).data})
\ No newline at end of file
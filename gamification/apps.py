@@ -5,3 +5,6 @@ from django.apps import AppConfig
 class GamificationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'gamification'
+
+    def ready(self):
+        from gamification import signals  # noqa: F401
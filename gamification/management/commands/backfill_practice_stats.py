@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from gamification.services.practice_stats_service import PracticeStatsService
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild phrases_practiced / correct_answers / practice_minutes of the daily statistics "
+        "from practice_session_details, then the weekly/monthly rollups"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000, help='answers read / rows written per batch')
+
+    def handle(self, *args, **options):
+        written = PracticeStatsService.backfill(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"{written} daily rows written"))
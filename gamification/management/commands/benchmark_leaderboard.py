@@ -0,0 +1,124 @@
+import random
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+
+from gamification.models import DailyStatistic, MonthlyStatistic, WeeklyStatistic
+from gamification.services.leaderboard import WindowLeaderboard
+from gamification.services.rollups import month_start, week_start
+from phrases.benchmark import percentile
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    """Leaves the database as it was once the numbers are taken"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the daily/weekly/monthly leaderboards against their latency targets "
+        "on generated users (inside a transaction that is rolled back)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100000)
+        parser.add_argument('--days', type=int, default=35, help='history generated for every user')
+        parser.add_argument('--active-days', type=int, default=6, help='days with points per user')
+        parser.add_argument('--runs', type=int, default=30, help='timed reads per window and mode')
+        parser.add_argument('--limit', type=int, default=20, help='users read from the top')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._populate(options)
+                self._report(options)
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def _populate(self, options):
+        rng = random.Random(options['seed'])
+        today = date.today()
+        prefix = f"lbbench{rng.randrange(10 ** 6)}_"
+
+        started = time.perf_counter()
+        User.objects.bulk_create(
+            [User(username=f"{prefix}{i}", password='!') for i in range(options['users'])],
+            batch_size=5000,
+        )
+        user_ids = list(User.objects.filter(username__startswith=prefix).values_list('id', flat=True))
+
+        daily, weeks, months = [], defaultdict(int), defaultdict(int)
+        for user_id in user_ids:
+            offsets = rng.sample(range(options['days']), min(options['active_days'], options['days']))
+            for offset in offsets:
+                day = today - timedelta(days=offset)
+                points = rng.randint(1, 500)
+                daily.append(DailyStatistic(user_id=user_id, date=day, points_earned=points))
+                weeks[(user_id, week_start(day))] += points
+                months[(user_id, month_start(day))] += points
+
+        # the rollups as PointsService would have left them
+        DailyStatistic.objects.bulk_create(daily, batch_size=5000)
+        WeeklyStatistic.objects.bulk_create(
+            [WeeklyStatistic(user_id=u, week_start=s, points_earned=p) for (u, s), p in weeks.items()],
+            batch_size=5000,
+        )
+        MonthlyStatistic.objects.bulk_create(
+            [MonthlyStatistic(user_id=u, month_start=s, points_earned=p) for (u, s), p in months.items()],
+            batch_size=5000,
+        )
+        self.stdout.write(
+            f"{len(user_ids)} users, {len(daily)} daily rows, {len(weeks)} weekly, {len(months)} monthly "
+            f"({time.perf_counter() - started:.1f}s to generate)"
+        )
+
+    def _report(self, options):
+        today = date.today()
+        runs, limit = options['runs'], options['limit']
+
+        for window in WindowLeaderboard.WINDOWS:
+            # the same window grouped from the daily rows, what the rollups avoid
+            board = WindowLeaderboard(window, alias='default')
+            period = board.period(today)
+            grouped = self._time(runs, lambda: list(
+                DailyStatistic.objects.filter(date__gte=period, date__lte=today)
+                .values('user_id').annotate(points=Sum('points_earned'))
+                .order_by('-points', 'user_id')[:limit]
+            ))
+
+            rebuild = self._time(runs, lambda: board.rebuild(period))
+            cached = self._time(runs, lambda: board.top(limit, today))
+            board.reset(today)
+
+            targets = WindowLeaderboard.LATENCY_TARGETS[window]
+            for mode, timings in (('rebuild', rebuild), ('cached', cached)):
+                p99 = percentile(timings, 99)
+                line = (
+                    f"{window:8} {mode:8} p50 {percentile(timings, 50) * 1e3:8.2f}ms  "
+                    f"p99 {p99 * 1e3:8.2f}ms  target {targets[mode] * 1e3:.1f}ms"
+                )
+                if p99 <= targets[mode]:
+                    self.stdout.write(self.style.SUCCESS(line + "  ok"))
+                else:
+                    self.stdout.write(self.style.ERROR(line + "  missed"))
+            self.stdout.write(
+                f"{window:8} group-by p50 {percentile(grouped, 50) * 1e3:8.2f}ms  "
+                f"p99 {percentile(grouped, 99) * 1e3:8.2f}ms  (daily rows, no rollup)"
+            )
+
+    @staticmethod
+    def _time(runs, call):
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            call()
+            timings.append(time.perf_counter() - started)
+        return timings
@@ -0,0 +1,121 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from gamification.models import DailyStatistic, UserAchievement
+from gamification.services import rollups
+from gamification.views import (
+    CurrentStreakView,
+    DailyStatsChartView,
+    MonthlyStatsView,
+    UserAchievementsView,
+    WeeklyStatsView,
+)
+from phrases.benchmark import percentile
+from users.services.response_cache import response_cache
+
+User = get_user_model()
+
+ENDPOINTS = [
+    ('streak', CurrentStreakView, '/api/gamification/streak/'),
+    ('achievements', UserAchievementsView, '/api/gamification/achievements/'),
+    ('daily-stats', DailyStatsChartView, '/api/gamification/daily-stats/?days=90'),
+    ('weekly-stats', WeeklyStatsView, '/api/gamification/weekly-stats/?weeks=52'),
+    ('monthly-stats', MonthlyStatsView, '/api/gamification/monthly-stats/?months=12'),
+]
+
+
+class Rollback(Exception):
+    """Leaves the database as it was once the numbers are taken"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the dashboard endpoints with full responses (response cache dropped before every "
+        "request, then served from it) and with conditional GETs answered 304 "
+        "(generated user, inside a transaction that is rolled back)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=300, help='requests per endpoint and mode')
+        parser.add_argument('--days', type=int, default=365, help='daily history of the user')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        try:
+            # measured even where the default cache is per process and they are off
+            with override_settings(GAMIFICATION_STATS_HTTP_CACHE=True, RESPONSE_CACHE_TTL=3600), transaction.atomic():
+                user = self._populate(options)
+                self._report(user, options['requests'])
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def _populate(self, options):
+        rng = random.Random(options['seed'])
+        user = User.objects.create(username=f"statsbench{rng.randrange(10 ** 6)}", password='!', current_streak=12)
+
+        today = date.today()
+        DailyStatistic.objects.bulk_create([
+            DailyStatistic(
+                user=user,
+                date=today - timedelta(days=offset),
+                phrases_practiced=rng.randint(0, 60),
+                correct_answers=rng.randint(0, 40),
+                practice_minutes=rng.randint(0, 45),
+                points_earned=rng.randint(0, 400),
+            )
+            for offset in range(options['days'])
+        ])
+        UserAchievement.objects.bulk_create([
+            UserAchievement(user=user, achievement_type=achievement_type)
+            for achievement_type, _ in UserAchievement.ACHIEVEMENT_TYPES
+        ])
+        rollups.rebuild([user.pk])
+        return user
+
+    def _report(self, user, total):
+        factory = APIRequestFactory()
+
+        for name, view_class, url in ENDPOINTS:
+            view = view_class.as_view()
+
+            full, etag = self._time(view, factory, user, url, total, uncached=True)
+            cached, _ = self._time(view, factory, user, url, total)
+            conditional, status = self._time(view, factory, user, url, total, etag)
+
+            saved = percentile(full, 50) - percentile(conditional, 50)
+            self.stdout.write(
+                f"{name:14} 200 p50 {percentile(full, 50) * 1e3:7.2f}ms  "
+                f"cached p50 {percentile(cached, 50) * 1e3:7.2f}ms  "
+                f"{status} p50 {percentile(conditional, 50) * 1e3:7.2f}ms  "
+                f"saved {saved * 1e3:7.2f}ms/request ({saved / percentile(full, 50):.0%})"
+            )
+
+    @staticmethod
+    def _time(view, factory, user, url, total, etag=None, uncached=False):
+        timings, result = [], None
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+
+        for _ in range(total):
+            if uncached:
+                response_cache.invalidate(user.pk)
+            request = factory.get(url, **headers)
+            force_authenticate(request, user=user)
+
+            started = time.perf_counter()
+            response = view(request)
+            if hasattr(response, 'render'):
+                response.render()
+            timings.append(time.perf_counter() - started)
+
+            # full runs hand back the ETag, conditional ones their status
+            result = response.status_code if etag else response.get('ETag')
+
+        return timings, result
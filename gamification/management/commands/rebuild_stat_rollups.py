@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from gamification.services import rollups
+from gamification.services.stats_version import stats_changed
+
+
+class Command(BaseCommand):
+    help = "Recompute the weekly/monthly statistic rollups from the daily rows (backfills, rows edited by hand)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users',
+                            help='only this user id (repeatable), default: every user')
+        parser.add_argument('--chunk-size', type=int, default=10000, help='rows read and written per batch')
+
+    def handle(self, *args, **options):
+        read = rollups.rebuild(options['users'], chunk_size=options['chunk_size'])
+        for user_id in options['users'] or [None]:
+            stats_changed.send(sender=self.__class__, user_id=user_id)
+        self.stdout.write(self.style.SUCCESS(f"rollups rebuilt from {read} daily rows"))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from gamification.services.leaderboard import leaderboard
+
+
+class Command(BaseCommand):
+    help = "Rebuild the cached leaderboard snapshot (run it on a schedule, e.g. every minute from cron)"
+
+    def handle(self, *args, **options):
+        snapshot = leaderboard.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"leaderboard rebuilt: {len(snapshot['entries'])} users, cutoff {snapshot['cutoff']}"
+        ))
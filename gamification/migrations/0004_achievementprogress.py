@@ -0,0 +1,63 @@
+# Generated by Django 4.2.25 on 2026-10-16 22:40
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def backfill_progress(apps, schema_editor):
+    """Counters of the existing users, the only time they are counted from the rows"""
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Phrase = apps.get_model('phrases', 'Phrase')
+    PracticeSession = apps.get_model('flashcards', 'PracticeSession')
+    AchievementProgress = apps.get_model('gamification', 'AchievementProgress')
+
+    phrases = dict(Phrase.objects.values('user_id').annotate(n=Count('id')).values_list('user_id', 'n'))
+    perfect = dict(
+        PracticeSession.objects.filter(completed=True, incorrect_answers=0, correct_answers__gt=0)
+        .values('user_id').annotate(n=Count('id')).values_list('user_id', 'n')
+    )
+    languages = {}
+    for user_id, source_id, target_id in Phrase.objects.values_list(
+        'user_id', 'source_language_id', 'target_language_id'
+    ).distinct():
+        languages.setdefault(user_id, set()).update((source_id, target_id))
+
+    AchievementProgress.objects.bulk_create([
+        AchievementProgress(
+            user_id=user_id,
+            phrases_saved=phrases.get(user_id, 0),
+            perfect_sessions=perfect.get(user_id, 0),
+            languages=sorted(languages.get(user_id, ())),
+        )
+        for user_id in User.objects.values_list('id', flat=True)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('flashcards', '0003_rename_interval_days_flashcardreview_interval_and_more'),
+        ('phrases', '0003_translationusage'),
+        ('gamification', '0003_delete_userstreak'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AchievementProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('phrases_saved', models.IntegerField(default=0)),
+                ('perfect_sessions', models.IntegerField(default=0)),
+                ('languages', models.JSONField(blank=True, default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='achievement_progress', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'achievement_progress',
+            },
+        ),
+        migrations.RunPython(backfill_progress, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.25 on 2026-10-16 23:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('gamification', '0004_achievementprogress'),
+    ]
+
+    # the new tables are filled by 0006, with every counter
+    operations = [
+        migrations.AddIndex(
+            model_name='dailystatistic',
+            index=models.Index(fields=['date', '-points_earned', 'user'], name='daily_stats_board_idx'),
+        ),
+        migrations.CreateModel(
+            name='WeeklyStatistic',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week_start', models.DateField()),
+                ('points_earned', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='weekly_statistics', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'weekly_statistics',
+                'ordering': ['-week_start'],
+                'indexes': [models.Index(fields=['week_start', '-points_earned', 'user'], name='weekly_stats_board_idx')],
+                'unique_together': {('user', 'week_start')},
+            },
+        ),
+        migrations.CreateModel(
+            name='MonthlyStatistic',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month_start', models.DateField()),
+                ('points_earned', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_statistics', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'monthly_statistics',
+                'ordering': ['-month_start'],
+                'indexes': [models.Index(fields=['month_start', '-points_earned', 'user'], name='monthly_stats_board_idx')],
+                'unique_together': {('user', 'month_start')},
+            },
+        ),
+    ]
@@ -0,0 +1,123 @@
+# Generated by Django 4.2.25 on 2026-10-17 00:20
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import migrations, models
+
+# copied from rollups.rebuild() when this migration was written, it runs against
+# the historical models and must not follow later changes to the service
+CHUNK_SIZE = 10000
+COUNTERS = ('points_earned', 'phrases_practiced', 'correct_answers', 'practice_minutes')
+
+
+def backfill_counters(apps, schema_editor):
+    """Compute the rollups from the daily rows, streamed in chunks like rebuild_stat_rollups"""
+    DailyStatistic = apps.get_model('gamification', 'DailyStatistic')
+    WeeklyStatistic = apps.get_model('gamification', 'WeeklyStatistic')
+    MonthlyStatistic = apps.get_model('gamification', 'MonthlyStatistic')
+    periods_of = [
+        (WeeklyStatistic, 'week_start', lambda day: day - timedelta(days=day.weekday())),
+        (MonthlyStatistic, 'month_start', lambda day: day.replace(day=1)),
+    ]
+
+    for model, _, _ in periods_of:
+        model.objects.all().delete()
+
+    pending = defaultdict(list)
+
+    def collect(user_id, periods):
+        fields = {model: field for model, field, _ in periods_of}
+        for (model, period), totals in periods.items():
+            pending[model].append(model(user_id=user_id, **{fields[model]: period}, **totals))
+
+    def flush():
+        for model, objs in pending.items():
+            model.objects.bulk_create(objs, batch_size=1000)
+        pending.clear()
+
+    current_user, periods = None, None
+    previous_day, streak = None, 0
+    rows = DailyStatistic.objects.order_by('user_id', 'date').values_list(
+        'user_id', 'date', 'streak_maintained', *COUNTERS
+    ).iterator(chunk_size=CHUNK_SIZE)
+    for user_id, day, maintained, *values in rows:
+        if user_id != current_user:
+            if current_user is not None:
+                collect(current_user, periods)
+            if sum(len(objs) for objs in pending.values()) >= CHUNK_SIZE:
+                flush()
+            current_user, periods = user_id, defaultdict(lambda: defaultdict(int))
+            previous_day, streak = None, 0
+
+        # the streak StreakService recorded that day
+        streak = streak + 1 if maintained and previous_day == day - timedelta(days=1) else 1
+        previous_day = day
+
+        for model, _, start in periods_of:
+            totals = periods[(model, start(day))]
+            for column, value in zip(COUNTERS, values):
+                totals[column] += value
+            totals['days_active'] += 1
+            if model is MonthlyStatistic:
+                totals['best_streak'] = max(totals['best_streak'], streak)
+
+    if current_user is not None:
+        collect(current_user, periods)
+    flush()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0005_weekly_monthly_statistics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='weeklystatistic',
+            name='phrases_practiced',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='weeklystatistic',
+            name='correct_answers',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='weeklystatistic',
+            name='practice_minutes',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='weeklystatistic',
+            name='days_active',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='monthlystatistic',
+            name='phrases_practiced',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='monthlystatistic',
+            name='correct_answers',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='monthlystatistic',
+            name='practice_minutes',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='monthlystatistic',
+            name='days_active',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='monthlystatistic',
+            name='best_streak',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
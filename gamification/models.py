@@ -44,7 +44,82 @@ class DailyStatistic(models.Model):
         db_table = 'daily_statistics'
         unique_together = ['user', 'date']
         ordering = ['-date']
+        indexes = [
+            # daily leaderboard: one day, best first
+            models.Index(fields=['date', '-points_earned', 'user'], name='daily_stats_board_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.date}"
-    
\ No newline at end of file
+
+
+class WeeklyStatistic(models.Model):
+    """
+    DailyStatistic rolled up per week (Monday), incremented with the daily
+    rows (services/rollups.py), never recomputed at request time.
+    rebuild_stat_rollups recomputes them from the daily rows.
+    """
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='weekly_statistics')
+    week_start = models.DateField()
+    points_earned = models.IntegerField(default=0)
+    phrases_practiced = models.IntegerField(default=0)
+    correct_answers = models.IntegerField(default=0)
+    practice_minutes = models.IntegerField(default=0)
+    days_active = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'weekly_statistics'
+        unique_together = ['user', 'week_start']
+        ordering = ['-week_start']
+        indexes = [
+            models.Index(fields=['week_start', '-points_earned', 'user'], name='weekly_stats_board_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - week of {self.week_start}"
+
+
+class MonthlyStatistic(models.Model):
+    """
+    DailyStatistic rolled up per month (first day), kept like WeeklyStatistic.
+    """
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='monthly_statistics')
+    month_start = models.DateField()
+    points_earned = models.IntegerField(default=0)
+    phrases_practiced = models.IntegerField(default=0)
+    correct_answers = models.IntegerField(default=0)
+    practice_minutes = models.IntegerField(default=0)
+    days_active = models.IntegerField(default=0)
+    best_streak = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'monthly_statistics'
+        unique_together = ['user', 'month_start']
+        ordering = ['-month_start']
+        indexes = [
+            models.Index(fields=['month_start', '-points_earned', 'user'], name='monthly_stats_board_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.month_start:%Y-%m}"
+
+
+class AchievementProgress(models.Model):
+    """
+    Counters read by the achievement rules (services/achievement_rules.py).
+    Updated by the events as they happen, rules never count rows.
+    """
+
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='achievement_progress')
+    phrases_saved = models.IntegerField(default=0)
+    perfect_sessions = models.IntegerField(default=0)
+    languages = models.JSONField(default=list, blank=True)  # ids of the languages used in the user's phrases
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'achievement_progress'
+
+    def __str__(self):
+        return f"{self.user.username} - progress"
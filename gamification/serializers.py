@@ -81,9 +81,10 @@ class AchievementSerializer(serializers.ModelSerializer):
 
 
 class LeaderboardSerializer(serializers.ModelSerializer):
-    username = serializers.CharField(source="username")
+    rank = serializers.IntegerField(read_only=True)
+    username = serializers.CharField()
     total_points = serializers.IntegerField()
 
     class Meta:
         model = User
-        fields = ["username", "total_points"]
+        fields = ["rank", "username", "total_points"]
@@ -0,0 +1,134 @@
+# gamification/services/achievement_rules.py
+
+from dataclasses import dataclass
+from typing import Callable
+
+from django.db import IntegrityError, transaction
+
+from gamification.models import AchievementProgress
+from gamification.services.achievement_service import AchievementService
+
+
+@dataclass(frozen=True)
+class AchievementRule:
+    """
+    One achievement: the event it listens to, the state it reads and when it is reached.
+    """
+
+    achievement_type: str
+    event: str
+    state: str
+    condition: Callable
+
+
+def at_least(threshold):
+    return lambda value: (value or 0) >= threshold
+
+
+def is_speed_run(session) -> bool:
+    """Timed session finished in under 2 minutes with at least one correct answer"""
+    return (
+        session.session_type == 'timed'
+        and session.completed
+        and session.duration_seconds is not None
+        and session.duration_seconds < 120
+        and session.correct_answers > 0
+    )
+
+
+RULES = [
+    *[
+        AchievementRule(achievement_type, 'points_added', 'total_points', at_least(threshold))
+        for threshold, achievement_type in AchievementService.POINTS_THRESHOLDS
+    ],
+    *[
+        AchievementRule(achievement_type, 'streak_updated', 'current_streak', at_least(threshold))
+        for threshold, achievement_type in AchievementService.STREAK_THRESHOLDS
+    ],
+    AchievementRule('phrases_500', 'phrase_created', 'phrases_saved', at_least(500)),
+    AchievementRule('phrases_100', 'phrase_created', 'phrases_saved', at_least(100)),
+    AchievementRule('phrases_50', 'phrase_created', 'phrases_saved', at_least(50)),
+    AchievementRule('polyglot', 'phrase_created', 'languages', at_least(3)),
+    AchievementRule('perfect_10', 'session_completed', 'perfect_sessions', at_least(10)),
+    AchievementRule('speed_demon', 'session_completed', 'session', is_speed_run),
+]
+
+
+class AchievementEngine:
+    """
+    Evaluates the rules of an event for one user.
+
+    - the state a rule reads comes with the event (total points, the session...)
+      or from the user's AchievementProgress counters, updated by the event
+      itself: nothing is ever counted from the phrases or sessions tables
+    - a rule is only evaluated when its state changed in this event
+    - rules already unlocked are skipped with the cached types of
+      AchievementService: once unlocked, an achievement costs no query
+    """
+
+    def __init__(self, rules=None):
+        self.rules = {}
+        for rule in rules or RULES:
+            self.rules.setdefault(rule.event, []).append(rule)
+
+    def emit(self, user, event, **data):
+        """Record the event and unlock what it reached, returns the new types"""
+        rules = self.rules.get(event)
+        if not rules:
+            return []
+
+        tracker = getattr(self, f"_track_{event}", None)
+        state = dict(data)
+        if tracker is not None:
+            state.update(tracker(user, **data))
+
+        reached = [
+            rule.achievement_type for rule in rules
+            if rule.state in state and rule.condition(state[rule.state])
+        ]
+        # nothing reached: not even the cache is read
+        if not reached:
+            return []
+        return AchievementService.unlock_many(user, reached)
+
+    # Event trackers: update the counters, return the state they changed
+    @staticmethod
+    def _track_phrase_created(user, phrase=None, **data):
+        with transaction.atomic():
+            progress = AchievementEngine._locked_progress(user)
+            progress.phrases_saved += 1
+            state = {'phrases_saved': progress.phrases_saved}
+
+            if phrase is not None:
+                languages = set(progress.languages)
+                new = {phrase.source_language_id, phrase.target_language_id} - languages - {None}
+                if new:
+                    progress.languages = sorted(languages | new)
+                    state['languages'] = len(progress.languages)
+
+            progress.save()
+        return state
+
+    @staticmethod
+    def _track_session_completed(user, session=None, **data):
+        if session is None or session.incorrect_answers or not session.correct_answers:
+            return {}
+
+        with transaction.atomic():
+            progress = AchievementEngine._locked_progress(user)
+            progress.perfect_sessions += 1
+            progress.save(update_fields=['perfect_sessions', 'updated_at'])
+        return {'perfect_sessions': progress.perfect_sessions}
+
+    @staticmethod
+    def _locked_progress(user):
+        try:
+            with transaction.atomic():
+                progress, _ = AchievementProgress.objects.select_for_update().get_or_create(user=user)
+        except IntegrityError:
+            # created by a concurrent event of the same user
+            progress = AchievementProgress.objects.select_for_update().get(user=user)
+        return progress
+
+
+achievement_engine = AchievementEngine()
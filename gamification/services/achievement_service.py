@@ -1,6 +1,10 @@
 # gamification/services/achievement_service.py
 
+from django.conf import settings
+from django.core.cache import caches
+
 from gamification.models import UserAchievement
+from gamification.services.stats_version import stats_changed
 
 
 class AchievementService:
@@ -9,20 +13,85 @@ class AchievementService:
     - check conditions for points
     - check conditions for streaks
     - register newly unlocked achievements
+
+    The conditions themselves are declared in achievement_rules.py, the
+    checks below are the points and streak events of that engine.
+
+    The achievement types a user already has are kept in the default cache
+    (loaded once from the db, updated on unlock): a check only touches the
+    db when a threshold is crossed for the first time.
     """
 
+    CACHE_KEY_PREFIX = "achievements"
+
+    POINTS_THRESHOLDS = [
+        (10000, "points_10000"),
+        (5000, "points_5000"),
+        (1000, "points_1000"),
+    ]
+
+    STREAK_THRESHOLDS = [
+        (100, "streak_100"),
+        (30, "streak_30"),
+        (7, "streak_7"),
+    ]
+
     # Register a new achievement
     @staticmethod
     def unlock(user, achievement_type):
         """
         Create an achievement for the user if not already unlocked.
         """
+        if achievement_type in AchievementService.unlocked_types(user):
+            return False
+
         achievement, created = UserAchievement.objects.get_or_create(
             user=user,
             achievement_type=achievement_type
         )
+        AchievementService._remember(user, [achievement_type])
+        if created:
+            stats_changed.send(sender=AchievementService, user_id=user.pk)
         return created
 
+    @staticmethod
+    def unlock_many(user, achievement_types):
+        """
+        Create the achievements the user doesn't have yet in one insert.
+        Returns the types that were not known as unlocked.
+        """
+        unlocked = AchievementService.unlocked_types(user)
+        new_types = [t for t in achievement_types if t not in unlocked]
+        if not new_types:
+            return []
+
+        # another worker may have inserted some of them already
+        UserAchievement.objects.bulk_create(
+            [UserAchievement(user=user, achievement_type=t) for t in new_types],
+            ignore_conflicts=True,
+        )
+        AchievementService._remember(user, new_types, unlocked)
+        stats_changed.send(sender=AchievementService, user_id=user.pk)
+        return new_types
+
+    @staticmethod
+    def unlocked_types(user) -> set:
+        cache = caches['default']
+        key = AchievementService._cache_key(user.pk)
+
+        unlocked = cache.get(key)
+        if unlocked is None:
+            unlocked = set(
+                UserAchievement.objects.filter(user=user).values_list("achievement_type", flat=True)
+            )
+            cache.set(key, unlocked, AchievementService._cache_ttl())
+        return set(unlocked)
+
+    @staticmethod
+    def forget(user_id):
+        """Drop the cached types (achievement deleted, new user...)"""
+        caches['default'].delete(AchievementService._cache_key(user_id))
+
     # Achievement checks
     @staticmethod
     def check_points_achievements(user):
@@ -30,14 +99,9 @@ class AchievementService:
         Check the user's total points
         and unlock achievements based on thresholds.
         """
-        points = user.total_points or 0
+        from gamification.services.achievement_rules import achievement_engine
 
-        if points >= 10000:
-            AchievementService.unlock(user, "points_10000")
-        if points >= 5000:
-            AchievementService.unlock(user, "points_5000")
-        if points >= 1000:
-            AchievementService.unlock(user, "points_1000")
+        achievement_engine.emit(user, 'points_added', total_points=user.total_points or 0)
 
     # Achievement based on streaks
     @staticmethod
@@ -45,11 +109,25 @@ class AchievementService:
         """
         Check the user's current streak
         """
-        streak = user.current_streak or 0
+        from gamification.services.achievement_rules import achievement_engine
+
+        achievement_engine.emit(user, 'streak_updated', current_streak=user.current_streak or 0)
 
-        if streak >= 100:
-            AchievementService.unlock(user, "streak_100")
-        if streak >= 30:
-            AchievementService.unlock(user, "streak_30")
-        if streak >= 7:
-            AchievementService.unlock(user, "streak_7")
+    # Internal helpers
+    @staticmethod
+    def _remember(user, achievement_types, unlocked=None):
+        if unlocked is None:
+            unlocked = AchievementService.unlocked_types(user)
+        caches['default'].set(
+            AchievementService._cache_key(user.pk),
+            unlocked | set(achievement_types),
+            AchievementService._cache_ttl(),
+        )
+
+    @staticmethod
+    def _cache_key(user_id):
+        return f"{AchievementService.CACHE_KEY_PREFIX}:{user_id}"
+
+    @staticmethod
+    def _cache_ttl():
+        return getattr(settings, 'GAMIFICATION_ACHIEVEMENT_CACHE_TTL', 60 * 60 * 24)
@@ -0,0 +1,308 @@
+# gamification/services/leaderboard.py
+
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from datetime import date
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import close_old_connections, connection
+
+from gamification.models import DailyStatistic, MonthlyStatistic, WeeklyStatistic
+from gamification.services.rollups import month_start, week_start
+
+User = get_user_model()
+
+
+def ranked(rows) -> list:
+    """(username, points) rows, best first, as entries; equal points share the rank"""
+    entries = []
+    for position, (username, points) in enumerate(rows, start=1):
+        same = entries and entries[-1]["total_points"] == points
+        entries.append({
+            "rank": entries[-1]["rank"] if same else position,
+            "username": username,
+            "total_points": points,
+        })
+    return entries
+
+
+class Leaderboard:
+    """
+    All-time leaderboard on users.total_points.
+
+    - top(): the first LEADERBOARD_SIZE users, a snapshot in the default cache
+      rebuilt every LEADERBOARD_REFRESH seconds, or as soon as somebody's
+      points reach it (points_changed)
+    - rank(): 1 + users with more points, a bisect over the sorted totals of
+      every user kept in the process (O(log n)); the array is reloaded with one
+      scan of the (-total_points, id) index every LEADERBOARD_RANK_REFRESH seconds,
+      in a background thread: requests keep reading the previous array meanwhile
+    - neighbours(): the users just above and below, two LIMIT queries that
+      start at the user's position in that index, no OFFSET
+    """
+
+    KEY = "leaderboard:top"
+
+    def __init__(self, size=None, refresh=None, rank_refresh=None, alias=None):
+        self.size = size or getattr(settings, 'LEADERBOARD_SIZE', 100)
+        self.refresh = refresh or getattr(settings, 'LEADERBOARD_REFRESH', 60)
+        self.rank_refresh = rank_refresh or getattr(settings, 'LEADERBOARD_RANK_REFRESH', 60)
+        self.alias = alias or 'default'
+
+        self._totals = None
+        self._totals_loaded_at = 0.0
+        self._reloading = False
+        self._lock = threading.Lock()
+
+        self.rebuilds = 0
+        self.rank_reloads = 0
+
+    # Top N
+    def top(self, limit=None) -> list:
+        limit = min(limit or self.size, self.size)
+        snapshot = caches[self.alias].get(self.KEY)
+        if snapshot is None:
+            snapshot = self.rebuild()
+        return snapshot["entries"][:limit]
+
+    def rebuild(self) -> dict:
+        entries = ranked(
+            User.objects.order_by("-total_points", "id").values_list("username", "total_points")[:self.size]
+        )
+
+        snapshot = {
+            "entries": entries,
+            # below this a change can't enter the top, a full board takes anybody
+            "cutoff": entries[-1]["total_points"] if len(entries) >= self.size else None,
+        }
+        caches[self.alias].set(self.KEY, snapshot, self.refresh)
+        self.rebuilds += 1
+        return snapshot
+
+    def points_changed(self, user_id, total_points):
+        """Drop the snapshot if these points put the user in it"""
+        cache = caches[self.alias]
+        snapshot = cache.get(self.KEY)
+        if snapshot is None:
+            return
+        cutoff = snapshot["cutoff"]
+        if cutoff is None or total_points >= cutoff:
+            cache.delete(self.KEY)
+
+    # Pages of the whole ranking
+    def page(self, offset, limit) -> list:
+        """Entries offset..offset+limit: from the snapshot inside it, one LIMIT query past it"""
+        if offset + limit <= self.size:
+            return self.top(self.size)[offset:offset + limit]
+        rows = User.objects.order_by("-total_points", "id").values_list("username", "total_points")
+        return [self._entry(username, points) for username, points in rows[offset:offset + limit]]
+
+    def count(self) -> int:
+        """Users in the ranking, from the in-process totals"""
+        return len(self._sorted_totals())
+
+    # Rank of one user
+    def rank(self, total_points) -> int:
+        totals = self._sorted_totals()
+        return len(totals) - bisect_right(totals, total_points) + 1
+
+    def neighbours(self, user, total_points, count=2) -> dict:
+        """Users right above and right below, each with its rank"""
+        above = list(
+            User.objects.filter(total_points__gt=total_points)
+            .order_by("total_points", "-id")
+            .values_list("username", "total_points")[:count]
+        )
+        above.reverse()
+        below = list(
+            User.objects.filter(total_points__lte=total_points)
+            .exclude(pk=user.pk)
+            .order_by("-total_points", "id")
+            .values_list("username", "total_points")[:count]
+        )
+        return {
+            "above": [self._entry(username, points) for username, points in above],
+            "below": [self._entry(username, points) for username, points in below],
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "users": len(self._totals) if self._totals is not None else 0,
+                "rebuilds": self.rebuilds,
+                "rank_reloads": self.rank_reloads,
+            }
+
+    def reset(self):
+        """Forget the snapshot and the totals (tests, after bulk changes)"""
+        caches[self.alias].delete(self.KEY)
+        with self._lock:
+            self._totals = None
+            self._totals_loaded_at = 0.0
+            self._reloading = False
+
+    def reload_totals(self):
+        """Load the sorted totals of every user, then swap them in"""
+        # ascending, the same index read backwards
+        totals = array("q", User.objects.order_by("total_points").values_list(
+            "total_points", flat=True
+        ).iterator(chunk_size=10000))
+        with self._lock:
+            self._totals = totals
+            self._totals_loaded_at = time.monotonic()
+            self._reloading = False
+            self.rank_reloads += 1
+        return totals
+
+    # Internal helpers
+    def _entry(self, username, total_points) -> dict:
+        return {"rank": self.rank(total_points), "username": username, "total_points": total_points}
+
+    def _sorted_totals(self):
+        with self._lock:
+            totals = self._totals
+            start_reload = (
+                totals is not None
+                and not self._reloading
+                and time.monotonic() - self._totals_loaded_at > self.rank_refresh
+            )
+            if start_reload:
+                self._reloading = True
+
+        if totals is None:
+            # first use in this process, there is no array to serve meanwhile
+            return self.reload_totals()
+        if start_reload:
+            self._reload_in_background()
+        return totals
+
+    def _reload_in_background(self):
+        thread = threading.Thread(target=self._reload, name="leaderboard-totals", daemon=True)
+        thread.start()
+
+    def _reload(self):
+        # this thread outlives requests, don't reuse a dead connection
+        close_old_connections()
+        try:
+            self.reload_totals()
+        finally:
+            with self._lock:
+                self._reloading = False
+            connection.close()
+
+
+class Ranking:
+    """
+    Every user best first, as a sequence a Django paginator can slice:
+    the pages inside the snapshot cost no query
+    """
+
+    def __init__(self, board):
+        self.board = board
+
+    def count(self) -> int:
+        return self.board.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError("Ranking only supports slices")
+        start = index.start or 0
+        stop = self.count() if index.stop is None else index.stop
+        return self.board.page(start, max(stop - start, 0))
+
+
+class WindowLeaderboard:
+    """
+    Points earned in the current day, week or month.
+
+    - read from the rollup rows of the period (DailyStatistic, WeeklyStatistic,
+      MonthlyStatistic), incremented by PointsService as points are awarded:
+      the top is one range read of the (period, -points_earned, user) index,
+      no GROUP BY over the daily rows at request time
+    - the top is cached LEADERBOARD_WINDOW_REFRESH seconds per period, a new
+      period starts with an empty board
+    - each process also keeps the snapshot it last read until that snapshot
+      expires: a cached read is a dict lookup, not an unpickle of the entries
+    - LATENCY_TARGETS (seconds, p99) are checked by benchmark_leaderboard
+    """
+
+    WINDOWS = {
+        'daily': (DailyStatistic, 'date', lambda day: day),
+        'weekly': (WeeklyStatistic, 'week_start', week_start),
+        'monthly': (MonthlyStatistic, 'month_start', month_start),
+    }
+
+    # rebuild: cache miss with 100k users; cached: a snapshot already read by the process
+    LATENCY_TARGETS = {
+        'daily': {'rebuild': 0.05, 'cached': 0.002},
+        'weekly': {'rebuild': 0.05, 'cached': 0.002},
+        'monthly': {'rebuild': 0.05, 'cached': 0.002},
+    }
+
+    KEY_PREFIX = "leaderboard"
+
+    def __init__(self, window, size=None, refresh=None, alias=None):
+        if window not in self.WINDOWS:
+            raise ValueError(f"unknown leaderboard window: {window}")
+        self.window = window
+        self.model, self.field, self.start = self.WINDOWS[window]
+        self.size = size or getattr(settings, 'LEADERBOARD_SIZE', 100)
+        self.refresh = refresh or getattr(settings, 'LEADERBOARD_WINDOW_REFRESH', 30)
+        self.alias = alias or 'default'
+
+        self._local = None  # (period, entries, expires_at)
+        self._lock = threading.Lock()
+
+    def period(self, today=None):
+        return self.start(today or date.today())
+
+    def top(self, limit=None, today=None) -> list:
+        limit = min(limit or self.size, self.size)
+        period = self.period(today)
+
+        with self._lock:
+            local = self._local
+        if local is not None and local[0] == period and local[2] > time.time():
+            return local[1][:limit]
+
+        snapshot = caches[self.alias].get(self._key(period))
+        if snapshot is None:
+            return self.rebuild(period)[:limit]
+        self._remember(period, snapshot)
+        return snapshot["entries"][:limit]
+
+    def rebuild(self, period) -> list:
+        entries = ranked(
+            self.model.objects.filter(**{self.field: period}, points_earned__gt=0)
+            .order_by("-points_earned", "user_id")
+            .values_list("user__username", "points_earned")[:self.size]
+        )
+        # the copies kept by the processes expire with the shared one
+        snapshot = {"entries": entries, "expires_at": time.time() + self.refresh}
+        caches[self.alias].set(self._key(period), snapshot, self.refresh)
+        self._remember(period, snapshot)
+        return entries
+
+    def reset(self, today=None):
+        caches[self.alias].delete(self._key(self.period(today)))
+        with self._lock:
+            self._local = None
+
+    def _remember(self, period, snapshot):
+        with self._lock:
+            self._local = (period, snapshot["entries"], snapshot["expires_at"])
+
+    def _key(self, period) -> str:
+        return f"{self.KEY_PREFIX}:{self.window}:{period.isoformat()}"
+
+
+# top N shared by the workers, the rank array is per process
+leaderboard = Leaderboard()
+window_leaderboards = {window: WindowLeaderboard(window) for window in WindowLeaderboard.WINDOWS}
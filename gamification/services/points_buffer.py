@@ -0,0 +1,224 @@
+# gamification/services/points_buffer.py
+
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import date
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import close_old_connections, transaction
+from django.db.models import Case, F, IntegerField, Q, Value, When
+
+from gamification.models import DailyStatistic
+from gamification.services import rollups
+from gamification.services.achievement_service import AchievementService
+from gamification.services.leaderboard import leaderboard
+from gamification.services.stats_version import stats_changed
+from users.services.user_cache import user_cache
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+
+class PointsBuffer:
+    """
+    Write-behind mode of PointsService.add_points (GAMIFICATION_POINTS_WRITE_BEHIND).
+
+    - deltas are added up per (user, day) in the process, a correct answer costs
+      no database write
+    - flushed in bulk (one UPDATE for the users, one for the daily rows) every
+      `interval` seconds, when `max_pending` (user, day) pairs are waiting, or
+      when the user finishes a practice session
+    - the pending points of each user are also counted in the default cache,
+      so total_points() is right on any worker before the flush
+    - a failed flush puts the deltas back, they go with the next one
+    """
+
+    KEY_PREFIX = "points_pending"
+
+    def __init__(self, interval=None, max_pending=None, alias=None):
+        self.interval = interval or getattr(settings, 'GAMIFICATION_POINTS_FLUSH_INTERVAL', 5)
+        self.max_pending = max_pending or getattr(settings, 'GAMIFICATION_POINTS_FLUSH_SIZE', 200)
+        self.alias = alias or 'default'
+
+        self._pending = defaultdict(int)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer = None
+
+        self.flushes = 0
+        self.flushed_deltas = 0
+
+    @property
+    def enabled(self) -> bool:
+        return getattr(settings, 'GAMIFICATION_POINTS_WRITE_BEHIND', False)
+
+    def add(self, user, amount: int, day=None):
+        day = day or date.today()
+
+        with self._lock:
+            self._pending[(user.pk, day)] += amount
+            full = len(self._pending) >= self.max_pending
+
+        self._shared_add(user.pk, amount)
+        self._ensure_timer()
+
+        if full:
+            self.flush()
+
+    def pending_points(self, user_id) -> int:
+        """Points of this user not in the database yet (every worker)"""
+        try:
+            return max(caches[self.alias].get(self._key(user_id)) or 0, 0)
+        except Exception:
+            with self._lock:
+                return sum(delta for (pending_user, _), delta in self._pending.items() if pending_user == user_id)
+
+    def total_points(self, user) -> int:
+        stored = User.objects.filter(pk=user.pk).values_list("total_points", flat=True).get()
+        return (stored or 0) + self.pending_points(user.pk)
+
+    def flush(self, user_id=None) -> int:
+        """Write the pending deltas (only this user's if given), returns how many (user, day) pairs"""
+        with self._flush_lock:
+            with self._lock:
+                if user_id is None:
+                    batch, self._pending = dict(self._pending), defaultdict(int)
+                else:
+                    batch = {key: delta for key, delta in self._pending.items() if key[0] == user_id}
+                    for key in batch:
+                        del self._pending[key]
+
+            batch = {key: delta for key, delta in batch.items() if delta}
+            if not batch:
+                return 0
+
+            try:
+                totals = self._write(batch)
+            except Exception:
+                logger.exception("points flush failed, %s deltas kept for the next one", len(batch))
+                with self._lock:
+                    for key, delta in batch.items():
+                        self._pending[key] += delta
+                return 0
+
+            self.flushes += 1
+            self.flushed_deltas += len(batch)
+
+        per_user = defaultdict(int)
+        for (pending_user, _), delta in batch.items():
+            per_user[pending_user] += delta
+
+        for pending_user, delta in per_user.items():
+            self._shared_add(pending_user, -delta)
+            user_cache.invalidate(pending_user)
+
+        self._after_write(totals)
+        return len(batch)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "flushes": self.flushes,
+                "flushed_deltas": self.flushed_deltas,
+            }
+
+    def reset(self):
+        """Drop everything pending without writing it (tests)"""
+        with self._lock:
+            for (user_id, _), delta in self._pending.items():
+                self._shared_add(user_id, -delta)
+            self._pending.clear()
+
+    # Internal helpers
+    @staticmethod
+    def _write(batch) -> dict:
+        per_user = defaultdict(int)
+        for (user_id, _), delta in batch.items():
+            per_user[user_id] += delta
+
+        with transaction.atomic():
+            User.objects.filter(pk__in=per_user).update(total_points=F("total_points") + Case(
+                *[When(pk=user_id, then=Value(delta)) for user_id, delta in per_user.items()],
+                default=Value(0),
+                output_field=IntegerField(),
+            ))
+
+            rows = Q()
+            for user_id, day in batch:
+                rows |= Q(user_id=user_id, date=day)
+            existing = set(DailyStatistic.objects.filter(rows).values_list("user_id", "date"))
+
+            # rows of a new day are created empty, then incremented with the rest
+            DailyStatistic.objects.bulk_create(
+                [DailyStatistic(user_id=user_id, date=day) for user_id, day in batch],
+                ignore_conflicts=True,
+            )
+            DailyStatistic.objects.filter(rows).update(points_earned=F("points_earned") + Case(
+                *[When(user_id=user_id, date=day, then=Value(delta)) for (user_id, day), delta in batch.items()],
+                default=Value(0),
+                output_field=IntegerField(),
+            ))
+            rollups.add_points_bulk(batch, new_days=set(batch) - existing)
+
+        return dict(User.objects.filter(pk__in=per_user).values_list("pk", "total_points"))
+
+    @staticmethod
+    def _after_write(totals):
+        for user_id, total in totals.items():
+            leaderboard.points_changed(user_id, total)
+            stats_changed.send(sender=PointsBuffer, user_id=user_id)
+            try:
+                AchievementService.check_points_achievements(User(pk=user_id, total_points=total))
+            except Exception:
+                pass
+
+    def _key(self, user_id) -> str:
+        return f"{self.KEY_PREFIX}:{user_id}"
+
+    def _shared_add(self, user_id, delta):
+        cache = caches[self.alias]
+        key = self._key(user_id)
+        # outlives a crashed worker only for a while, refreshed while the user is active
+        ttl = self.interval * 20
+        try:
+            created = cache.add(key, 0, timeout=ttl)
+            if delta >= 0:
+                cache.incr(key, delta)
+                cache.touch(key, ttl)
+            elif not created:
+                left = cache.decr(key, -delta)
+                if left < 0:
+                    # the key expired after some of these points were counted: back
+                    # to 0 with an incr, so other workers' increments are kept
+                    cache.incr(key, -left)
+        except Exception:
+            logger.warning("could not update pending points of user %s", user_id, exc_info=True)
+
+    def _ensure_timer(self):
+        with self._lock:
+            if self._timer is not None and self._timer.is_alive():
+                return
+            self._timer = threading.Thread(target=self._run_timer, name="points-flush", daemon=True)
+            self._timer.start()
+
+    def _run_timer(self):
+        while True:
+            time.sleep(self.interval)
+            # this thread outlives requests, don't reuse a dead connection
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("points flush failed")
+
+
+# one buffer per process, flushed on exit too
+points_buffer = PointsBuffer()
+atexit.register(points_buffer.flush)
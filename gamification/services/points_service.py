@@ -1,21 +1,34 @@
 # gamification/services/points_service.py
 
 from datetime import date
-from django.db import transaction
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import F
 from gamification.models import DailyStatistic
 from gamification.services.achievement_service import AchievementService
+from gamification.services.leaderboard import leaderboard
+from gamification.services import rollups
+from gamification.services.points_buffer import points_buffer
+from gamification.services.stats_version import stats_changed
+from users.services.user_cache import user_cache
+
+User = get_user_model()
 
 
 class PointsService:
     """
     Manages user points addition and related achievements:
     - AddS points to the user
-    - Updates DailyStatistic with earned points
+    - Updates DailyStatistic with earned points (and its week / month rollups)
     - Checks and unlocks point-based achievements
+
+    Both counters are incremented in the database (F expressions), nothing is
+    read in Python first: concurrent answers of the same user can't lose points.
+    With GAMIFICATION_POINTS_WRITE_BEHIND the increments go to points_buffer and
+    are written in bulk later.
     """
 
     @staticmethod
-    @transaction.atomic
     def add_points(user, amount):
         """
         - Add points to the user and update daily statistics.
@@ -24,17 +37,27 @@ class PointsService:
         if amount <= 0:
             return user.total_points
 
-        user.total_points = (user.total_points or 0) + int(amount)
-        user.save(update_fields=["total_points"])
-
+        amount = int(amount)
         today = date.today()
-        daily, _ = DailyStatistic.objects.get_or_create(
-            user=user,
-            date=today,
-        )
 
-        daily.points_earned = (daily.points_earned or 0) + int(amount)
-        daily.save(update_fields=["points_earned"])
+        if points_buffer.enabled:
+            # achievements are checked when the buffer is flushed
+            points_buffer.add(user, amount, today)
+            user.total_points = points_buffer.total_points(user)
+            return user.total_points
+
+        # short transaction: only the increments hold row locks
+        with transaction.atomic():
+            User.objects.filter(pk=user.pk).update(total_points=F("total_points") + amount)
+            new_day = PointsService._add_daily_points(user, today, amount)
+            rollups.add_points(user.pk, today, amount, new_day)
+
+        # .update() sends no post_save, drop the middleware copy by hand
+        user_cache.invalidate(user.pk)
+
+        user.total_points = User.objects.filter(pk=user.pk).values_list("total_points", flat=True).get()
+        leaderboard.points_changed(user.pk, user.total_points)
+        stats_changed.send(sender=PointsService, user_id=user.pk)
 
         try:
             AchievementService.check_points_achievements(user)
@@ -42,3 +65,24 @@ class PointsService:
             pass
 
         return user.total_points
+
+    @staticmethod
+    def _add_daily_points(user, day, amount):
+        """Returns True if the daily row was created"""
+        updated = DailyStatistic.objects.filter(user=user, date=day).update(
+            points_earned=F("points_earned") + amount
+        )
+        if updated:
+            return False
+
+        # first points of the day
+        try:
+            with transaction.atomic():
+                DailyStatistic.objects.create(user=user, date=day, points_earned=amount)
+            return True
+        except IntegrityError:
+            # another request created the row first
+            DailyStatistic.objects.filter(user=user, date=day).update(
+                points_earned=F("points_earned") + amount
+            )
+            return False
@@ -0,0 +1,134 @@
+# gamification/services/practice_stats_service.py
+
+from datetime import date
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from flashcards.models import PracticeSession, PracticeSessionDetail
+from gamification.models import DailyStatistic
+from gamification.services import rollups
+from gamification.services.stats_version import stats_changed
+
+
+class PracticeStatsService:
+    """
+    Fills the practice counters of DailyStatistic (phrases_practiced,
+    correct_answers, practice_minutes):
+
+    - a finished session is added to today's row in one statement (update,
+      create only for the first activity of the day), the answers themselves
+      cost nothing extra: the session already counts them
+    - backfill() rebuilds them from practice_session_details for the history
+    """
+
+    COUNTERS = ('phrases_practiced', 'correct_answers', 'practice_minutes')
+
+    @staticmethod
+    def record_session(session, day=None):
+        """Add a completed session to the user's daily row and its rollups"""
+        day = day or date.today()
+        deltas = {
+            'phrases_practiced': session.phrases_practiced,
+            'correct_answers': session.correct_answers,
+            'practice_minutes': PracticeStatsService._minutes(session.duration_seconds),
+        }
+        deltas = {column: delta for column, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
+        with transaction.atomic():
+            new_day = PracticeStatsService._add_daily(session.user_id, day, deltas)
+            rollups.add(session.user_id, day, days_active=int(new_day), **deltas)
+        stats_changed.send(sender=PracticeStatsService, user_id=session.user_id)
+
+    @staticmethod
+    def backfill(chunk_size=5000) -> int:
+        """
+        Recompute the practice counters of every day with answers or finished
+        sessions, then the rollups. The answers are streamed ordered by user
+        and written in batches of upserts. Returns how many daily rows were written.
+        """
+        # seconds practiced per (user, day), one grouped query over the sessions
+        minutes = {
+            (user_id, day): PracticeStatsService._minutes(seconds)
+            for user_id, day, seconds in PracticeSession.objects.filter(
+                completed=True, completed_at__isnull=False
+            ).annotate(day=TruncDate('completed_at')).values('user_id', 'day').annotate(
+                seconds=Sum('duration_seconds')
+            ).values_list('user_id', 'day', 'seconds')
+        }
+
+        answers = PracticeSessionDetail.objects.order_by('practice_session__user_id', 'answered_at').values_list(
+            'practice_session__user_id', 'answered_at', 'was_correct'
+        )
+
+        written = 0
+        totals = {}
+        current_user = None
+        for user_id, answered_at, was_correct in answers.iterator(chunk_size=chunk_size):
+            # a user's days are complete once the next user starts
+            if user_id != current_user and len(totals) >= chunk_size:
+                written += PracticeStatsService._write(totals, minutes)
+                totals = {}
+            current_user = user_id
+
+            counts = totals.setdefault((user_id, timezone.localdate(answered_at)), [0, 0])
+            counts[0] += 1
+            counts[1] += int(bool(was_correct))
+
+        written += PracticeStatsService._write(totals, minutes)
+        # days with a finished session but no answer left
+        leftover = {key: [0, 0] for key in minutes}
+        written += PracticeStatsService._write(leftover, minutes)
+
+        rollups.rebuild(chunk_size=chunk_size)
+        stats_changed.send(sender=PracticeStatsService, user_id=None)
+        return written
+
+    # Internal helpers
+    @staticmethod
+    def _minutes(seconds):
+        return ((seconds or 0) + 30) // 60
+
+    @staticmethod
+    def _add_daily(user_id, day, deltas):
+        """Returns True if the daily row was created"""
+        increments = {column: F(column) + delta for column, delta in deltas.items()}
+        if DailyStatistic.objects.filter(user_id=user_id, date=day).update(**increments):
+            return False
+
+        try:
+            with transaction.atomic():
+                DailyStatistic.objects.create(user_id=user_id, date=day, **deltas)
+            return True
+        except IntegrityError:
+            # another request created the row first
+            DailyStatistic.objects.filter(user_id=user_id, date=day).update(**increments)
+            return False
+
+    @staticmethod
+    def _write(totals, minutes) -> int:
+        if not totals:
+            return 0
+        rows = [
+            DailyStatistic(
+                user_id=user_id,
+                date=day,
+                phrases_practiced=practiced,
+                correct_answers=correct,
+                practice_minutes=minutes.pop((user_id, day), 0),
+            )
+            for (user_id, day), (practiced, correct) in totals.items()
+        ]
+        # absolute values: existing rows keep their points and streak flag
+        DailyStatistic.objects.bulk_create(
+            rows,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['user', 'date'],
+            update_fields=list(PracticeStatsService.COUNTERS),
+        )
+        return len(rows)
@@ -0,0 +1,187 @@
+# gamification/services/rollups.py
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.db.models.functions import Greatest
+
+from gamification.models import DailyStatistic, MonthlyStatistic, WeeklyStatistic
+
+
+def week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+# (model, period column, first day of the period of a date)
+ROLLUPS = [
+    (WeeklyStatistic, 'week_start', week_start),
+    (MonthlyStatistic, 'month_start', month_start),
+]
+
+# DailyStatistic columns added up in the rollups, days_active counts the daily rows
+COUNTERS = ('points_earned', 'phrases_practiced', 'correct_answers', 'practice_minutes', 'days_active')
+
+# best_streak of a month: the highest StreakService streak recorded in it, at
+# least 1 once the month has an active day. rebuild() finds the same streaks in
+# the daily rows: streak_maintained continues the run of the day before.
+
+
+def add(user_id, day, **deltas):
+    """
+    Add DailyStatistic increments to the week and month rows of that day.
+    A new daily row is days_active=1.
+    """
+    deltas = {column: delta for column, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    for model, field, start in ROLLUPS:
+        lookup = {'user_id': user_id, field: start(day)}
+        increments = {column: F(column) + delta for column, delta in deltas.items()}
+        created = dict(deltas)
+        if model is MonthlyStatistic and deltas.get('days_active'):
+            increments['best_streak'] = Greatest(F('best_streak'), 1)
+            created['best_streak'] = 1
+        if model.objects.filter(**lookup).update(**increments):
+            continue
+
+        # first activity of the period
+        try:
+            with transaction.atomic():
+                model.objects.create(**lookup, **created)
+        except IntegrityError:
+            model.objects.filter(**lookup).update(**increments)
+
+
+def add_points(user_id, day, amount, new_day=False):
+    add(user_id, day, points_earned=amount, days_active=int(new_day))
+
+
+def add_bulk(batch):
+    """Same for a {(user_id, day): {column: delta}} batch, two statements per table"""
+    for model, field, start in ROLLUPS:
+        per_row = defaultdict(lambda: defaultdict(int))
+        for (user_id, day), deltas in batch.items():
+            for column, delta in deltas.items():
+                per_row[(user_id, start(day))][column] += delta
+        if not per_row:
+            continue
+
+        # rows of a new period are created empty, then incremented with the rest
+        model.objects.bulk_create(
+            [model(user_id=user_id, **{field: period}) for user_id, period in per_row],
+            ignore_conflicts=True,
+        )
+        rows = Q()
+        for user_id, period in per_row:
+            rows |= Q(user_id=user_id, **{field: period})
+
+        increments = {}
+        for column in COUNTERS:
+            whens = [
+                When(user_id=user_id, then=Value(deltas[column]), **{field: period})
+                for (user_id, period), deltas in per_row.items() if deltas.get(column)
+            ]
+            if whens:
+                increments[column] = F(column) + Case(*whens, default=Value(0), output_field=IntegerField())
+        if model is MonthlyStatistic and 'days_active' in increments:
+            increments['best_streak'] = Greatest(F('best_streak'), Case(
+                *[
+                    When(user_id=user_id, then=Value(1), **{field: period})
+                    for (user_id, period), deltas in per_row.items() if deltas.get('days_active')
+                ],
+                default=Value(0),
+                output_field=IntegerField(),
+            ))
+        if increments:
+            model.objects.filter(rows).update(**increments)
+
+
+def add_points_bulk(batch, new_days=()):
+    """{(user_id, day): points}, new_days: the (user_id, day) whose daily row was just created"""
+    add_bulk({
+        key: {'points_earned': points, 'days_active': int(key in new_days)}
+        for key, points in batch.items()
+    })
+
+
+def record_streak(user_id, day, streak):
+    """Keep the best streak of the month of that day"""
+    lookup = {'user_id': user_id, 'month_start': month_start(day)}
+    if MonthlyStatistic.objects.filter(**lookup).update(best_streak=Greatest(F('best_streak'), streak)):
+        return
+    try:
+        with transaction.atomic():
+            MonthlyStatistic.objects.create(best_streak=streak, **lookup)
+    except IntegrityError:
+        MonthlyStatistic.objects.filter(**lookup).update(best_streak=Greatest(F('best_streak'), streak))
+
+
+def rebuild(user_ids=None, chunk_size=10000) -> int:
+    """
+    Recompute the rollups from the daily rows (backfills, rows edited by hand).
+    Streams the daily rows ordered by user and date and writes the rollups in
+    chunks. Returns how many daily rows were read.
+    """
+    daily = DailyStatistic.objects.order_by('user_id', 'date')
+    if user_ids is not None:
+        daily = daily.filter(user_id__in=user_ids)
+
+    read = 0
+    current_user, periods = None, None
+    previous_day, streak = None, 0
+    pending = defaultdict(list)
+
+    with transaction.atomic():
+        for model, _, _ in ROLLUPS:
+            rollups = model.objects.all()
+            if user_ids is not None:
+                rollups = rollups.filter(user_id__in=user_ids)
+            rollups.delete()
+
+        rows = daily.values_list('user_id', 'date', 'streak_maintained', *COUNTERS[:-1]).iterator(chunk_size=chunk_size)
+        for user_id, day, maintained, *values in rows:
+            if user_id != current_user:
+                _collect(current_user, periods, pending)
+                if sum(len(objs) for objs in pending.values()) >= chunk_size:
+                    _flush(pending)
+                current_user, periods = user_id, defaultdict(lambda: defaultdict(int))
+                previous_day, streak = None, 0
+
+            # the streak StreakService recorded that day
+            streak = streak + 1 if maintained and previous_day == day - timedelta(days=1) else 1
+            previous_day = day
+
+            for model, _, start in ROLLUPS:
+                totals = periods[(model, start(day))]
+                for column, value in zip(COUNTERS, values):
+                    totals[column] += value
+                totals['days_active'] += 1
+                if model is MonthlyStatistic:
+                    totals['best_streak'] = max(totals['best_streak'], streak)
+            read += 1
+
+        _collect(current_user, periods, pending)
+        _flush(pending)
+
+    return read
+
+
+def _collect(user_id, periods, pending):
+    if user_id is None:
+        return
+    fields = {model: field for model, field, _ in ROLLUPS}
+    for (model, period), totals in periods.items():
+        pending[model].append(model(user_id=user_id, **{fields[model]: period}, **totals))
+
+
+def _flush(pending):
+    for model, objs in pending.items():
+        model.objects.bulk_create(objs, batch_size=1000)
+    pending.clear()
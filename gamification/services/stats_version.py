@@ -0,0 +1,87 @@
+# gamification/services/stats_version.py
+
+import time
+from datetime import date, datetime, time as day_start, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import caches
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+# Sent by the gamification services when a user's points, streak, achievements
+# or daily stats change. Arguments: user_id (None: every user, e.g. a backfill).
+stats_changed = Signal()
+
+
+class StatsVersion:
+    """
+    Per-user version of the dashboard data, source of the ETag / Last-Modified
+    of the read-mostly gamification endpoints.
+
+    - bumped by stats_changed, an unchanged version means an unchanged dashboard
+    - kept in the default cache: with several workers CACHE_BACKEND must be
+      shared, or a worker would answer 304 with its own old version; off
+      (GAMIFICATION_STATS_HTTP_CACHE) by default unless it is
+    - a lost version is recreated as a new one, the client gets one 200
+    - an epoch, bumped for everybody at once, is part of every version
+    """
+
+    KEY_PREFIX = "stats_version"
+    EPOCH = "epoch"
+
+    def __init__(self, ttl=None, alias=None):
+        self.ttl = ttl or getattr(settings, 'GAMIFICATION_STATS_VERSION_TTL', 60 * 60 * 24 * 7)
+        self.alias = alias or 'default'
+
+    @property
+    def enabled(self) -> bool:
+        return getattr(settings, 'GAMIFICATION_STATS_HTTP_CACHE', False)
+
+    def get(self, user_id) -> tuple:
+        """(token, modified timestamp) of this user's stats"""
+        user_key, epoch_key = self._key(user_id), self._key(self.EPOCH)
+        values = caches[self.alias].get_many([user_key, epoch_key])
+
+        user = values.get(user_key) or self._create(user_key)
+        epoch = values.get(epoch_key) or self._create(epoch_key)
+        return f"{epoch[0]:x}.{user[0]:x}", max(user[1], epoch[1])
+
+    def bump(self, user_id):
+        caches[self.alias].set(self._key(user_id), self._new(), self.ttl)
+
+    def bump_all(self):
+        caches[self.alias].set(self._key(self.EPOCH), self._new(), self.ttl)
+
+    def validators(self, user_id) -> tuple:
+        """(ETag, Last-Modified) of this user's dashboard"""
+        token, modified = self.get(user_id)
+        today = date.today()
+        # ranges like "the last 7 days" move at midnight without any change
+        midnight = timezone.make_aware(datetime.combine(today, day_start.min))
+        last_modified = max(datetime.fromtimestamp(modified, tz=dt_timezone.utc), midnight)
+        return f'"{token}.{today:%Y%m%d}"', last_modified
+
+    # Internal helpers
+    def _create(self, key):
+        # two workers creating it at once keep the same one
+        cache = caches[self.alias]
+        cache.add(key, self._new(), self.ttl)
+        return cache.get(key) or self._new()
+
+    @staticmethod
+    def _new():
+        return time.time_ns(), time.time()
+
+    def _key(self, user_id) -> str:
+        return f"{self.KEY_PREFIX}:{user_id}"
+
+
+stats_version = StatsVersion()
+
+
+@receiver(stats_changed)
+def bump_stats_version(sender, user_id=None, **kwargs):
+    if user_id is None:
+        stats_version.bump_all()
+    else:
+        stats_version.bump(user_id)
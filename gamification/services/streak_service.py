@@ -2,7 +2,9 @@
 from datetime import date, timedelta
 from django.db import transaction
 from gamification.models import DailyStatistic
+from gamification.services import rollups
 from gamification.services.achievement_service import AchievementService
+from gamification.services.stats_version import stats_changed
 
 
 class StreakService:
@@ -11,6 +13,8 @@ class StreakService:
     @transaction.atomic
     def register_activity(user):
         today = date.today()
+        # request.user may come from the middleware cache
+        user.refresh_from_db(fields=["current_streak", "longest_streak", "last_practice_date"])
 
         if user.last_practice_date is None:
             user.current_streak = 1
@@ -39,6 +43,12 @@ class StreakService:
         daily.streak_maintained = user.current_streak > 1
         daily.save(update_fields=["streak_maintained"])
 
+        # week / month rows: a new active day and the month's best streak
+        if created:
+            rollups.add(user.pk, today, days_active=1)
+        rollups.record_streak(user.pk, today, user.current_streak)
+        stats_changed.send(sender=StreakService, user_id=user.pk)
+
         try:
             AchievementService.check_streak_achievements(user)
         except Exception:
@@ -0,0 +1,43 @@
+# gamification/signals.py
+
+from django.conf import settings
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from gamification.models import AchievementProgress, UserAchievement
+from gamification.services.achievement_service import AchievementService
+from gamification.services.stats_version import stats_changed
+from users.services.response_cache import response_cache
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def forget_achievements_of_new_user(sender, instance, created, **kwargs):
+    # a reused id must not inherit the cached achievements of a deleted user
+    if created:
+        AchievementService.forget(instance.pk)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=UserAchievement)
+def forget_deleted_achievements(sender, instance, **kwargs):
+    user_id = getattr(instance, 'user_id', instance.pk)
+    AchievementService.forget(user_id)
+    stats_changed.send(sender=sender, user_id=user_id)
+
+
+@receiver(post_delete, sender='phrases.Phrase')
+def count_deleted_phrase(sender, instance, **kwargs):
+    # the languages stay, they were used once
+    AchievementProgress.objects.filter(user_id=instance.user_id, phrases_saved__gt=0).update(
+        phrases_saved=F('phrases_saved') - 1
+    )
+
+
+@receiver(stats_changed)
+def invalidate_cached_responses(sender, user_id=None, **kwargs):
+    # points, streak, achievements or daily stats: the dashboard responses are stale
+    if user_id is None:
+        response_cache.invalidate_all()
+    else:
+        response_cache.invalidate(user_id)
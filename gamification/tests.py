@@ -1,14 +1,34 @@
 # gamification/tests.py
 
-from django.test import TestCase
+import threading
+import time
+from unittest import skipIf
+from unittest.mock import patch
+
+from django.db import connection
+from django.core.cache import caches
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from datetime import date, timedelta
-from gamification.models import UserAchievement, DailyStatistic
+from gamification.models import AchievementProgress, UserAchievement, DailyStatistic, MonthlyStatistic, WeeklyStatistic
 from gamification.services.points_service import PointsService
+from gamification.services.points_buffer import PointsBuffer
 from gamification.services.streak_service import StreakService
 from gamification.services.achievement_service import AchievementService
+from gamification.services.achievement_rules import achievement_engine
+from gamification.services.leaderboard import Leaderboard, Ranking, WindowLeaderboard, leaderboard, window_leaderboards
+from gamification.services import rollups
+from gamification.services.rollups import month_start, week_start
+from gamification.services.practice_stats_service import PracticeStatsService
+from gamification.services.stats_version import stats_changed
+from users.services.response_cache import response_cache
+from flashcards.models import PracticeSessionDetail
+from flashcards.models import PracticeSession
+from phrases.models import Language, Phrase
 
 User = get_user_model()
 
@@ -75,6 +95,123 @@ class PointsServiceTestCase(TestCase):
         self.assertTrue(achievement)
 
 
+@skipIf(connection.vendor == 'sqlite', "sqlite serializes writers, the race needs a real server")
+class PointsServiceConcurrencyTestCase(TransactionTestCase):
+    """Test that parallel add_points calls don't lose increments"""
+
+    WRITERS = 8
+    CALLS = 5
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123'
+        )
+
+    def test_parallel_writers_keep_every_point(self):
+        """Test N threads adding points to the same user at the same time"""
+        barrier = threading.Barrier(self.WRITERS)
+        errors = []
+
+        def writer():
+            # every thread has its own connection, like separate workers
+            user = User.objects.get(pk=self.user.pk)
+            try:
+                barrier.wait()
+                for _ in range(self.CALLS):
+                    PointsService.add_points(user, 10)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=writer) for _ in range(self.WRITERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        expected = self.WRITERS * self.CALLS * 10
+        self.assertEqual(errors, [])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.total_points, expected)
+        daily = DailyStatistic.objects.get(user=self.user, date=date.today())
+        self.assertEqual(daily.points_earned, expected)
+
+
+@override_settings(GAMIFICATION_POINTS_WRITE_BEHIND=True)
+class PointsBufferTestCase(APITestCase):
+    """Test the write-behind mode of PointsService"""
+
+    def setUp(self):
+        caches['default'].clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123'
+        )
+        # the timer never fires during a test, flushes are explicit
+        self.buffer = PointsBuffer(interval=3600, max_pending=100)
+        for target in ('gamification.services.points_service.points_buffer', 'gamification.views.points_buffer'):
+            patcher = patch(target, self.buffer)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_points_are_not_written_until_flush(self):
+        """Test that add_points only buffers and returns the total with pending points"""
+        PointsService.add_points(self.user, 10)
+        total = PointsService.add_points(self.user, 5)
+
+        self.assertEqual(total, 15)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.total_points, 0)
+        self.assertFalse(DailyStatistic.objects.filter(user=self.user).exists())
+
+    def test_points_view_sees_buffered_points(self):
+        """Test that GET /points/ includes what is waiting for the flush"""
+        PointsService.add_points(self.user, 10)
+
+        response = self.client.get('/api/gamification/points/')
+
+        self.assertEqual(response.data['total_points'], 10)
+
+    def test_flush_writes_users_and_daily_rows(self):
+        """Test that one flush applies every pending delta and unlocks achievements"""
+        other = User.objects.create_user(username='other', email='other@test.com', password='testpass123')
+        PointsService.add_points(self.user, 600)
+        PointsService.add_points(self.user, 500)
+        PointsService.add_points(other, 20)
+
+        self.assertEqual(self.buffer.flush(), 2)
+
+        self.user.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.user.total_points, 1100)
+        self.assertEqual(other.total_points, 20)
+        self.assertEqual(DailyStatistic.objects.get(user=self.user, date=date.today()).points_earned, 1100)
+        self.assertTrue(UserAchievement.objects.filter(user=self.user, achievement_type='points_1000').exists())
+        self.assertEqual(self.buffer.pending_points(self.user.pk), 0)
+        self.assertEqual(WeeklyStatistic.objects.get(user=self.user).points_earned, 1100)
+        self.assertEqual(MonthlyStatistic.objects.get(user=other).points_earned, 20)
+
+
+    def test_expired_pending_counter_does_not_go_negative(self):
+        """Test that a shared counter lost between add and flush doesn't hide later points"""
+        PointsService.add_points(self.user, 10)
+        caches['default'].delete(self.buffer._key(self.user.pk))
+        PointsService.add_points(self.user, 5)
+
+        self.buffer.flush()
+        self.assertEqual(self.buffer.pending_points(self.user.pk), 0)
+        self.assertEqual(caches['default'].get(self.buffer._key(self.user.pk)), 0)
+
+        PointsService.add_points(self.user, 7)
+        self.assertEqual(self.buffer.total_points(self.user), 22)
+
+
 class StreakServiceTestCase(TestCase):
     """Test StreakService functionality"""
     
@@ -205,6 +342,23 @@ class AchievementServiceTestCase(TestCase):
         self.assertIn('points_5000', achievement_types)
         self.assertNotIn('points_10000', achievement_types)
     
+    def test_already_unlocked_tiers_cost_no_query(self):
+        """Test that later checks above every threshold don't touch the db"""
+        self.user.total_points = 12000
+        AchievementService.check_points_achievements(self.user)
+
+        with self.assertNumQueries(0):
+            AchievementService.check_points_achievements(self.user)
+
+        self.assertEqual(UserAchievement.objects.filter(user=self.user).count(), 3)
+
+    def test_deleted_achievement_is_unlocked_again(self):
+        """Test that removing an achievement drops the cached set"""
+        AchievementService.unlock(self.user, 'points_1000')
+        UserAchievement.objects.filter(user=self.user).get().delete()
+
+        self.assertTrue(AchievementService.unlock(self.user, 'points_1000'))
+
     def test_check_streak_achievements_unlocks_correctly(self):
         """Test that check_streak_achievements unlocks based on current streak"""
         self.user.current_streak = 30
@@ -220,6 +374,514 @@ class AchievementServiceTestCase(TestCase):
         self.assertNotIn('streak_100', achievement_types)
 
 
+class AchievementRulesTestCase(TestCase):
+    """Test the achievement rules evaluated from the progress counters"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123'
+        )
+        self.languages = [
+            Language.objects.create(code=code, name=code) for code in ('en', 'es', 'fr')
+        ]
+
+    def create_phrase(self, source=0, target=1):
+        phrase = Phrase.objects.create(
+            user=self.user,
+            original_text='hello',
+            translated_text='hola',
+            source_language=self.languages[source],
+            target_language=self.languages[target],
+        )
+        achievement_engine.emit(self.user, 'phrase_created', phrase=phrase)
+        return phrase
+
+    def unlocked(self):
+        return set(UserAchievement.objects.filter(user=self.user).values_list('achievement_type', flat=True))
+
+    def test_phrases_50_unlocked_from_counter(self):
+        """Test that the 50th phrase unlocks phrases_50 without counting phrases"""
+        AchievementProgress.objects.create(user=self.user, phrases_saved=49)
+
+        self.create_phrase()
+
+        self.assertIn('phrases_50', self.unlocked())
+        self.assertEqual(AchievementProgress.objects.get(user=self.user).phrases_saved, 50)
+
+    def test_polyglot_needs_three_languages(self):
+        """Test that polyglot is unlocked with the third language"""
+        self.create_phrase(0, 1)
+        self.assertNotIn('polyglot', self.unlocked())
+
+        self.create_phrase(0, 2)
+        self.assertIn('polyglot', self.unlocked())
+
+    def test_deleted_phrase_decrements_counter(self):
+        """Test that deleting a phrase lowers phrases_saved"""
+        phrase = self.create_phrase()
+        phrase.delete()
+
+        self.assertEqual(AchievementProgress.objects.get(user=self.user).phrases_saved, 0)
+
+    def test_perfect_sessions_and_speed_demon(self):
+        """Test that perfect_10 counts perfect sessions and speed_demon a fast timed one"""
+        AchievementProgress.objects.create(user=self.user, perfect_sessions=9)
+        session = PracticeSession.objects.create(
+            user=self.user, session_type='timed', correct_answers=5,
+            duration_seconds=90, completed=True,
+        )
+
+        achievement_engine.emit(self.user, 'session_completed', session=session)
+
+        self.assertEqual(self.unlocked(), {'perfect_10', 'speed_demon'})
+
+    def test_imperfect_session_does_not_count(self):
+        """Test that a session with a wrong answer leaves the counter alone"""
+        session = PracticeSession.objects.create(
+            user=self.user, session_type='flashcard', correct_answers=5,
+            incorrect_answers=1, completed=True,
+        )
+
+        with self.assertNumQueries(0):
+            achievement_engine.emit(self.user, 'session_completed', session=session)
+
+        self.assertFalse(AchievementProgress.objects.filter(user=self.user).exists())
+
+    def test_phrase_endpoint_emits_event(self):
+        """Test that creating a phrase through the API updates the progress"""
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+
+        response = client.post(reverse('phrase-list'), {
+            'original_text': 'hello',
+            'translated_text': 'hola',
+            'source_language': self.languages[0].id,
+            'target_language': self.languages[1].id,
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        progress = AchievementProgress.objects.get(user=self.user)
+        self.assertEqual(progress.phrases_saved, 1)
+        self.assertEqual(len(progress.languages), 2)
+
+
+class LeaderboardTestCase(TestCase):
+    """Test the leaderboard snapshot and rank lookups"""
+
+    def setUp(self):
+        self.board = Leaderboard(size=2, alias='default')
+        self.board.reset()
+        self.users = [
+            User.objects.create_user(username=f'user{i}', password='pass123', total_points=points)
+            for i, points in enumerate((300, 200, 200, 100))
+        ]
+
+    def test_top_is_cached_with_shared_ranks(self):
+        """Test that the top is read once and equal points share the rank"""
+        self.assertEqual(
+            [(e['rank'], e['total_points']) for e in self.board.top()],
+            [(1, 300), (2, 200)],
+        )
+
+        with self.assertNumQueries(0):
+            self.board.top()
+
+    def test_points_reaching_the_top_drop_the_snapshot(self):
+        """Test that only changes at or above the cutoff rebuild the snapshot"""
+        self.board.top()
+
+        self.board.points_changed(self.users[3].pk, 150)
+        with self.assertNumQueries(0):
+            self.board.top()
+
+        User.objects.filter(pk=self.users[3].pk).update(total_points=1000)
+        self.board.points_changed(self.users[3].pk, 1000)
+        self.assertEqual(self.board.top()[0]['username'], 'user3')
+
+    def test_rank_counts_users_with_more_points(self):
+        """Test that rank is 1 + users with more points"""
+        self.assertEqual(self.board.rank(300), 1)
+        self.assertEqual(self.board.rank(200), 2)
+        self.assertEqual(self.board.rank(100), 4)
+
+        with self.assertNumQueries(0):
+            self.board.rank(250)
+
+    def test_expired_totals_are_reloaded_off_the_request(self):
+        """Test that an expired rank array keeps being served while a background reload replaces it"""
+        self.board.rank(300)
+        User.objects.filter(pk=self.users[3].pk).update(total_points=1000)
+        self.board._totals_loaded_at -= self.board.rank_refresh + 1
+
+        with patch.object(Leaderboard, '_reload_in_background') as reload, self.assertNumQueries(0):
+            self.assertEqual(self.board.rank(300), 1)
+            self.assertEqual(self.board.count(), 4)
+        reload.assert_called_once()
+
+        self.board.reload_totals()
+        self.assertEqual(self.board.rank(300), 2)
+
+    def test_ranking_pages_past_the_snapshot(self):
+        """Test that pages inside the snapshot are cached and later ones keep the shared ranks"""
+        ranking = Ranking(self.board)
+        self.assertEqual(len(ranking), 4)
+        ranking[0:2]
+
+        with self.assertNumQueries(0):
+            self.assertEqual([e['username'] for e in ranking[0:2]], ['user0', 'user1'])
+        self.assertEqual(
+            [(e['rank'], e['username'], e['total_points']) for e in ranking[2:4]],
+            [(2, 'user2', 200), (4, 'user3', 100)],
+        )
+
+
+class StatRollupsTestCase(TestCase):
+    """Test the weekly/monthly rollups kept with the daily rows"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+
+    def test_services_keep_rollups_like_a_rebuild(self):
+        """Test that PointsService and StreakService leave what rebuild computes"""
+        StreakService.register_activity(self.user)
+        PointsService.add_points(self.user, 30)
+        PointsService.add_points(self.user, 20)
+
+        month = MonthlyStatistic.objects.get(user=self.user)
+        self.assertEqual((month.points_earned, month.days_active, month.best_streak), (50, 1, 1))
+        week = WeeklyStatistic.objects.get(user=self.user)
+        self.assertEqual((week.points_earned, week.days_active), (50, 1))
+
+        incremental = list(MonthlyStatistic.objects.values('month_start', 'points_earned', 'days_active', 'best_streak'))
+        self.assertEqual(rollups.rebuild([self.user.pk]), 1)
+        self.assertEqual(
+            list(MonthlyStatistic.objects.values('month_start', 'points_earned', 'days_active', 'best_streak')),
+            incremental,
+        )
+
+    def test_rebuild_counts_streaks_and_counters(self):
+        """Test that rebuild adds up the daily rows of each period"""
+        day = date(2024, 3, 4)  # a Monday
+        for offset, points in ((0, 10), (1, 20), (2, 30), (5, 40)):
+            DailyStatistic.objects.create(
+                user=self.user, date=day + timedelta(days=offset),
+                points_earned=points, phrases_practiced=4, correct_answers=3,
+                streak_maintained=offset in (1, 2),
+            )
+
+        rollups.rebuild()
+
+        week = WeeklyStatistic.objects.get(user=self.user, week_start=day)
+        self.assertEqual((week.points_earned, week.phrases_practiced, week.days_active), (100, 16, 4))
+        month = MonthlyStatistic.objects.get(user=self.user, month_start=date(2024, 3, 1))
+        self.assertEqual((month.correct_answers, month.best_streak), (12, 3))
+
+
+    def test_incremental_best_streak_matches_rebuild(self):
+        """Test that a month of activity, points-only days and gaps rebuilds to the same values"""
+        today = [date(2024, 3, 1)]
+
+        class FakeDate(date):
+            @classmethod
+            def today(cls):
+                return today[0]
+
+        # register_activity (R) and points-only (P) days, a gap on the 7th, a new month
+        days = [(1, 'RP'), (2, 'R'), (3, 'P'), (4, 'R'), (5, 'RP'), (6, 'R'), (8, 'R'), (30, 'R'), (31, 'R')]
+        with patch('gamification.services.streak_service.date', FakeDate), \
+                patch('gamification.services.points_service.date', FakeDate):
+            for day, actions in days:
+                today[0] = date(2024, 3, day)
+                if 'R' in actions:
+                    StreakService.register_activity(self.user)
+                if 'P' in actions:
+                    PointsService.add_points(self.user, 10)
+            today[0] = date(2024, 4, 1)
+            PointsService.add_points(self.user, 10)
+
+        columns = ('month_start', 'points_earned', 'days_active', 'best_streak')
+        incremental = list(MonthlyStatistic.objects.filter(user=self.user).order_by('month_start').values_list(*columns))
+        week_columns = ('week_start', 'points_earned', 'days_active')
+        weeks = list(WeeklyStatistic.objects.filter(user=self.user).order_by('week_start').values_list(*week_columns))
+
+        rollups.rebuild([self.user.pk])
+
+        self.assertEqual(incremental, [(date(2024, 3, 1), 30, 9, 3), (date(2024, 4, 1), 10, 1, 1)])
+        self.assertEqual(
+            list(MonthlyStatistic.objects.filter(user=self.user).order_by('month_start').values_list(*columns)),
+            incremental,
+        )
+        self.assertEqual(
+            list(WeeklyStatistic.objects.filter(user=self.user).order_by('week_start').values_list(*week_columns)),
+            weeks,
+        )
+
+
+class PracticeStatsServiceTestCase(APITestCase):
+    """Test the practice counters of DailyStatistic"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.language = Language.objects.create(code='en', name='English')
+        self.phrase = Phrase.objects.create(
+            user=self.user, original_text='hello', translated_text='hola',
+            source_language=self.language, target_language=self.language,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def answer(self, session, *correct):
+        for was_correct in correct:
+            response = self.client.post(f'/api/flashcards/practice-sessions/{session.id}/detail/', {
+                'phrase_id': self.phrase.id, 'was_correct': was_correct,
+            }, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_completed_session_fills_daily_counters(self):
+        """Test that finishing a session adds its answers to today's row and the rollups"""
+        session = PracticeSession.objects.create(user=self.user, session_type='flashcard')
+        self.answer(session, True, True, False)
+
+        with patch('flashcards.helpers.PracticeStatsService.record_session',
+                   wraps=PracticeStatsService.record_session) as record_session:
+            response = self.client.post(f'/api/flashcards/practice-sessions/{session.id}/complete/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        record_session.assert_called_once()
+        daily = DailyStatistic.objects.get(user=self.user, date=date.today())
+        self.assertEqual((daily.phrases_practiced, daily.correct_answers), (3, 2))
+        self.assertEqual(daily.points_earned, 20)
+        week = WeeklyStatistic.objects.get(user=self.user)
+        self.assertEqual((week.phrases_practiced, week.correct_answers, week.days_active), (3, 2, 1))
+
+    def test_record_session_is_one_statement_on_an_existing_day(self):
+        """Test that a session on a day with a row costs one update per table"""
+        StreakService.register_activity(self.user)
+        session = PracticeSession(user=self.user, phrases_practiced=5, correct_answers=4, duration_seconds=600)
+
+        # daily, weekly and monthly updates inside a savepoint
+        with self.assertNumQueries(5):
+            PracticeStatsService.record_session(session)
+
+        daily = DailyStatistic.objects.get(user=self.user, date=date.today())
+        self.assertEqual((daily.phrases_practiced, daily.practice_minutes), (5, 10))
+
+    def test_backfill_rebuilds_counters_from_answers(self):
+        """Test that backfill recomputes the counters from practice_session_details"""
+        session = PracticeSession.objects.create(
+            user=self.user, session_type='flashcard', completed=True,
+            completed_at=timezone.now(), duration_seconds=120,
+        )
+        for was_correct in (True, False, True):
+            PracticeSessionDetail.objects.create(practice_session=session, phrase=self.phrase, was_correct=was_correct)
+        DailyStatistic.objects.create(user=self.user, date=timezone.localdate(), points_earned=30)
+
+        self.assertEqual(PracticeStatsService.backfill(chunk_size=2), 1)
+
+        daily = DailyStatistic.objects.get(user=self.user, date=timezone.localdate())
+        self.assertEqual(
+            (daily.phrases_practiced, daily.correct_answers, daily.practice_minutes, daily.points_earned),
+            (3, 2, 2, 30),
+        )
+        self.assertEqual(MonthlyStatistic.objects.get(user=self.user).phrases_practiced, 3)
+
+
+class WindowLeaderboardTestCase(APITestCase):
+    """Test the daily/weekly/monthly leaderboards read from the rollups"""
+
+    def setUp(self):
+        caches['default'].clear()
+        for board in window_leaderboards.values():
+            board.reset()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.other = User.objects.create_user(username='other', password='testpass123', total_points=5000)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_add_points_updates_week_and_month_rows(self):
+        """Test that PointsService increments the rollups with the daily row"""
+        PointsService.add_points(self.user, 30)
+        PointsService.add_points(self.user, 20)
+
+        today = date.today()
+        self.assertEqual(WeeklyStatistic.objects.get(user=self.user, week_start=week_start(today)).points_earned, 50)
+        self.assertEqual(MonthlyStatistic.objects.get(user=self.user, month_start=month_start(today)).points_earned, 50)
+
+    def test_window_ranks_points_of_the_period(self):
+        """Test that the weekly board ignores the all-time totals"""
+        PointsService.add_points(self.user, 40)
+        PointsService.add_points(self.other, 10)
+
+        top = WindowLeaderboard('weekly').top()
+
+        self.assertEqual([(e['username'], e['total_points']) for e in top], [('testuser', 40), ('other', 10)])
+        with self.assertNumQueries(0):
+            WindowLeaderboard('weekly').top()
+
+    def test_process_copy_expires_with_the_shared_snapshot(self):
+        """Test that a cached read skips the shared cache until the snapshot expires"""
+        board = WindowLeaderboard('daily', refresh=30)
+        PointsService.add_points(self.user, 40)
+        board.top()
+
+        with patch('gamification.services.leaderboard.caches') as shared:
+            self.assertEqual(board.top()[0]['total_points'], 40)
+        shared.__getitem__.assert_not_called()
+
+        PointsService.add_points(self.other, 90)
+        # 31 seconds later the shared snapshot has expired too
+        caches['default'].delete(board._key(board.period()))
+        with patch('gamification.services.leaderboard.time.time', return_value=time.time() + 31):
+            self.assertEqual(board.top()[0]['username'], 'other')
+
+    def test_leaderboard_endpoint_window(self):
+        """Test GET /gamification/leaderboard/?window=monthly and an unknown window"""
+        PointsService.add_points(self.other, 10)
+
+        response = self.client.get('/api/gamification/leaderboard/?window=monthly')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['username'], 'other')
+        self.assertEqual(response.data['results'][0]['total_points'], 10)
+
+        response = self.client.get('/api/gamification/leaderboard/?window=yearly')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(GAMIFICATION_STATS_HTTP_CACHE=True)
+class StatsHTTPCacheTestCase(APITestCase):
+    """Test ETag / Last-Modified / Cache-Control of the dashboard endpoints"""
+
+    URLS = [
+        '/api/gamification/streak/',
+        '/api/gamification/achievements/',
+        '/api/gamification/daily-stats/',
+        '/api/gamification/weekly-stats/',
+        '/api/gamification/monthly-stats/',
+    ]
+
+    def setUp(self):
+        caches['default'].clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_unchanged_dashboard_gets_304_without_queries(self):
+        """Test that a matching If-None-Match is answered before the view runs"""
+        for url in self.URLS:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertIn('private', response['Cache-Control'])
+            self.assertIn('Last-Modified', response)
+
+            with self.assertNumQueries(0):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_points_streak_and_achievements_change_the_etag(self):
+        """Test that every service change gives a new ETag"""
+        url = '/api/gamification/daily-stats/'
+        etag = self.client.get(url)['ETag']
+
+        for change in (
+            lambda: PointsService.add_points(self.user, 10),
+            lambda: StreakService.register_activity(self.user),
+            lambda: AchievementService.unlock(self.user, 'streak_7'),
+        ):
+            change()
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotEqual(response['ETag'], etag)
+            etag = response['ETag']
+
+    def test_new_etag_comes_with_the_database_streak(self):
+        """Test that a stale request.user (another worker's user_cache) is not sent with the new ETag"""
+        url = '/api/gamification/streak/'
+        etag = self.client.get(url)['ETag']
+
+        User.objects.filter(pk=self.user.pk).update(current_streak=5)
+        stats_changed.send(sender=StreakService, user_id=self.user.pk)
+
+        # self.user still has the old streak, like a copy cached before the change
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['streak'], 5)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etag_is_per_user(self):
+        """Test that another user's ETag doesn't match"""
+        etag = self.client.get('/api/gamification/streak/')['ETag']
+        other = User.objects.create_user(username='other', password='testpass123')
+        self.client.force_authenticate(user=other)
+
+        response = self.client.get('/api/gamification/streak/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(GAMIFICATION_STATS_HTTP_CACHE=False)
+    def test_disabled_sends_no_validators(self):
+        """Test that without a shared cache the endpoints never answer 304"""
+        response = self.client.get('/api/gamification/streak/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('ETag', response)
+
+
+@override_settings(RESPONSE_CACHE_TTL=3600)
+class ResponseCacheTestCase(APITestCase):
+    """Test the server-side cache of the dashboard responses"""
+
+    URLS = StatsHTTPCacheTestCase.URLS
+
+    def setUp(self):
+        caches['default'].clear()
+        response_cache.reset_stats()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_dashboard_is_served_from_cache(self):
+        """Test that a repeated request without validators costs no query"""
+        for url in self.URLS:
+            first = self.client.get(url)
+
+            with self.assertNumQueries(0):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data, first.data)
+
+        self.assertEqual(response_cache.stats()['hits'], len(self.URLS))
+
+    def test_services_invalidate_cached_responses(self):
+        """Test that points, streak and achievements are seen on the next request"""
+        self.assertEqual(self.client.get('/api/gamification/daily-stats/').data['data'], [])
+        PointsService.add_points(self.user, 10)
+        self.assertEqual(self.client.get('/api/gamification/daily-stats/').data['data'][0]['points_earned'], 10)
+
+        self.assertEqual(self.client.get('/api/gamification/streak/').data['streak'], 0)
+        StreakService.register_activity(self.user)
+        self.assertEqual(self.client.get('/api/gamification/streak/').data['streak'], 1)
+
+        self.assertEqual(self.client.get('/api/gamification/achievements/').data, [])
+        AchievementService.unlock(self.user, 'streak_7')
+        self.assertEqual(len(self.client.get('/api/gamification/achievements/').data), 1)
+
+        self.assertGreater(response_cache.stats()['invalidated'], 0)
+
+    def test_change_for_every_user_invalidates(self):
+        """Test that a backfill (user_id=None) drops the cached responses"""
+        url = '/api/gamification/weekly-stats/'
+        self.client.get(url)
+
+        stats_changed.send(sender=PracticeStatsService, user_id=None)
+
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+
 # ========================
 # API ENDPOINT TESTS
 # ========================
@@ -228,6 +890,7 @@ class GamificationAPITestCase(APITestCase):
     """Test Gamification API endpoints"""
     
     def setUp(self):
+        leaderboard.reset()
         self.client = APIClient()
         self.user = User.objects.create_user(
             username='testuser',
@@ -334,13 +997,74 @@ class GamificationAPITestCase(APITestCase):
         response = self.client.get('/api/gamification/leaderboard/')
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertGreaterEqual(len(response.data), 2)
+        self.assertEqual(response.data['count'], User.objects.count())
+        results = response.data['results']
+        self.assertGreaterEqual(len(results), 2)
         # Check ordering (highest points first)
         self.assertGreaterEqual(
-            response.data[0]['total_points'],
-            response.data[1]['total_points']
+            results[0]['total_points'],
+            results[1]['total_points']
         )
+
+    def test_leaderboard_endpoint_pages(self):
+        """Test that ?page= reaches users past the first page"""
+        User.objects.create_user(username='user2', password='pass123', total_points=1000)
+
+        response = self.client.get('/api/gamification/leaderboard/?limit=1&page=2')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNotNone(response.data['previous'])
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(response.data['results'][0]['username'], 'testuser')
+        self.assertEqual(response.data['results'][0]['rank'], 2)
     
+    def test_leaderboard_me_endpoint(self):
+        """Test GET /gamification/leaderboard/me/"""
+        for username, points in (('first', 900), ('second', 700), ('fourth', 100)):
+            User.objects.create_user(username=username, password='pass123', total_points=points)
+        self.user.total_points = 500
+        self.user.save()
+
+        response = self.client.get('/api/gamification/leaderboard/me/?neighbours=1')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['rank'], 3)
+        self.assertEqual([u['username'] for u in response.data['above']], ['second'])
+        self.assertEqual(response.data['above'][0]['rank'], 2)
+        self.assertEqual([u['username'] for u in response.data['below']], ['fourth'])
+
+    def test_stats_endpoints_use_one_query_whatever_the_range(self):
+        """Test that weekly and monthly stats are one read of the rollups"""
+        today = date.today()
+        for offset in range(0, 300, 3):
+            DailyStatistic.objects.create(
+                user=self.user, date=today - timedelta(days=offset),
+                phrases_practiced=10, correct_answers=8, points_earned=5,
+            )
+        # rows written by hand, the rollups are rebuilt from them
+        rollups.rebuild([self.user.pk])
+
+        for url in ('/api/gamification/weekly-stats/?weeks=2', '/api/gamification/weekly-stats/?weeks=52',
+                    '/api/gamification/monthly-stats/?months=1', '/api/gamification/monthly-stats/?months=12'):
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get('/api/gamification/weekly-stats/?weeks=1')
+        week = response.data['data'][0]
+        self.assertEqual(week['week_start'], today - timedelta(days=today.weekday()))
+        self.assertEqual(week['total_points'], 5 * week['days_practiced'])
+        self.assertEqual(week['average_accuracy'], 80.0)
+
+        response = self.client.get('/api/gamification/monthly-stats/?months=12')
+        self.assertEqual(response.data['months'], 12)
+        current = response.data['data'][-1]
+        self.assertEqual((current['year'], current['month']), (today.year, today.month))
+        self.assertEqual(
+            current['days_active'],
+            DailyStatistic.objects.filter(user=self.user, date__year=today.year, date__month=today.month).count()
+        )
+
     def test_endpoints_require_authentication(self):
         """Test that endpoints require authentication"""
         self.client.force_authenticate(user=None)
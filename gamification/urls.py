@@ -7,6 +7,7 @@ from .views import (
     AddPointsView,
     UserAchievementsView,
     LeaderboardView,
+    LeaderboardRankView,
     DailyStatsChartView,
     WeeklyStatsView,
     MonthlyStatsView,
@@ -26,6 +27,7 @@ urlpatterns = [
 
     # Leaderboard
     path("leaderboard/", LeaderboardView.as_view(), name="leaderboard"),
+    path("leaderboard/me/", LeaderboardRankView.as_view(), name="leaderboard-rank"),
 
 
     # Statistics for charts
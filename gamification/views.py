@@ -9,19 +9,57 @@ from gamification.services.streak_service import StreakService
 from gamification.models import UserAchievement
 from gamification.serializers import AchievementSerializer
 
-from rest_framework.generics import ListAPIView
 from gamification.serializers import LeaderboardSerializer
 
 from gamification.services.points_service import PointsService
+from gamification.services.points_buffer import points_buffer
+from gamification.services.leaderboard import Ranking, leaderboard, window_leaderboards
+from rest_framework.pagination import PageNumberPagination
 from rest_framework import status
+from functools import wraps
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+from gamification.services.stats_version import stats_version
+from users.services.response_cache import cached_response
 
 
 from datetime import date, timedelta
-from gamification.models import DailyStatistic
+from gamification.models import DailyStatistic, MonthlyStatistic, WeeklyStatistic
 from gamification.serializers import DailyStatisticSerializer
 
 User = get_user_model()
 
+
+def stats_http_cache(get):
+    """
+    Conditional GET for the read-mostly dashboard endpoints.
+    ETag / Last-Modified come from the user's stats version (stats_version.py):
+    an unchanged dashboard gets a 304 before any query or serializer runs.
+    """
+    @wraps(get)
+    def wrapper(self, request, *args, **kwargs):
+        if not stats_version.enabled:
+            return get(self, request, *args, **kwargs)
+
+        etag, last_modified = stats_version.validators(request.user.pk)
+        view = condition(
+            etag_func=lambda *a, **k: etag,
+            last_modified_func=lambda *a, **k: last_modified,
+        )(lambda req, *a, **k: get(self, req, *a, **k))
+
+        response = view(request, *args, **kwargs)
+        # the browser keeps it but asks again every time
+        patch_cache_control(
+            response,
+            private=True,
+            must_revalidate=True,
+            max_age=getattr(settings, 'GAMIFICATION_STATS_HTTP_MAX_AGE', 0),
+        )
+        return response
+    return wrapper
+
+
 class RegisterActivityView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -33,8 +71,12 @@ class RegisterActivityView(APIView):
 class CurrentStreakView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @stats_http_cache
+    @cached_response
     def get(self, request):
-        user = request.user
+        # request.user can be another worker's stale user_cache copy, the body
+        # goes out with the new ETag and is stored in the response cache
+        user = User.objects.get(pk=request.user.pk)
         return Response({
             "streak": user.current_streak,
             "best_streak": user.longest_streak,
@@ -47,6 +89,11 @@ class UserPointsView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
+        if points_buffer.enabled:
+            # points of this user still waiting for the flush are included
+            return Response({
+                "total_points": points_buffer.total_points(request.user)
+            })
         return Response({
             "total_points": request.user.total_points
         })
@@ -80,6 +127,8 @@ class AddPointsView(APIView):
 class UserAchievementsView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @stats_http_cache
+    @cached_response
     def get(self, request):
         achievements = UserAchievement.objects.filter(
             user=request.user
@@ -90,13 +139,77 @@ class UserAchievementsView(APIView):
 
 
 
-class LeaderboardView(ListAPIView):
+class LeaderboardPagination(PageNumberPagination):
+    page_size_query_param = 'limit'
+    max_page_size = 100
+
+
+class LeaderboardView(APIView):
+    """
+    Users by total points, paginated over the cached ranking.
+
+    ENDPOINT:
+        GET /api/gamification/leaderboard/?page=1&limit=20&window=weekly
+
+    QUERY PARAMS:
+        - page: Page number (default: 1)
+        - limit: Users per page (default: PAGE_SIZE, max: 100)
+        - window: all (default), daily, weekly or monthly; a window ranks
+          the points earned in the current day / week / month (its top
+          LEADERBOARD_SIZE users)
+    """
     permission_classes = [IsAuthenticated]
-    serializer_class = LeaderboardSerializer
 
-    def get_queryset(self):
-        return User.objects.order_by("-total_points")
-    
+    def get(self, request):
+        window = request.query_params.get('window', 'all')
+        if window == 'all':
+            # the pages inside the snapshot cost no query, later ones a LIMIT query
+            ranking = Ranking(leaderboard)
+        elif window in window_leaderboards:
+            ranking = window_leaderboards[window].top()
+        else:
+            return Response(
+                {"error": "window must be one of: all, daily, weekly, monthly"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        paginator = LeaderboardPagination()
+        page = paginator.paginate_queryset(ranking, request, view=self)
+        serializer = LeaderboardSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+
+class LeaderboardRankView(APIView):
+    """
+    Rank of the current user and the users around them.
+
+    ENDPOINT:
+        GET /api/gamification/leaderboard/me/?neighbours=2
+
+    QUERY PARAMS:
+        - neighbours: Users shown above and below (default: 2, max: 10)
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            count = min(max(int(request.query_params.get('neighbours', 2)), 0), 10)
+        except (TypeError, ValueError):
+            count = 2
+
+        if points_buffer.enabled:
+            total_points = points_buffer.total_points(request.user)
+        else:
+            total_points = request.user.total_points
+
+        around = leaderboard.neighbours(request.user, total_points, count)
+        return Response({
+            "rank": leaderboard.rank(total_points),
+            "username": request.user.username,
+            "total_points": total_points,
+            "above": LeaderboardSerializer(around["above"], many=True).data,
+            "below": LeaderboardSerializer(around["below"], many=True).data,
+        })
 
 
 
@@ -135,6 +248,8 @@ class DailyStatsChartView(APIView):
     """
     permission_classes = [IsAuthenticated]
 
+    @stats_http_cache
+    @cached_response
     def get(self, request):
         # Get days parameter from query string, default to 7
         try:
@@ -192,72 +307,47 @@ class WeeklyStatsView(APIView):
     """
     permission_classes = [IsAuthenticated]
 
+    @stats_http_cache
+    @cached_response
     def get(self, request): # Get weeks parameter
         try:
             weeks = int(request.query_params.get('weeks', 4)) # Default to 4 weeks
-            weeks = min(weeks, 52) # Max 52 weeks
+            weeks = min(max(weeks, 1), 52) # Max 52 weeks
         except (TypeError, ValueError):
             weeks = 4
 
-        end_date = date.today() 
-        start_date = end_date - timedelta(weeks=weeks*7)
+        end_date = date.today()
+        # calendar weeks (Monday first), the current one included
+        start_date = end_date - timedelta(days=end_date.weekday(), weeks=weeks - 1)
 
-        # Get all daily stats in range
-        stats = DailyStatistic.objects.filter(
+        # rollup rows kept up to date with the daily ones: a range read, nothing is added up
+        rows = WeeklyStatistic.objects.filter(
             user=request.user,
-            date__gte=start_date,
-            date__lte=end_date
-        ).order_by('date')
+            week_start__gte=start_date,
+            week_start__lte=end_date
+        ).order_by('week_start')
 
-        # Group by week
-        weekly_data = []
-        current_week = []
-        week_start = None
-
-        for stat in stats:
-            if week_start is None:
-                week_start = stat.date
-            
-            # Check if we're still in the same week
-            if (stat.date - week_start).days < 7:
-                current_week.append(stat)
-            else:
-                # Process completed week
-                if current_week:
-                    weekly_data.append(self._aggregate_week(current_week, week_start))
-                
-                # Start new week
-                week_start = stat.date
-                current_week = [stat]
-        
-        # Add last week if exists
-        if current_week:
-            weekly_data.append(self._aggregate_week(current_week, week_start))
+        weekly_data = [self._aggregate_week(row) for row in rows]
 
         return Response({
             "weeks": len(weekly_data),
             "data": weekly_data
         })
 
-    def _aggregate_week(self, stats, week_start):
-        """Helper to aggregate weekly statistics"""
-        total_phrases = sum(s.phrases_practiced for s in stats)
-        total_correct = sum(s.correct_answers for s in stats)
-        total_minutes = sum(s.practice_minutes for s in stats)
-        total_points = sum(s.points_earned for s in stats)
-        
+    def _aggregate_week(self, week):
+        """Helper to shape one WeeklyStatistic row"""
         accuracy = 0
-        if total_phrases > 0:
-            accuracy = round((total_correct / total_phrases) * 100, 2)
+        if week.phrases_practiced > 0:
+            accuracy = round((week.correct_answers / week.phrases_practiced) * 100, 2)
 
         return {
-            "week_start": week_start,
-            "week_end": week_start + timedelta(days=6),
-            "total_phrases": total_phrases,
-            "total_correct": total_correct,
-            "total_minutes": total_minutes,
-            "total_points": total_points,
-            "days_practiced": len(stats),
+            "week_start": week.week_start,
+            "week_end": week.week_start + timedelta(days=6),
+            "total_phrases": week.phrases_practiced,
+            "total_correct": week.correct_answers,
+            "total_minutes": week.practice_minutes,
+            "total_points": week.points_earned,
+            "days_practiced": week.days_active,
             "average_accuracy": accuracy
         }
 
@@ -282,6 +372,7 @@ class MonthlyStatsView(APIView):
             "total_correct": 400,
             "total_points": 2000,
             "days_active": 20,
+            "best_streak": 12,
             "average_accuracy": 80.0
             },
             ...
@@ -289,6 +380,8 @@ class MonthlyStatsView(APIView):
     """
     permission_classes = [IsAuthenticated]
 
+    @stats_http_cache
+    @cached_response
     def get(self, request): # Get months parameter
         try:
             months = int(request.query_params.get('months', 6))
@@ -297,8 +390,27 @@ class MonthlyStatsView(APIView):
             months = 6
 
         today = date.today()
-        monthly_data = []
 
+        # first day of the oldest month asked for
+        first_year, first_month = divmod(today.year * 12 + today.month - 1 - (months - 1), 12)
+        first_day = date(first_year, first_month + 1, 1)
+
+        # one range read of the rollup rows, empty months are filled below
+        by_month = {
+            month.month_start: month
+            for month in MonthlyStatistic.objects.filter(
+                user=request.user,
+                month_start__gte=first_day,
+                month_start__lte=today
+            )
+        }
+
+        month_names = [
+            "January", "February", "March", "April", "May", "June",
+            "July", "August", "September", "October", "November", "December"
+        ]
+
+        monthly_data = []
         for i in range(months):
             # Calculate month
             target_month = today.month - i # 0 = current month
@@ -308,35 +420,23 @@ class MonthlyStatsView(APIView):
                 target_month += 12
                 target_year -= 1
 
-            # Get stats for this month
-            stats = DailyStatistic.objects.filter(
-                user=request.user,
-                date__year=target_year,
-                date__month=target_month
-            )
-
-            total_phrases = sum(s.phrases_practiced for s in stats)
-            total_correct = sum(s.correct_answers for s in stats)
-            total_points = sum(s.points_earned for s in stats)
-            days_active = stats.count()
+            month = by_month.get(date(target_year, target_month, 1)) or MonthlyStatistic()
+            total_phrases = month.phrases_practiced
+            total_correct = month.correct_answers
 
             accuracy = 0
             if total_phrases > 0:
                 accuracy = round((total_correct / total_phrases) * 100, 2)
 
-            month_names = [
-                "January", "February", "March", "April", "May", "June",
-                "July", "August", "September", "October", "November", "December"
-            ]
-
             monthly_data.append({
                 "month": target_month,
                 "year": target_year,
                 "month_name": month_names[target_month - 1],
                 "total_phrases": total_phrases,
                 "total_correct": total_correct,
-                "total_points": total_points,
-                "days_active": days_active,
+                "total_points": month.points_earned,
+                "days_active": month.days_active,
+                "best_streak": month.best_streak,
                 "average_accuracy": accuracy
             })
 
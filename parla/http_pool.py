@@ -0,0 +1,94 @@
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+
+class PooledSession(requests.Session):
+    """
+    requests.Session that keeps its connections alive between calls
+    and counts how many requests reused an already open connection.
+    """
+
+    def __init__(self, name, pool_size, retries):
+        super().__init__()
+        self.name = name
+        self.total_requests = 0
+        self.reused_requests = 0
+        self._stats_lock = threading.Lock()
+
+        # only connection errors are retried: a stale keep-alive socket is the usual cause,
+        # read timeouts are left to the circuit breaker instead of doubling the wait
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            max_retries=Retry(total=retries, connect=retries, read=0, status=0, other=0),
+        )
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def request(self, method, url, *args, **kwargs):
+        opened_before = self.connections_opened()
+        response = super().request(method, url, *args, **kwargs)
+
+        # approximate under concurrency, the totals below are exact
+        response.connection_reused = self.connections_opened() == opened_before
+        with self._stats_lock:
+            self.total_requests += 1
+            if response.connection_reused:
+                self.reused_requests += 1
+
+        logger.debug(
+            "%s %s %s reused=%s (%s/%s)",
+            self.name, method, url, response.connection_reused,
+            self.reused_requests, self.total_requests,
+        )
+        return response
+
+    def connections_opened(self) -> int:
+        opened = 0
+        for adapter in set(self.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is not None:
+                    opened += pool.num_connections
+        return opened
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            total = self.total_requests
+            reused = self.reused_requests
+        return {
+            "requests": total,
+            "reused": reused,
+            "connections_opened": self.connections_opened(),
+            "reuse_ratio": round(reused / total, 4) if total else 0,
+        }
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(name: str, pool_size: int = 10, retries: int = 1) -> PooledSession:
+    """
+    Process-wide session for one upstream host (deepl, google...).
+    The pool size and retries of the first call are kept, each app passes its own settings.
+    """
+    with _sessions_lock:
+        session = _sessions.get(name)
+        if session is None:
+            session = PooledSession(name, pool_size=pool_size, retries=retries)
+            _sessions[name] = session
+        return session
+
+
+def session_stats() -> dict:
+    with _sessions_lock:
+        sessions = dict(_sessions)
+    return {name: session.stats() for name, session in sessions.items()}
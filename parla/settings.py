@@ -170,3 +170,98 @@ DEEPL_API_KEY = os.getenv('DEEPL_API_KEY')
 
 # Google OAuth settings
 GOOGLE_CLIENT_ID = os.getenv('GOOGLE_CLIENT_ID')
+
+
+# Cache
+# default: locmem for dev/tests, set CACHE_BACKEND/CACHE_LOCATION in production (redis, memcached...)
+# translations: db table shared by all workers -> python manage.py createcachetable
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'parla-default'),
+    },
+    'translations': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'translation_cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('TRANSLATION_CACHE_MAX_ENTRIES', 50000)),
+        },
+    },
+}
+
+# locmem/dummy are per process: what must be shared by the workers stays off with them
+SHARED_DEFAULT_CACHE = CACHES['default']['BACKEND'] not in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Translation memory (phrases/services/translation_cache.py)
+TRANSLATION_CACHE_ALIAS = 'translations'
+TRANSLATION_CACHE_SIZE = int(os.getenv('TRANSLATION_CACHE_SIZE', 1024))  # in-process LRU entries
+TRANSLATION_CACHE_TTL = int(os.getenv('TRANSLATION_CACHE_TTL', 60 * 60 * 24 * 7))  # 1 semana
+
+# Provider availability cache (phrases/services/provider_health.py)
+TRANSLATION_HEALTH_TTL = int(os.getenv('TRANSLATION_HEALTH_TTL', 60))  # seconds before probing again
+
+# Circuit breaker + adaptive ordering (phrases/services/circuit_breaker.py)
+TRANSLATION_BREAKER_FAILURES = int(os.getenv('TRANSLATION_BREAKER_FAILURES', 3))  # consecutive failures to open
+TRANSLATION_BREAKER_RECOVERY = int(os.getenv('TRANSLATION_BREAKER_RECOVERY', 30))  # seconds open before a trial
+TRANSLATION_STATS_WINDOW = int(os.getenv('TRANSLATION_STATS_WINDOW', 50))  # last calls used for rate/latency
+TRANSLATION_STATS_MAX_AGE = int(os.getenv('TRANSLATION_STATS_MAX_AGE', 300))  # seconds, older samples are ignored
+
+# Hedged translations (phrases/services/translation_service.py)
+TRANSLATION_HEDGED = os.getenv('TRANSLATION_HEDGED', 'False').lower() in ('true', '1', 'yes')
+TRANSLATION_HEDGE_DELAY = float(os.getenv('TRANSLATION_HEDGE_DELAY')) if os.getenv('TRANSLATION_HEDGE_DELAY') else None  # None -> provider p95
+TRANSLATION_HEDGE_WORKERS = int(os.getenv('TRANSLATION_HEDGE_WORKERS', 16))
+
+# Pooled HTTP sessions for the providers (phrases/services/http_pool.py, on top of parla/http_pool.py)
+TRANSLATION_HTTP_POOL_SIZE = int(os.getenv('TRANSLATION_HTTP_POOL_SIZE', 10))  # keep-alive connections per host
+TRANSLATION_HTTP_RETRIES = int(os.getenv('TRANSLATION_HTTP_RETRIES', 1))  # connection errors only
+TRANSLATION_HTTP_CONNECT_TIMEOUT = float(os.getenv('TRANSLATION_HTTP_CONNECT_TIMEOUT', 3))
+TRANSLATION_HTTP_TIMEOUT = float(os.getenv('TRANSLATION_HTTP_TIMEOUT', 10))  # read timeout
+
+# Single-flight of identical translations (phrases/services/single_flight.py)
+TRANSLATION_SINGLE_FLIGHT_TIMEOUT = int(os.getenv('TRANSLATION_SINGLE_FLIGHT_TIMEOUT', 10))  # max wait for another call
+TRANSLATION_SINGLE_FLIGHT_ALIAS = os.getenv('TRANSLATION_SINGLE_FLIGHT_ALIAS', 'default')  # cache holding the locks, must be shared (CACHE_BACKEND) to coalesce across workers
+
+# Async translation path (ASGI, /api/phrases/translate/async/)
+TRANSLATION_ASYNC_MAX_CONNECTIONS = int(os.getenv('TRANSLATION_ASYNC_MAX_CONNECTIONS', 100))  # per provider and event loop
+
+# Local DeepL quota accounting (phrases/services/deepl_quota.py)
+DEEPL_CHARACTER_LIMIT = int(os.getenv('DEEPL_CHARACTER_LIMIT', 500000))  # until the first /v2/usage reconcile
+DEEPL_QUOTA_REFRESH = int(os.getenv('DEEPL_QUOTA_REFRESH', 30))  # seconds before reloading the shared counter
+DEEPL_QUOTA_RECONCILE_INTERVAL = int(os.getenv('DEEPL_QUOTA_RECONCILE_INTERVAL', 60 * 60))  # seconds between /v2/usage calls
+
+# Users loaded by the JWT middleware (users/services/user_cache.py)
+USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', 1024))  # cached (user, token) pairs per process
+USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', 30))  # seconds, bounds how stale other workers can be
+JWT_TOKEN_CACHE_SIZE = int(os.getenv('JWT_TOKEN_CACHE_SIZE', 4096))  # verified tokens per process (users/services/token_cache.py)
+
+# Google userinfo in GoogleLoginView (users/services/google_userinfo.py)
+GOOGLE_USERINFO_URL = os.getenv('GOOGLE_USERINFO_URL', 'https://www.googleapis.com/oauth2/v3/userinfo')
+GOOGLE_USERINFO_CACHE_TTL = int(os.getenv('GOOGLE_USERINFO_CACHE_TTL', 300))  # seconds per access token, 0 disables
+GOOGLE_USERINFO_CONNECT_TIMEOUT = float(os.getenv('GOOGLE_USERINFO_CONNECT_TIMEOUT', 2))
+GOOGLE_USERINFO_TIMEOUT = float(os.getenv('GOOGLE_USERINFO_TIMEOUT', 5))  # read timeout
+GOOGLE_USERINFO_POOL_SIZE = int(os.getenv('GOOGLE_USERINFO_POOL_SIZE', 4))  # keep-alive connections to Google
+GOOGLE_USERINFO_RETRIES = int(os.getenv('GOOGLE_USERINFO_RETRIES', 1))  # connection errors only
+
+# Write-behind points (gamification/services/points_buffer.py)
+GAMIFICATION_POINTS_WRITE_BEHIND = os.getenv('GAMIFICATION_POINTS_WRITE_BEHIND', 'False').lower() in ('true', '1', 'yes')
+GAMIFICATION_POINTS_FLUSH_INTERVAL = int(os.getenv('GAMIFICATION_POINTS_FLUSH_INTERVAL', 5))  # seconds between bulk writes
+GAMIFICATION_POINTS_FLUSH_SIZE = int(os.getenv('GAMIFICATION_POINTS_FLUSH_SIZE', 200))  # pending (user, day) pairs that force a flush
+GAMIFICATION_ACHIEVEMENT_CACHE_TTL = int(os.getenv('GAMIFICATION_ACHIEVEMENT_CACHE_TTL', 60 * 60 * 24))  # unlocked types per user (achievement_service.py)
+
+# Leaderboard (gamification/services/leaderboard.py)
+LEADERBOARD_SIZE = int(os.getenv('LEADERBOARD_SIZE', 100))  # users in the cached top snapshot
+LEADERBOARD_REFRESH = int(os.getenv('LEADERBOARD_REFRESH', 60))  # seconds before the snapshot is rebuilt
+LEADERBOARD_RANK_REFRESH = int(os.getenv('LEADERBOARD_RANK_REFRESH', 60))  # seconds before a worker reloads its sorted totals
+LEADERBOARD_WINDOW_REFRESH = int(os.getenv('LEADERBOARD_WINDOW_REFRESH', 30))  # seconds a daily/weekly/monthly top is cached
+
+# HTTP caching of the dashboard endpoints (gamification/services/stats_version.py)
+GAMIFICATION_STATS_HTTP_CACHE = os.getenv('GAMIFICATION_STATS_HTTP_CACHE', str(SHARED_DEFAULT_CACHE)).lower() in ('true', '1', 'yes')  # ETag/304, off by default on a per-process cache
+GAMIFICATION_STATS_VERSION_TTL = int(os.getenv('GAMIFICATION_STATS_VERSION_TTL', 60 * 60 * 24 * 7))  # seconds a user's stats version is kept
+GAMIFICATION_STATS_HTTP_MAX_AGE = int(os.getenv('GAMIFICATION_STATS_HTTP_MAX_AGE', 0))  # Cache-Control max-age, 0: revalidate on every request
+
+# Per-user response cache of the profile and dashboard endpoints (users/services/response_cache.py)
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 60 * 60 if SHARED_DEFAULT_CACHE else 0))  # seconds, 0 disables (default on a per-process cache); changes invalidate sooner
+RESPONSE_CACHE_STATS_FLUSH = int(os.getenv('RESPONSE_CACHE_STATS_FLUSH', 100))  # events counted per process before the shared counters are updated
@@ -0,0 +1,268 @@
+"""
+Offline benchmark helpers: local look-alikes of the translation APIs and the
+numbers reported by `python manage.py benchmark_translation`.
+Nothing here is used while serving requests.
+"""
+import json
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class StubProviderServer:
+    """
+    Local HTTP server that answers like DeepL, LibreTranslate or MyMemory.
+
+    - latency: seconds per translation (+/- jitter, uniform)
+    - error_rate: fraction of translations answered with a 503
+    - quota: characters accepted before answering like an exhausted account
+      (456 for DeepL, 429 for the others), None for no limit
+    """
+
+    KINDS = ('deepl', 'libretranslate', 'mymemory')
+
+    def __init__(self, kind, latency=0.0, jitter=0.0, error_rate=0.0, quota=None, seed=None):
+        if kind not in self.KINDS:
+            raise ValueError(f"unknown provider kind: {kind}")
+
+        self.kind = kind
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.quota = quota
+
+        self.requests = 0
+        self.errors = 0
+        self.characters = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def base_url(self) -> str:
+        url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        # DeepLProvider appends the endpoint to .../v2
+        return f"{url}/v2" if self.kind == 'deepl' else url
+
+    def start(self):
+        self._server = _Server(('127.0.0.1', 0), _make_handler(self))
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "characters": self.characters,
+            }
+
+    # Called by the handler
+    def handle_translate(self, texts: list) -> int:
+        """Sleep like the real API and decide the status code of the answer"""
+        with self._lock:
+            self.requests += 1
+            delay = max(self.latency + self._random.uniform(-self.jitter, self.jitter), 0)
+            failed = self._random.random() < self.error_rate
+            characters = sum(len(text) for text in texts)
+            exhausted = self.quota is not None and self.characters + characters > self.quota
+            if failed or exhausted:
+                self.errors += 1
+            else:
+                self.characters += characters
+
+        time.sleep(delay)
+
+        if exhausted:
+            return 456 if self.kind == 'deepl' else 429
+        if failed:
+            return 503
+        return 200
+
+    def usage(self) -> dict:
+        with self._lock:
+            return {
+                "character_count": self.characters,
+                "character_limit": self.quota if self.quota is not None else 500000,
+            }
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # the default (5) resets connections under load
+
+
+def _make_handler(stub):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            url = urlparse(self.path)
+
+            if stub.kind == 'deepl' and url.path == '/v2/usage':
+                return self._send(200, stub.usage())
+
+            if stub.kind == 'mymemory' and url.path == '/get':
+                query = parse_qs(url.query)
+                text = query.get('q', [''])[0]
+                code = stub.handle_translate([text])
+                # MyMemory puts its own status in the body
+                return self._send(200 if code != 503 else code, {
+                    "responseStatus": code,
+                    "responseData": {"translatedText": self._translated(text, query.get('langpair', [''])[0].split('|')[-1])},
+                })
+
+            if stub.kind == 'libretranslate' and url.path == '/languages':
+                return self._send(200, [{'code': 'en'}, {'code': 'es'}])
+
+            # MyMemory health check hits the base url
+            self._send(404, {})
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            body = self.rfile.read(length)
+
+            if stub.kind == 'deepl' and self.path == '/v2/translate':
+                form = parse_qs(body.decode())
+                texts = form.get('text', [])
+                code = stub.handle_translate(texts)
+                target = form.get('target_lang', [''])[0].lower()
+                return self._send(code, {
+                    "translations": [{"text": self._translated(text, target)} for text in texts]
+                } if code == 200 else {"message": "error"})
+
+            if stub.kind == 'libretranslate' and self.path == '/translate':
+                payload = json.loads(body or b'{}')
+                q = payload.get('q')
+                texts = q if isinstance(q, list) else [q or '']
+                code = stub.handle_translate(texts)
+                translated = [self._translated(text, payload.get('target', '')) for text in texts]
+                return self._send(code, {
+                    "translatedText": translated if isinstance(q, list) else translated[0]
+                } if code == 200 else {"error": "error"})
+
+            self._send(404, {})
+
+        @staticmethod
+        def _translated(text, target):
+            return f"[{target}] {text}"
+
+        def _send(self, code, data):
+            body = json.dumps(data).encode()
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+class LocalQuota:
+    """
+    In-memory stand-in for deepl_quota, so a benchmark never writes
+    TranslationUsage rows to the real database.
+    """
+
+    def __init__(self, character_limit=500000):
+        self.character_limit = character_limit
+        self.characters = 0
+        self._lock = threading.Lock()
+
+    def record(self, characters: int):
+        with self._lock:
+            self.characters += max(characters, 0)
+
+    def remaining(self) -> int:
+        with self._lock:
+            return max(self.character_limit - self.characters, 0)
+
+    def can_send(self, characters: int) -> bool:
+        return self.remaining() >= max(characters, 1)
+
+    def mark_exhausted(self):
+        with self._lock:
+            self.characters = self.character_limit
+
+    def reconcile_due(self) -> bool:
+        return False
+
+    def reconcile(self, characters: int, limit: int):
+        with self._lock:
+            self.characters = characters
+            self.character_limit = limit
+
+
+def percentile(values: list, percent: float):
+    """Nearest-rank percentile, None for no values"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def run_load(call, items: list, concurrency: int) -> dict:
+    """
+    Run call(item) for every item with `concurrency` threads.
+    A call fails if it raises or returns False.
+    """
+    latencies = []
+    failures = []
+    lock = threading.Lock()
+
+    def one(item):
+        started = time.monotonic()
+        try:
+            ok = call(item) is not False
+        except Exception:
+            ok = False
+        elapsed = time.monotonic() - started
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                failures.append(item)
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, items))
+    wall = time.monotonic() - started
+
+    return summarize(latencies, len(failures), wall)
+
+
+def summarize(latencies: list, errors: int, wall: float) -> dict:
+    total = len(latencies)
+    return {
+        "requests": total,
+        "errors": errors,
+        "wall_seconds": round(wall, 3),
+        "throughput": round(total / wall, 1) if wall else None,
+        "p50_ms": _ms(percentile(latencies, 50)),
+        "p95_ms": _ms(percentile(latencies, 95)),
+        "p99_ms": _ms(percentile(latencies, 99)),
+    }
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1) if seconds is not None else None
@@ -0,0 +1,72 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from phrases.benchmark import StubProviderServer
+from phrases.services.circuit_breaker import CircuitBreakerRegistry
+from phrases.services.http_pool import aclose_async_clients
+from phrases.services.provider_health import ProviderHealth
+from phrases.services.providers.libretranslate import LibreTranslateProvider
+from phrases.services.single_flight import SingleFlight
+from phrases.services.translation_cache import TranslationCache
+from phrases.services.translation_service import TranslationService
+
+
+class Command(BaseCommand):
+    help = "Compare sync vs async translation throughput against a slow local provider"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='translations per run')
+        parser.add_argument('--latency', type=float, default=0.2, help='provider latency in seconds')
+        parser.add_argument('--threads', type=int, default=4, help='threads of the sync worker')
+        parser.add_argument('--concurrency', type=int, default=100, help='in-flight calls of the async worker')
+
+    def handle(self, *args, **options):
+        with StubProviderServer('libretranslate', latency=options['latency']) as server:
+            base_url = server.base_url
+            sync_elapsed = self._run_sync(base_url, options['requests'], options['threads'])
+            async_elapsed = asyncio.run(self._run_async(base_url, options['requests'], options['concurrency']))
+
+        total = options['requests']
+        self.stdout.write(f"provider latency: {options['latency']}s, {total} translations")
+        self.stdout.write(f"sync  ({options['threads']} threads):   {sync_elapsed:.2f}s  {total / sync_elapsed:.1f} req/s")
+        self.stdout.write(f"async ({options['concurrency']} in flight): {async_elapsed:.2f}s  {total / async_elapsed:.1f} req/s")
+        self.stdout.write(self.style.SUCCESS(f"speedup: x{sync_elapsed / async_elapsed:.1f}"))
+
+    def _service(self, base_url):
+        # isolated state, nothing is read from or written to the real translation memory
+        service = TranslationService(
+            cache=TranslationCache(alias='default'),
+            health=ProviderHealth(),
+            breakers=CircuitBreakerRegistry(),
+            single_flight=SingleFlight(alias='default'),
+        )
+        provider = LibreTranslateProvider()
+        provider.base_url = base_url
+        service.providers = [provider]
+        return service
+
+    def _run_sync(self, base_url, total, threads):
+        service = self._service(base_url)
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            # unique texts: every call reaches the provider
+            list(executor.map(lambda i: service.translate(f"sync text {i}", 'en', 'es'), range(total)))
+        return time.monotonic() - started
+
+    async def _run_async(self, base_url, total, concurrency):
+        service = self._service(base_url)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(i):
+            async with semaphore:
+                return await service.atranslate(f"async text {i}", 'en', 'es')
+
+        started = time.monotonic()
+        try:
+            await asyncio.gather(*(one(i) for i in range(total)))
+        finally:
+            await aclose_async_clients()
+        return time.monotonic() - started
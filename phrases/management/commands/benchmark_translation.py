@@ -0,0 +1,156 @@
+import contextlib
+import io
+import json
+import random
+import uuid
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from phrases.benchmark import LocalQuota, StubProviderServer, run_load
+from phrases.services.circuit_breaker import CircuitBreakerRegistry
+from phrases.services.provider_health import ProviderHealth
+from phrases.services.providers.deepl import DeepLProvider
+from phrases.services.providers.libretranslate import LibreTranslateProvider
+from phrases.services.providers.mymemory import MyMemoryProvider
+from phrases.services.single_flight import SingleFlight
+from phrases.services.translation_cache import TranslationCache
+from phrases.services.translation_service import TranslationService
+from phrases.views import TranslateView
+
+
+class Command(BaseCommand):
+    help = "Benchmark TranslationService / TranslateView against local stub providers (no network)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='translations per target')
+        parser.add_argument('--concurrency', type=int, default=16, help='threads sending translations')
+        parser.add_argument('--target', choices=['service', 'view', 'both'], default='both')
+        parser.add_argument('--unique', type=int, default=None,
+                            help='distinct texts (default: one per request, every call misses the cache)')
+        parser.add_argument('--hedged', action='store_true', help='run the service in hedged mode')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--json', action='store_true', help='print the report as json')
+
+        for kind, latency in (('deepl', 0.08), ('libretranslate', 0.15), ('mymemory', 0.25)):
+            parser.add_argument(f'--{kind}-latency', type=float, default=latency, help='seconds per call')
+            parser.add_argument(f'--{kind}-jitter', type=float, default=0.02, help='+/- seconds')
+            parser.add_argument(f'--{kind}-error-rate', type=float, default=0.0, help='fraction answered with 503')
+            parser.add_argument(f'--{kind}-quota', type=int, default=None, help='characters before quota errors')
+
+    def handle(self, *args, **options):
+        stubs = {
+            kind: StubProviderServer(
+                kind,
+                latency=options[f'{kind}_latency'],
+                jitter=options[f'{kind}_jitter'],
+                error_rate=options[f'{kind}_error_rate'],
+                quota=options[f'{kind}_quota'],
+                seed=options['seed'],
+            ).start()
+            for kind in StubProviderServer.KINDS
+        }
+
+        targets = ['service', 'view'] if options['target'] == 'both' else [options['target']]
+        texts = self._texts(options['requests'], options['unique'], options['seed'])
+        # the shared cache tier outlives the run: a run/target prefix keeps old entries from being hits
+        run_id = uuid.uuid4().hex[:8]
+        report = {}
+
+        try:
+            for target in targets:
+                # fresh cache, breakers and stub counters for every target
+                service = self._service(stubs, options)
+                before = {kind: stub.stats() for kind, stub in stubs.items()}
+                target_texts = [f"{run_id} {target} {text}" for text in texts]
+
+                if target == 'service':
+                    call = lambda text: service.translate(text, 'en', 'es')
+                    result = run_load(call, target_texts, options['concurrency'])
+                else:
+                    # the view builds its own service, hand it the one wired to the stubs
+                    with patch('phrases.views.TranslationService', return_value=service):
+                        result = run_load(self._view_call(), target_texts, options['concurrency'])
+
+                result['providers'] = {
+                    kind: {key: value - before[kind][key] for key, value in stub.stats().items()}
+                    for kind, stub in stubs.items()
+                }
+                result['cache'] = service.cache.stats()
+                report[target] = result
+        finally:
+            for stub in stubs.values():
+                stub.stop()
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(
+            f"{options['requests']} translations, {len(set(texts))} distinct, "
+            f"concurrency {options['concurrency']}, hedged={options['hedged']}"
+        )
+        for target, result in report.items():
+            self.stdout.write(self.style.SUCCESS(
+                f"{target:8} {result['throughput']} req/s  "
+                f"p50 {result['p50_ms']}ms  p95 {result['p95_ms']}ms  p99 {result['p99_ms']}ms  "
+                f"errors {result['errors']}"
+            ))
+            for kind, stats in result['providers'].items():
+                self.stdout.write(
+                    f"         {kind:15} requests {stats['requests']}  errors {stats['errors']}  "
+                    f"characters {stats['characters']}"
+                )
+
+    @staticmethod
+    def _texts(total, unique, seed):
+        if not unique:
+            return [f"benchmark text {i}" for i in range(total)]
+        rng = random.Random(seed)
+        return [f"benchmark text {rng.randrange(unique)}" for _ in range(total)]
+
+    @staticmethod
+    def _service(stubs, options):
+        # isolated state, nothing is read from or written to the real translation memory or quota
+        service = TranslationService(
+            cache=TranslationCache(alias='default'),
+            health=ProviderHealth(),
+            breakers=CircuitBreakerRegistry(),
+            single_flight=SingleFlight(alias='default'),
+            hedged=options['hedged'],
+        )
+
+        deepl = DeepLProvider(quota=LocalQuota(options['deepl_quota'] or 500000))
+        deepl.api_key = 'benchmark'
+        libre = LibreTranslateProvider()
+        mymemory = MyMemoryProvider()
+
+        deepl.base_url = stubs['deepl'].base_url
+        libre.base_url = stubs['libretranslate'].base_url
+        mymemory.base_url = stubs['mymemory'].base_url
+
+        service.providers = [deepl, libre, mymemory]
+        return service
+
+    @staticmethod
+    def _view_call():
+        factory = APIRequestFactory()
+        view = TranslateView.as_view()
+        # never saved, only needs to pass IsAuthenticated
+        user = get_user_model()(username='benchmark')
+
+        def call(text):
+            request = factory.post('/api/phrases/translate/', {
+                'text': text, 'source_lang': 'en', 'target_lang': 'es'
+            }, format='json')
+            force_authenticate(request, user=user)
+            return view(request).status_code == 200
+
+        return call
+
+    def execute(self, *args, **options):
+        # TranslateView prints every request body, keep it out of the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            return super().execute(*args, **options)
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.25 on 2026-10-16 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('phrases', '0002_alter_phrase_source_url'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranslationUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(max_length=50)),
+                ('period', models.DateField()),
+                ('characters', models.BigIntegerField(default=0)),
+                ('character_limit', models.BigIntegerField(default=500000)),
+                ('reconciled_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'translation_usage',
+                'unique_together': {('provider', 'period')},
+            },
+        ),
+    ]
@@ -59,4 +59,25 @@ class Phrase(models.Model):
 
     class Meta:
         db_table = 'phrases'
-        ordering =  ['-created_at']
\ No newline at end of file
+        ordering =  ['-created_at']
+
+class TranslationUsage(models.Model):
+    """
+    Characters sent to a paid provider per month (DeepL FREE: 500k/month).
+    One row per provider and month, shared by every worker, so a new month
+    starts from 0 without any reset job.
+    """
+
+    provider = models.CharField(max_length=50)
+    period = models.DateField()  # first day of the month
+    characters = models.BigIntegerField(default=0)
+    character_limit = models.BigIntegerField(default=500000)
+    reconciled_at = models.DateTimeField(null=True, blank=True)  # last sync with the provider's own count
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'translation_usage'
+        unique_together = ['provider', 'period']
+
+    def __str__(self):
+        return f"{self.provider} {self.period:%Y-%m}: {self.characters}/{self.character_limit}"
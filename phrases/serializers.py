@@ -133,4 +133,17 @@ class TranslateResponseSerializer(serializers.Serializer):
     translation = serializers.CharField()
     pronunciation = serializers.CharField(required=False, allow_null=True)
     source_lang = serializers.CharField()
-    target_lang = serializers.CharField()
\ No newline at end of file
+    target_lang = serializers.CharField()
+
+
+class TranslateBatchRequestSerializer(serializers.Serializer):
+    """
+    batch traduction, same languages for every text
+    """
+    texts = serializers.ListField(
+        child=serializers.CharField(max_length=5000),
+        allow_empty=False,
+        max_length=100,
+    )
+    source_lang = serializers.CharField(max_length=10)
+    target_lang = serializers.CharField(max_length=10)
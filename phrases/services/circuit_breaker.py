@@ -0,0 +1,170 @@
+import threading
+import time
+from collections import deque
+from itertools import groupby
+
+from django.conf import settings
+
+
+class CircuitBreaker:
+    """
+    Per provider breaker:
+    - closed: requests go through, consecutive failures are counted
+    - open: requests are skipped until recovery_timeout passes
+    - half_open: a single trial request decides if it closes or opens again
+
+    It also keeps the last `window` calls to compute success rate and latency percentiles.
+    Samples older than max_age are ignored, otherwise a provider moved to the end of
+    the chain would never be called again to prove it recovered.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=3, recovery_timeout=30, window=50, max_age=300):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.max_age = max_age
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+        self._samples = deque(maxlen=window)  # (ok, latency_seconds, recorded_at)
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.recovery_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+
+            # half open: only one request at a time tests the provider
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self, latency: float):
+        with self._lock:
+            self._samples.append((True, latency, time.monotonic()))
+            self.consecutive_failures = 0
+            self.state = self.CLOSED
+            self._trial_in_flight = False
+
+    def record_failure(self, latency: float):
+        with self._lock:
+            self._samples.append((False, latency, time.monotonic()))
+            self.consecutive_failures += 1
+            self._trial_in_flight = False
+
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """An allowed request was finally not made (e.g. cancelled before it started)"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def success_rate(self) -> float:
+        samples = self._recent_samples()
+        if not samples:
+            return 1.0
+        return sum(1 for ok, _ in samples if ok) / len(samples)
+
+    def latency_percentile(self, percentile: float):
+        """Latency (seconds) of successful calls, None while there is no data"""
+        latencies = sorted(latency for ok, latency in self._recent_samples() if ok)
+        if not latencies:
+            return None
+        index = min(len(latencies) - 1, int(round(percentile / 100 * (len(latencies) - 1))))
+        return latencies[index]
+
+    def snapshot(self) -> dict:
+        p50 = self.latency_percentile(50)
+        with self._lock:
+            state = self.state
+        return {
+            'state': state,
+            'samples': len(self._recent_samples()),
+            'success_rate': round(self.success_rate(), 4),
+            'p50_ms': round(p50 * 1000, 1) if p50 is not None else None,
+        }
+
+    def _recent_samples(self) -> list:
+        oldest = time.monotonic() - self.max_age
+        with self._lock:
+            return [(ok, latency) for ok, latency, at in self._samples if at >= oldest]
+
+
+class CircuitBreakerRegistry:
+    """
+    One breaker per provider class, shared by every TranslationService of the process
+    """
+
+    def __init__(self):
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider) -> CircuitBreaker:
+        name = provider.__class__.__name__
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    failure_threshold=getattr(settings, 'TRANSLATION_BREAKER_FAILURES', 3),
+                    recovery_timeout=getattr(settings, 'TRANSLATION_BREAKER_RECOVERY', 30),
+                    window=getattr(settings, 'TRANSLATION_STATS_WINDOW', 50),
+                    max_age=getattr(settings, 'TRANSLATION_STATS_MAX_AGE', 300),
+                )
+                self._breakers[name] = breaker
+            return breaker
+
+    def order(self, providers) -> list:
+        """
+        Sort providers by: open breakers last, then recent success rate, then p50 latency.
+        The configured order is the tie breaker, values are rounded so that
+        small differences don't override it. A provider without latency data is
+        neutral: it keeps its configured slot and only measured providers are
+        reordered by latency among themselves.
+        """
+        def health_key(item):
+            position, provider = item
+            breaker = self.get(provider)
+            return (breaker.state == CircuitBreaker.OPEN, -round(breaker.success_rate(), 1))
+
+        by_health = sorted(enumerate(providers), key=lambda item: (health_key(item), item[0]))
+
+        ordered = []
+        for _, group in groupby(by_health, key=health_key):
+            group = list(group)
+            latencies = {position: self.get(provider).latency_percentile(50) for position, provider in group}
+            slots = [index for index, (position, _) in enumerate(group) if latencies[position] is not None]
+            measured = sorted(
+                (group[index] for index in slots),
+                key=lambda item: (round(latencies[item[0]], 1), item[0]),
+            )
+            for index, item in zip(slots, measured):
+                group[index] = item
+            ordered.extend(provider for _, provider in group)
+        return ordered
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {name: breaker.snapshot() for name, breaker in breakers.items()}
+
+    def reset(self):
+        with self._lock:
+            self._breakers.clear()
+
+
+circuit_breakers = CircuitBreakerRegistry()
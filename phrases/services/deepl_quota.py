@@ -0,0 +1,194 @@
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from ..models import TranslationUsage
+
+logger = logging.getLogger(__name__)
+
+
+def current_period():
+    """First day of the current month, the key of the usage row"""
+    return timezone.now().date().replace(day=1)
+
+
+class DeepLQuota:
+    """
+    Local count of the characters sent to DeepL, so routing doesn't need /v2/usage.
+
+    - every successful request adds its characters to the month row (F() update,
+      safe with several workers)
+    - reads come from an in-process copy, reloaded from the db every `refresh`
+      seconds; the local increments are applied to it in between
+    - /v2/usage is only called to reconcile, at most every `reconcile_interval`
+      seconds across all workers (the row keeps reconciled_at, claim_reconcile()
+      lets a single worker make the call)
+    """
+
+    PROVIDER = 'deepl'
+
+    def __init__(self, refresh=None, reconcile_interval=None, character_limit=None):
+        self.refresh = refresh or getattr(settings, 'DEEPL_QUOTA_REFRESH', 30)
+        self.reconcile_interval = reconcile_interval or getattr(settings, 'DEEPL_QUOTA_RECONCILE_INTERVAL', 60 * 60)
+        self.character_limit = character_limit or getattr(settings, 'DEEPL_CHARACTER_LIMIT', 500000)
+
+        self._lock = threading.Lock()
+        self._period = None
+        self._characters = 0
+        self._limit = self.character_limit
+        self._reconciled_at = None
+        self._loaded_at = None
+
+    def record(self, characters: int):
+        """Add characters already accepted by DeepL"""
+        if characters <= 0:
+            return
+        period = current_period()
+
+        # the translation already succeeded, a failing counter must not break it
+        try:
+            if not self._increment(period, characters):
+                try:
+                    with transaction.atomic():
+                        TranslationUsage.objects.create(
+                            provider=self.PROVIDER,
+                            period=period,
+                            characters=characters,
+                            character_limit=self.character_limit,
+                        )
+                except IntegrityError:
+                    # another worker created the row first
+                    self._increment(period, characters)
+        except Exception:
+            logger.warning("could not record DeepL usage", exc_info=True)
+
+        with self._lock:
+            if self._period == period:
+                self._characters += characters
+
+    def remaining(self) -> int:
+        self._load_if_stale()
+        with self._lock:
+            return max(self._limit - self._characters, 0)
+
+    def can_send(self, characters: int) -> bool:
+        return self.remaining() >= max(characters, 1)
+
+    def mark_exhausted(self):
+        """DeepL answered 456: trust it until the next reconcile"""
+        period = current_period()
+        try:
+            self._row(period)
+            TranslationUsage.objects.filter(provider=self.PROVIDER, period=period).update(
+                characters=F('character_limit'), updated_at=timezone.now()
+            )
+        except Exception:
+            logger.warning("could not store DeepL quota exhaustion", exc_info=True)
+        self._loaded_at = None
+
+    def reconcile_due(self) -> bool:
+        self._load_if_stale()
+        with self._lock:
+            reconciled_at = self._reconciled_at
+        return reconciled_at is None or timezone.now() - reconciled_at > timedelta(seconds=self.reconcile_interval)
+
+    def claim_reconcile(self) -> bool:
+        """
+        True for the one worker that should call /v2/usage now. reconciled_at is
+        moved forward by the claim: a failed call waits for the next interval.
+        """
+        period = current_period()
+        now = timezone.now()
+        try:
+            self._row(period)
+            claimed = TranslationUsage.objects.filter(
+                Q(reconciled_at__isnull=True) | Q(reconciled_at__lte=now - timedelta(seconds=self.reconcile_interval)),
+                provider=self.PROVIDER,
+                period=period,
+            ).update(reconciled_at=now) > 0
+        except Exception:
+            logger.warning("could not claim the DeepL reconcile", exc_info=True)
+            return False
+        self._loaded_at = None
+        return claimed
+
+    def reconcile(self, characters: int, limit: int):
+        """Replace the local count with DeepL's own numbers (from /v2/usage)"""
+        period = current_period()
+        self._row(period)
+        TranslationUsage.objects.filter(provider=self.PROVIDER, period=period).update(
+            characters=characters,
+            character_limit=limit,
+            reconciled_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+        self._loaded_at = None
+        logger.info("DeepL usage reconciled: %s/%s characters, %s remaining",
+                    characters, limit, max(limit - characters, 0))
+
+    def stats(self) -> dict:
+        self._load_if_stale()
+        with self._lock:
+            return {
+                "period": self._period.strftime('%Y-%m') if self._period else None,
+                "characters": self._characters,
+                "limit": self._limit,
+                "remaining": max(self._limit - self._characters, 0),
+                "used_ratio": round(self._characters / self._limit, 4) if self._limit else 1,
+                "reconciled_at": self._reconciled_at.isoformat() if self._reconciled_at else None,
+            }
+
+    def reset(self):
+        """Forget the in-process copy (tests)"""
+        with self._lock:
+            self._period = None
+            self._loaded_at = None
+
+    # Internal helpers
+    def _increment(self, period, characters) -> bool:
+        return TranslationUsage.objects.filter(provider=self.PROVIDER, period=period).update(
+            characters=F('characters') + characters, updated_at=timezone.now()
+        ) > 0
+
+    def _row(self, period):
+        row, _ = TranslationUsage.objects.get_or_create(
+            provider=self.PROVIDER,
+            period=period,
+            defaults={'character_limit': self.character_limit},
+        )
+        return row
+
+    def _load_if_stale(self):
+        period = current_period()
+        with self._lock:
+            fresh = (
+                self._period == period
+                and self._loaded_at is not None
+                and time.monotonic() - self._loaded_at < self.refresh
+            )
+        if fresh:
+            return
+
+        try:
+            row = TranslationUsage.objects.filter(provider=self.PROVIDER, period=period).first()
+        except Exception:
+            # db down: keep the last known numbers
+            logger.warning("could not load DeepL usage", exc_info=True)
+            return
+
+        with self._lock:
+            self._period = period
+            self._characters = row.characters if row else 0
+            self._limit = row.character_limit if row else self.character_limit
+            self._reconciled_at = row.reconciled_at if row else None
+            self._loaded_at = time.monotonic()
+
+
+# one instance per process, the db row is what is shared
+deepl_quota = DeepLQuota()
@@ -0,0 +1,68 @@
+import asyncio
+import threading
+import weakref
+
+import httpx
+from django.conf import settings
+
+from parla import http_pool
+from parla.http_pool import PooledSession
+
+
+def get_session(name: str) -> PooledSession:
+    """Process-wide session for one translation provider (deepl, libretranslate...)"""
+    return http_pool.get_session(
+        name,
+        pool_size=getattr(settings, 'TRANSLATION_HTTP_POOL_SIZE', 10),
+        retries=getattr(settings, 'TRANSLATION_HTTP_RETRIES', 1),
+    )
+
+
+def get_timeout(read=None) -> tuple:
+    """(connect, read) timeout for requests"""
+    connect = getattr(settings, 'TRANSLATION_HTTP_CONNECT_TIMEOUT', 3)
+    if read is None:
+        read = getattr(settings, 'TRANSLATION_HTTP_TIMEOUT', 10)
+    return (connect, read)
+
+
+# httpx clients are bound to the event loop that created them
+_async_clients_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client(name: str) -> httpx.AsyncClient:
+    """Keep-alive async client for one upstream host, one per event loop"""
+    loop = asyncio.get_running_loop()
+    with _async_clients_lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(name)
+        if client is None:
+            # many more connections than the sync pool: a single worker keeps
+            # every in-flight request of the loop open at the same time
+            limits = httpx.Limits(
+                max_connections=getattr(settings, 'TRANSLATION_ASYNC_MAX_CONNECTIONS', 100),
+                max_keepalive_connections=getattr(settings, 'TRANSLATION_HTTP_POOL_SIZE', 10),
+            )
+            transport = httpx.AsyncHTTPTransport(
+                limits=limits,
+                retries=getattr(settings, 'TRANSLATION_HTTP_RETRIES', 1),  # connect errors only
+            )
+            client = httpx.AsyncClient(transport=transport, timeout=get_async_timeout())
+            clients[name] = client
+        return client
+
+
+async def aclose_async_clients():
+    """Close the clients of the running loop (scripts/tests that own their loop)"""
+    loop = asyncio.get_running_loop()
+    with _async_clients_lock:
+        clients = _async_clients.pop(loop, {})
+    for client in clients.values():
+        await client.aclose()
+
+
+def get_async_timeout(read=None) -> httpx.Timeout:
+    """Same values as get_timeout(), in httpx format"""
+    connect, read = get_timeout(read)
+    return httpx.Timeout(read, connect=connect)
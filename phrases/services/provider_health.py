@@ -0,0 +1,126 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+
+class ProviderHealth:
+    """
+    Availability of each translation provider, cached per process.
+
+    - is_available() never goes to the network, it answers from the cached state
+    - stale states are probed again in a background thread (provider.is_available())
+    - real translations update the state passively: a success marks the provider
+      as available (no probe needed while it keeps working), a failure expires the
+      state so the next call schedules a probe that decides if it is really down
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl or getattr(settings, 'TRANSLATION_HEALTH_TTL', 60)
+        self._states = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def provider_name(provider) -> str:
+        return provider.__class__.__name__
+
+    def is_available(self, provider) -> bool:
+        name = self.provider_name(provider)
+        start_refresh = False
+
+        with self._lock:
+            state = self._states.get(name)
+            if state is None:
+                # never checked: be optimistic, the real call will tell us
+                state = self._new_state()
+                self._states[name] = state
+
+            if self._is_stale(state) and not state['refreshing']:
+                state['refreshing'] = True
+                start_refresh = True
+
+            available = state['available']
+
+        if start_refresh:
+            self._refresh_in_background(provider)
+
+        return available
+
+    def refresh(self, provider) -> bool:
+        """Probe the provider now (blocking) and store the result"""
+        try:
+            available = bool(provider.is_available())
+        except Exception:
+            available = False
+
+        self._update(provider, available, source='probe')
+        return available
+
+    def record_success(self, provider):
+        self._update(provider, True, source='translate')
+
+    def record_failure(self, provider):
+        name = self.provider_name(provider)
+        with self._lock:
+            state = self._states.setdefault(name, self._new_state())
+            state['source'] = 'translate'
+            state['checked_at'] = None
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                name: {
+                    'available': state['available'],
+                    'source': state['source'],
+                    'age_seconds': round(now - state['checked_at'], 2) if state['checked_at'] is not None else None,
+                }
+                for name, state in self._states.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._states.clear()
+
+    # Internal helpers
+    @staticmethod
+    def _new_state():
+        return {'available': True, 'checked_at': None, 'refreshing': False, 'source': 'unknown'}
+
+    def _is_stale(self, state) -> bool:
+        if state['checked_at'] is None:
+            return True
+        return time.monotonic() - state['checked_at'] > self.ttl
+
+    def _update(self, provider, available, source):
+        name = self.provider_name(provider)
+        with self._lock:
+            state = self._states.setdefault(name, self._new_state())
+            state['available'] = available
+            state['source'] = source
+            state['checked_at'] = time.monotonic()
+            if source == 'probe':
+                state['refreshing'] = False
+
+    def _refresh_in_background(self, provider):
+        thread = threading.Thread(
+            target=self._probe,
+            args=(provider,),
+            name=f"health-{self.provider_name(provider)}",
+            daemon=True,
+        )
+        thread.start()
+
+    def _probe(self, provider):
+        # probes can use the ORM (DeepL quota), the thread's connection is
+        # not closed by any request cycle
+        close_old_connections()
+        try:
+            self.refresh(provider)
+        finally:
+            connection.close()
+
+
+# one registry per process, TranslationService is created per request
+provider_health = ProviderHealth()
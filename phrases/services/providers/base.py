@@ -1,5 +1,8 @@
+import asyncio
 from abc import ABC, abstractmethod
 
+from asgiref.sync import sync_to_async
+
 
 class TranslationProvider(ABC):
     """
@@ -18,6 +21,22 @@ class TranslationProvider(ABC):
         pass
 
 
+    def translate_many(self, texts: list, source_lang: str, target_lang: str) -> list:
+        """
+        Translate several texts, same order as `texts`.
+        Default: one request per text, providers with a multi-text API override it.
+        """
+        return [self.translate(text, source_lang, target_lang) for text in texts]
+
+    # Async variants (used by the ASGI views), same contract as the sync methods.
+    # Default: the sync method in a worker thread, providers with an async client override them.
+
+    async def atranslate(self, text: str, source_lang: str, target_lang: str) -> dict:
+        return await sync_to_async(self.translate, thread_sensitive=False)(text, source_lang, target_lang)
+
+    async def atranslate_many(self, texts: list, source_lang: str, target_lang: str) -> list:
+        return await asyncio.gather(*(self.atranslate(text, source_lang, target_lang) for text in texts))
+
     @abstractmethod
     
     def is_available(self) -> bool:
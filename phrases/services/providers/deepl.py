@@ -1,68 +1,200 @@
+import asyncio
+from urllib.parse import urlencode
+
+import logging
+
+import httpx
 import requests
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from .base import TranslationProvider
+from ..deepl_quota import deepl_quota
+from ..http_pool import get_async_client, get_session, get_timeout
+
+logger = logging.getLogger(__name__)
 
 
 class DeepLProvider(TranslationProvider):
     """
     DeepL API FREE – 500k chars/month
+
+    The characters sent are counted locally (deepl_quota), routing never asks
+    /v2/usage; it is only used now and then to correct the local count, after a
+    successful translation (DeepL healthy, never probed) or in the health probe.
     """
 
-    def __init__(self):
+    def __init__(self, quota=None):
         self.api_key = getattr(settings, 'DEEPL_API_KEY', None)
         self.base_url = "https://api-free.deepl.com/v2"
+        self.session = get_session('deepl')
+        self.quota = quota or deepl_quota
+
+    # DeepL accepts up to 50 `text` params per request
+    MAX_TEXTS_PER_REQUEST = 50
 
     def translate(self, text: str, source_lang: str, target_lang: str) -> dict:
+        return self.translate_many([text], source_lang, target_lang)[0]
+
+    def translate_many(self, texts: list, source_lang: str, target_lang: str) -> list:
+
+        if not self.api_key:
+            raise Exception('DeepL API key not configured')
+
+        results = []
+        for chunk in self._chunks(texts):
+            results.extend(self._translate_chunk(chunk, source_lang, target_lang))
+        return results
+
+    async def atranslate(self, text: str, source_lang: str, target_lang: str) -> dict:
+        return (await self.atranslate_many([text], source_lang, target_lang))[0]
+
+    async def atranslate_many(self, texts: list, source_lang: str, target_lang: str) -> list:
 
         if not self.api_key:
             raise Exception('DeepL API key not configured')
 
+        # chunks go out concurrently, gather keeps their order
+        chunks = await asyncio.gather(*(
+            self._atranslate_chunk(chunk, source_lang, target_lang) for chunk in self._chunks(texts)
+        ))
+        return [result for chunk in chunks for result in chunk]
+
+    def _chunks(self, texts: list):
+        for start in range(0, len(texts), self.MAX_TEXTS_PER_REQUEST):
+            yield texts[start:start + self.MAX_TEXTS_PER_REQUEST]
+
+    def _translate_chunk(self, texts: list, source_lang: str, target_lang: str) -> list:
+
         url = f"{self.base_url}/translate"
+        characters = self._characters(texts)
+        self._check_quota(self.quota.can_send(characters))
 
-        headers = {
-            "Authorization": f"DeepL-Auth-Key {self.api_key}"
-        }
+        try:
+            response = self.session.post(
+                url, headers=self._headers(), data=self._payload(texts, source_lang, target_lang), timeout=get_timeout()
+            )
+            response.raise_for_status()
 
-        payload = {
-            "text": text,
-            "target_lang": target_lang.upper()
-        }
+            results = self._parse(response.json())
 
-        if source_lang:
-            payload["source_lang"] = source_lang.upper()
+        except requests.HTTPError as http_err:
+            if self._is_quota_error(http_err):
+                self.quota.mark_exhausted()
+            raise self._http_error(http_err)
+
+        except Exception as e:
+            raise Exception(f"DeepL error: {str(e)}")
+
+        self._sent(characters)
+        return results
+
+    async def _atranslate_chunk(self, texts: list, source_lang: str, target_lang: str) -> list:
+
+        url = f"{self.base_url}/translate"
+
+        headers = self._headers()
+        headers["Content-Type"] = "application/x-www-form-urlencoded"
+        characters = self._characters(texts)
+        # the counter is in the db, keep the ORM off the loop
+        self._check_quota(await sync_to_async(self.quota.can_send)(characters))
 
         try:
-            response = requests.post(url, headers=headers, data=payload, timeout=10)
+            # httpx `data` can't repeat keys, the body is encoded by hand
+            response = await get_async_client('deepl').post(
+                url, headers=headers, content=urlencode(self._payload(texts, source_lang, target_lang))
+            )
             response.raise_for_status()
 
-            data = response.json()
+            results = self._parse(response.json())
+
+        except httpx.HTTPStatusError as http_err:
+            if self._is_quota_error(http_err):
+                await sync_to_async(self.quota.mark_exhausted)()
+            raise self._http_error(http_err)
+
+        except Exception as e:
+            raise Exception(f"DeepL error: {str(e)}")
+
+        await sync_to_async(self._sent)(characters)
+        return results
+
+    def _sent(self, characters: int):
+        # a healthy DeepL keeps its health state fresh and is never probed,
+        # the successful calls drive the reconcile instead
+        self.quota.record(characters)
+        self.reconcile_if_due()
+
+    def _headers(self) -> dict:
+        return {
+            "Authorization": f"DeepL-Auth-Key {self.api_key}"
+        }
 
-            return {
-                "translation": data["translations"][0]["text"],
+    @staticmethod
+    def _payload(texts: list, source_lang: str, target_lang: str) -> list:
+        # repeated `text` params, one per text
+        payload = [("text", text) for text in texts]
+        payload.append(("target_lang", target_lang.upper()))
+
+        if source_lang:
+            payload.append(("source_lang", source_lang.upper()))
+        return payload
+
+    @staticmethod
+    def _parse(data) -> list:
+        return [
+            {
+                "translation": item["text"],
                 "pronunciation": None
             }
+            for item in data["translations"]
+        ]
 
-        except requests.HTTPError as http_err:
-            ## quota
-            if hasattr(http_err.response, "status_code") and http_err.response.status_code == 456:
-                raise Exception("DeepL FREE quota exceeded (500k/month)")
-            raise Exception(f"DeepL HTTP error: {http_err}")
+    @staticmethod
+    def _characters(texts: list) -> int:
+        # DeepL bills the characters of the source text
+        return sum(len(text) for text in texts)
 
-        except Exception as e:
-            raise Exception(f"DeepL error: {str(e)}")
+    @staticmethod
+    def _check_quota(allowed: bool):
+        if not allowed:
+            raise Exception("DeepL FREE quota exceeded (500k/month)")
+
+    @staticmethod
+    def _is_quota_error(http_err) -> bool:
+        return hasattr(http_err.response, "status_code") and http_err.response.status_code == 456
+
+    @classmethod
+    def _http_error(cls, http_err) -> Exception:
+        ## quota
+        if cls._is_quota_error(http_err):
+            return Exception("DeepL FREE quota exceeded (500k/month)")
+        return Exception(f"DeepL HTTP error: {http_err}")
 
     def is_available(self) -> bool:
         if not self.api_key:
             return False
+        self.reconcile_if_due()
+        return self.quota.can_send(1)
+
+    def reconcile_if_due(self) -> bool:
+        """reconcile_usage() if the interval is over and no other worker took it"""
+        if self.quota.reconcile_due() and self.quota.claim_reconcile():
+            return self.reconcile_usage()
+        return False
+
+    def reconcile_usage(self) -> bool:
+        """Correct the local count with /v2/usage, False if DeepL didn't answer"""
         try:
             url = f"{self.base_url}/usage"
-            headers = {"Authorization": f"DeepL-Auth-Key {self.api_key}"}
-            response = requests.get(url, headers=headers, timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                used = data.get("character_count", 0)
-                limit = data.get("character_limit", 500000)
-                return used < limit
-            return False
-        except:
+            response = self.session.get(url, headers=self._headers(), timeout=get_timeout(read=5))
+            response.raise_for_status()
+            data = response.json()
+            self.quota.reconcile(
+                data.get("character_count", 0),
+                data.get("character_limit", self.quota.character_limit),
+            )
+            return True
+        except Exception:
+            # keep routing on the local count
+            logger.warning("could not reconcile DeepL usage", exc_info=True)
             return False
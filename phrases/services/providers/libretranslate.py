@@ -1,6 +1,8 @@
+import httpx
 import requests
 from django.conf import settings
 from .base import TranslationProvider
+from ..http_pool import get_async_client, get_session, get_timeout
 
 
 class LibreTranslateProvider(TranslationProvider):
@@ -11,13 +13,55 @@ class LibreTranslateProvider(TranslationProvider):
     def __init__(self):
         self.base_url = getattr(settings, 'LIBRETRANSLATE_URL', 'https://libretranslate.com')
         self.api_key = getattr(settings, 'LIBRETRANSLATE_API_KEY', None)
+        self.session = get_session('libretranslate')
 
     def translate(self, text: str, source_lang: str, target_lang: str) -> dict:
+        data = self._post_translate(text, source_lang, target_lang)
+        return self._parse_one(data)
+
+    def translate_many(self, texts: list, source_lang: str, target_lang: str) -> list:
+        # `q` also accepts a list, translatedText comes back as a list in the same order
+        data = self._post_translate(list(texts), source_lang, target_lang)
+        return self._parse_many(data, texts)
+
+    async def atranslate(self, text: str, source_lang: str, target_lang: str) -> dict:
+        data = await self._apost_translate(text, source_lang, target_lang)
+        return self._parse_one(data)
+
+    async def atranslate_many(self, texts: list, source_lang: str, target_lang: str) -> list:
+        data = await self._apost_translate(list(texts), source_lang, target_lang)
+        return self._parse_many(data, texts)
+
+    def _post_translate(self, q, source_lang: str, target_lang: str) -> dict:
+
+        url = f"{self.base_url}/translate"
+
+        try:
+            response = self.session.post(url, json=self._payload(q, source_lang, target_lang), timeout=get_timeout())
+            response.raise_for_status()
+
+            return response.json()
+
+        except requests.RequestException as e:
+            raise Exception(f"error translating with LibreTranslate: {str(e)}")
+
+    async def _apost_translate(self, q, source_lang: str, target_lang: str) -> dict:
 
         url = f"{self.base_url}/translate"
 
+        try:
+            response = await get_async_client('libretranslate').post(url, json=self._payload(q, source_lang, target_lang))
+            response.raise_for_status()
+
+            return response.json()
+
+        except httpx.HTTPError as e:
+            # some httpx errors have no message
+            raise Exception(f"error translating with LibreTranslate: {str(e) or type(e).__name__}")
+
+    def _payload(self, q, source_lang: str, target_lang: str) -> dict:
         payload = {
-            'q': text,
+            'q': q,
             'source': source_lang,
             'target': target_lang,
             'format': "text"
@@ -25,24 +69,27 @@ class LibreTranslateProvider(TranslationProvider):
 
         if self.api_key:
             payload['api_key'] = self.api_key
+        return payload
 
-        try:
-            response = requests.post(url, json=payload, timeout=10)
-            response.raise_for_status()
+    @staticmethod
+    def _parse_one(data) -> dict:
+        return {
+            'translation': data.get('translatedText', ''),
+            'pronunciation': None
+        }
 
-            data = response.json()
+    @staticmethod
+    def _parse_many(data, texts) -> list:
+        translations = data.get('translatedText') or []
 
-            return {
-                'translation': data.get('translatedText', ''),
-                'pronunciation': None
-            }
+        if len(translations) != len(texts):
+            raise Exception("LibreTranslate returned a different number of translations")
 
-        except requests.RequestException as e:
-            raise Exception(f"error translating with LibreTranslate: {str(e)}")
+        return [{'translation': translation, 'pronunciation': None} for translation in translations]
 
     def is_available(self) -> bool:
         try:
-            response = requests.get(f"{self.base_url}/languages", timeout=5)
+            response = self.session.get(f"{self.base_url}/languages", timeout=get_timeout(read=5))
             return response.status_code == 200
         except:
             return False
@@ -1,6 +1,8 @@
 
+import httpx
 import requests
 from .base import TranslationProvider
+from ..http_pool import get_async_client, get_session, get_timeout
 
 
 class MyMemoryProvider(TranslationProvider):
@@ -11,33 +13,51 @@ class MyMemoryProvider(TranslationProvider):
 
     def __init__(self):
         self.base_url = "https://api.mymemory.translated.net"
+        self.session = get_session('mymemory')
 
     def translate(self, text: str, source_lang: str, target_lang: str) -> dict:
         url = f"{self.base_url}/get"
-        params = {
-            'q': text,
-            'langpair': f'{source_lang}|{target_lang}'
-        }
 
         try:
-            response = requests.get(url, params=params, timeout=10)
+            response = self.session.get(url, params=self._params(text, source_lang, target_lang), timeout=get_timeout())
             response.raise_for_status()
-            data = response.json()
-
-            if data.get('responseStatus') != 200:
-                raise Exception("Error en MyMemory response")
-
-            return {
-                'translation': data['responseData']['translatedText'],
-                'pronunciation': None
-            }
+            return self._parse(response.json())
 
         except requests.RequestException as e:
             raise Exception(f"Error translating with MyMemory: {str(e)}")
 
+    async def atranslate(self, text: str, source_lang: str, target_lang: str) -> dict:
+        url = f"{self.base_url}/get"
+
+        try:
+            response = await get_async_client('mymemory').get(url, params=self._params(text, source_lang, target_lang))
+            response.raise_for_status()
+            return self._parse(response.json())
+
+        except httpx.HTTPError as e:
+            # some httpx errors have no message
+            raise Exception(f"Error translating with MyMemory: {str(e) or type(e).__name__}")
+
+    @staticmethod
+    def _params(text, source_lang, target_lang) -> dict:
+        return {
+            'q': text,
+            'langpair': f'{source_lang}|{target_lang}'
+        }
+
+    @staticmethod
+    def _parse(data) -> dict:
+        if data.get('responseStatus') != 200:
+            raise Exception("Error en MyMemory response")
+
+        return {
+            'translation': data['responseData']['translatedText'],
+            'pronunciation': None
+        }
+
     def is_available(self) -> bool:
         try:
-            response = requests.get(self.base_url, timeout=5)
+            response = self.session.get(self.base_url, timeout=get_timeout(read=5))
             return response.status_code in [200, 404]
         except:
             return False
@@ -0,0 +1,217 @@
+import asyncio
+import threading
+import time
+import uuid
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+
+class _Call:
+    def __init__(self, event=None):
+        self.event = event or threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Only one provider call per key while it is in flight.
+
+    - same process: the first caller (leader) runs the function, the others wait
+      for its result (or its exception) instead of calling the provider again
+    - other processes: the leader takes a lock key in the shared cache; a process
+      that can't take it polls `lookup` (the translation cache) until the owner
+      stores the result. If the owner fails or takes too long it translates itself.
+    - the lock lives in TRANSLATION_SINGLE_FLIGHT_ALIAS (default cache), not in the
+      translations db table: every add() there is an INSERT plus a possible cull
+    - waiters back off exponentially (poll_interval doubled up to max_poll_interval),
+      a hot key costs a handful of lookups per waiter instead of one every 50ms
+    """
+
+    LOCK_PREFIX = "translation-lock"
+
+    def __init__(self, alias=None, wait_timeout=None, lock_ttl=None, poll_interval=0.05, max_poll_interval=1.0):
+        self.alias = alias or getattr(settings, 'TRANSLATION_SINGLE_FLIGHT_ALIAS', 'default')
+        self.wait_timeout = wait_timeout or getattr(settings, 'TRANSLATION_SINGLE_FLIGHT_TIMEOUT', 10)
+        self.lock_ttl = lock_ttl or self.wait_timeout + 5
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max(max_poll_interval, poll_interval)
+
+        self._calls = {}
+        self._async_calls = weakref.WeakKeyDictionary()  # event loop -> {key: _Call}
+        self._lock = threading.Lock()
+
+        self.leaders = 0
+        self.local_waiters = 0
+        self.remote_waiters = 0
+
+    def do(self, key, fn, lookup=None):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.leaders += 1
+            else:
+                self.local_waiters += 1
+
+        if not leader:
+            if call.event.wait(self.wait_timeout):
+                if call.error is not None:
+                    raise call.error
+                return call.result
+            # leader is stuck, don't make the user wait more
+            return fn()
+
+        try:
+            call.result = self._lead(key, fn, lookup)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    async def ado(self, key, fn, lookup=None):
+        """Async variant of do(), `fn` and `lookup` are coroutine functions"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            calls = self._async_calls.setdefault(loop, {})
+            call = calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call(asyncio.Event())
+                calls[key] = call
+                self.leaders += 1
+            else:
+                self.local_waiters += 1
+
+        if not leader:
+            try:
+                await asyncio.wait_for(call.event.wait(), self.wait_timeout)
+            except asyncio.TimeoutError:
+                return await fn()
+            if call.error is not None:
+                raise call.error
+            if call.result is None:
+                # the leader was cancelled (client went away)
+                return await fn()
+            return call.result
+
+        try:
+            call.result = await self._alead(key, fn, lookup)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                calls.pop(key, None)
+            call.event.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "leaders": self.leaders,
+                "local_waiters": self.local_waiters,
+                "remote_waiters": self.remote_waiters,
+                "in_flight": len(self._calls) + sum(len(calls) for calls in self._async_calls.values()),
+            }
+
+    # Internal helpers
+    def _lead(self, key, fn, lookup):
+        lock_key = f"{self.LOCK_PREFIX}:{key}"
+        token = uuid.uuid4().hex
+
+        if lookup is None or self._acquire(lock_key, token):
+            try:
+                return fn()
+            finally:
+                self._release(lock_key, token)
+
+        # another process is translating the same text
+        with self._lock:
+            self.remote_waiters += 1
+
+        for delay in self._poll_delays():
+            time.sleep(delay)
+            value = lookup()
+            if value is not None:
+                return value
+            if not self._is_locked(lock_key):
+                # the owner may have stored the result and released the lock
+                # between the two calls, only a miss now means it failed
+                value = lookup()
+                if value is not None:
+                    return value
+                break
+
+        return fn()
+
+    async def _alead(self, key, fn, lookup):
+        lock_key = f"{self.LOCK_PREFIX}:{key}"
+        token = uuid.uuid4().hex
+
+        # the shared cache may be the database: its calls go through sync_to_async
+        if lookup is None or await sync_to_async(self._acquire)(lock_key, token):
+            try:
+                return await fn()
+            finally:
+                await sync_to_async(self._release)(lock_key, token)
+
+        with self._lock:
+            self.remote_waiters += 1
+
+        for delay in self._poll_delays():
+            await asyncio.sleep(delay)
+            value = await lookup()
+            if value is not None:
+                return value
+            if not await sync_to_async(self._is_locked)(lock_key):
+                value = await lookup()
+                if value is not None:
+                    return value
+                break
+
+        return await fn()
+
+    def _poll_delays(self):
+        """Sleeps between two lookups of a remote waiter, until wait_timeout"""
+        deadline = time.monotonic() + self.wait_timeout
+        delay = self.poll_interval
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            yield min(delay, remaining)
+            delay = min(delay * 2, self.max_poll_interval)
+
+    def _acquire(self, lock_key, token) -> bool:
+        try:
+            return caches[self.alias].add(lock_key, token, timeout=self.lock_ttl)
+        except Exception:
+            # shared cache down: behave as if we had the lock
+            return True
+
+    def _release(self, lock_key, token):
+        try:
+            cache = caches[self.alias]
+            if cache.get(lock_key) == token:
+                cache.delete(lock_key)
+        except Exception:
+            pass
+
+    def _is_locked(self, lock_key) -> bool:
+        try:
+            return caches[self.alias].get(lock_key) is not None
+        except Exception:
+            return False
+
+
+translation_single_flight = SingleFlight()
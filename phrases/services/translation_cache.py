@@ -0,0 +1,119 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class TranslationCache:
+    """
+    Translation memory in front of the providers, two tiers:
+    - local: bounded LRU inside the process (no I/O at all)
+    - shared: django cache alias (db table by default) with TTL,
+      so every worker reuses what another one already translated
+    """
+
+    # v2: keys keep the case of the text, v1 entries were shared by "May" and "may"
+    KEY_PREFIX = "translation:v2"
+
+    def __init__(self, max_size=None, ttl=None, alias=None):
+        self.max_size = max_size or getattr(settings, 'TRANSLATION_CACHE_SIZE', 1024)
+        self.ttl = ttl or getattr(settings, 'TRANSLATION_CACHE_TTL', 60 * 60 * 24 * 7)
+        self.alias = alias or getattr(settings, 'TRANSLATION_CACHE_ALIAS', 'translations')
+
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """
+        same text with different spaces must hit the same entry; case is kept,
+        it changes the translation ("May"/"may", "US"/"us", proper nouns)
+        """
+        return " ".join(text.split())
+
+    def make_key(self, text: str, source_lang: str, target_lang: str) -> str:
+        raw = f"{source_lang.lower()}:{target_lang.lower()}:{self.normalize(text)}"
+        # hashed because memcached/db keys have length limits
+        digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+        return f"{self.KEY_PREFIX}:{digest}"
+
+    def get(self, text: str, source_lang: str, target_lang: str):
+        key = self.make_key(text, source_lang, target_lang)
+
+        with self._lock:
+            value = self._local.get(key)
+            if value is not None:
+                self._local.move_to_end(key)
+                self.local_hits += 1
+                return value
+
+        value = self._shared_get(key)
+        if value is not None:
+            self._store_local(key, value)
+            with self._lock:
+                self.shared_hits += 1
+            return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def peek(self, text: str, source_lang: str, target_lang: str):
+        """Shared tier lookup that doesn't touch the counters (used while polling)"""
+        return self._shared_get(self.make_key(text, source_lang, target_lang))
+
+    def set(self, text: str, source_lang: str, target_lang: str, value: dict):
+        key = self.make_key(text, source_lang, target_lang)
+        self._store_local(key, value)
+        self._shared_set(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+            self.local_hits = 0
+            self.shared_hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.local_hits + self.shared_hits
+            total = hits + self.misses
+            return {
+                "local_hits": self.local_hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "hit_ratio": round(hits / total, 4) if total else 0,
+                "local_size": len(self._local),
+                "local_max_size": self.max_size,
+            }
+
+    # Internal helpers
+    def _store_local(self, key, value):
+        with self._lock:
+            self._local[key] = value
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_size:
+                self._local.popitem(last=False)
+
+    def _shared_get(self, key):
+        # the shared tier is an optimization, if it is down we just translate
+        try:
+            return caches[self.alias].get(key)
+        except Exception:
+            return None
+
+    def _shared_set(self, key, value):
+        try:
+            caches[self.alias].set(key, value, timeout=self.ttl)
+        except Exception:
+            pass
+
+
+# one instance per process, TranslationService is created per request
+translation_cache = TranslationCache()
@@ -1,49 +1,359 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
 from .providers.deepl import DeepLProvider
 from .providers.libretranslate import LibreTranslateProvider
 from .providers.mymemory import MyMemoryProvider
+from .translation_cache import translation_cache
+from .provider_health import provider_health
+from .circuit_breaker import circuit_breakers
+from .single_flight import translation_single_flight
+
+
+_hedge_executor = None
+_hedge_executor_lock = threading.Lock()
+
+
+def get_hedge_executor() -> ThreadPoolExecutor:
+    """Thread pool shared by every hedged translation of the process"""
+    global _hedge_executor
+    with _hedge_executor_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'TRANSLATION_HEDGE_WORKERS', 16),
+                thread_name_prefix='translation-hedge',
+            )
+        return _hedge_executor
 
 
 class TranslationService:
     """
     This is useful for allow multiple providers
     https://docs.libretranslate.com/
+
+    Sequential mode (default): providers are tried one after the other.
+    Hedged mode (TRANSLATION_HEDGED): the best provider is called and, if it has not
+    answered after the hedge delay, the next one is started too; the first valid
+    answer wins. A request that is already running can't be interrupted, so the
+    loser finishes in the background and its answer is discarded.
+
+    atranslate() is the async variant for ASGI: same cache, breakers and
+    ordering, but the provider calls run on the event loop, so one worker keeps
+    many of them in flight and hedged losers are really cancelled.
     """
 
-    def __init__(self):
+    DEFAULT_HEDGE_DELAY = 0.5  # seconds, used until there is latency data
+
+    def __init__(self, cache=None, health=None, breakers=None, hedged=None, single_flight=None):
         self.providers = [
             DeepLProvider(),
             LibreTranslateProvider(),
             MyMemoryProvider(),
         ]
+        self.cache = cache or translation_cache
+        self.health = health or provider_health
+        self.breakers = breakers or circuit_breakers
+        self.single_flight = single_flight or translation_single_flight
+        self.hedged = getattr(settings, 'TRANSLATION_HEDGED', False) if hedged is None else hedged
 
     def translate(self, text: str, source_lang: str, target_lang: str) -> dict:
+        # translation memory first, providers only on a miss
+        cached = self.cache.get(text, source_lang, target_lang)
+        if cached is not None:
+            return self._build_result(text, source_lang, target_lang, cached, cached=True)
+
+        # identical requests in flight (this or other workers) share one provider call
+        entry = self.single_flight.do(
+            self.cache.make_key(text, source_lang, target_lang),
+            lambda: self._translate_uncached(text, source_lang, target_lang),
+            lookup=lambda: self.cache.peek(text, source_lang, target_lang),
+        )
+        return self._build_result(text, source_lang, target_lang, entry)
+
+    def _translate_uncached(self, text, source_lang, target_lang) -> dict:
         errors = []
 
-        for provider in self.providers:
-            try:
-                #  check if provider is available
-                if not provider.is_available():
-                    errors.append(f"{provider.__class__.__name__}: Not avaiblable")
-                    continue
+        if self.hedged:
+            entry = self._translate_hedged(text, source_lang, target_lang, errors)
+        else:
+            entry = self._translate_sequential(text, source_lang, target_lang, errors)
 
-                # try translation
-                result = provider.translate(text, source_lang, target_lang)
+        if entry is None:
+            # if all providers failed
+            error_msg = "All providers failed:\n" + "\n".join(errors)
+            raise Exception(error_msg)
 
-                return {
-                    'original': text,
-                    'translation': result['translation'],
-                    'pronunciation': result.get('pronunciation'),
-                    'source_lang': source_lang,
-                    'target_lang': target_lang,
-                    'provider': provider.__class__.__name__,
-                }
+        # stored before the lock is released so waiting workers find it
+        self.cache.set(text, source_lang, target_lang, entry)
+        return entry
+
+    async def atranslate(self, text: str, source_lang: str, target_lang: str) -> dict:
+        # the shared tier may be the database, sync_to_async keeps the ORM off the loop
+        cached = await sync_to_async(self.cache.get)(text, source_lang, target_lang)
+        if cached is not None:
+            return self._build_result(text, source_lang, target_lang, cached, cached=True)
+
+        entry = await self.single_flight.ado(
+            self.cache.make_key(text, source_lang, target_lang),
+            lambda: self._atranslate_uncached(text, source_lang, target_lang),
+            lookup=lambda: sync_to_async(self.cache.peek)(text, source_lang, target_lang),
+        )
+        return self._build_result(text, source_lang, target_lang, entry)
+
+    async def _atranslate_uncached(self, text, source_lang, target_lang) -> dict:
+        errors = []
 
+        if self.hedged:
+            entry = await self._atranslate_hedged(text, source_lang, target_lang, errors)
+        else:
+            entry = await self._atranslate_sequential(text, source_lang, target_lang, errors)
+
+        if entry is None:
+            error_msg = "All providers failed:\n" + "\n".join(errors)
+            raise Exception(error_msg)
+
+        await sync_to_async(self.cache.set)(text, source_lang, target_lang, entry)
+        return entry
+
+    def translate_many(self, texts: list, source_lang: str, target_lang: str) -> list:
+        """
+        Translate a list of texts, results in the same order.
+        Duplicates are translated once, cached texts are not sent and the
+        rest goes to the first provider that can translate all of them
+        (one request for providers with a multi-text API).
+        """
+        entries = {}
+        missing = {}
+
+        for text in texts:
+            key = self.cache.make_key(text, source_lang, target_lang)
+            if key in entries or key in missing:
+                continue
+            cached = self.cache.get(text, source_lang, target_lang)
+            if cached is not None:
+                entries[key] = (cached, True)
+            else:
+                missing[key] = text
+
+        if missing:
+            errors = []
+            translated = None
+
+            for provider in self._candidates(errors):
+                try:
+                    translated = self._call_provider_many(provider, list(missing.values()), source_lang, target_lang)
+                    break
+                except Exception as e:
+                    errors.append(f"{provider.__class__.__name__}: {str(e)}")
+
+            if translated is None:
+                error_msg = "All providers failed:\n" + "\n".join(errors)
+                raise Exception(error_msg)
+
+            for (key, text), entry in zip(missing.items(), translated):
+                self.cache.set(text, source_lang, target_lang, entry)
+                entries[key] = (entry, False)
+
+        results = []
+        for text in texts:
+            entry, cached = entries[self.cache.make_key(text, source_lang, target_lang)]
+            results.append(self._build_result(text, source_lang, target_lang, entry, cached=cached))
+        return results
+
+    def _translate_sequential(self, text, source_lang, target_lang, errors):
+        for provider in self._candidates(errors):
+            try:
+                return self._call_provider(provider, text, source_lang, target_lang)
             except Exception as e:
                 errors.append(
                     f"{provider.__class__.__name__}: {str(e)}"
                 )
                 continue
+        return None
+
+    def _translate_hedged(self, text, source_lang, target_lang, errors):
+        candidates = self._candidates(errors)
+        executor = get_hedge_executor()
+        pending = {}
+
+        def launch_next():
+            provider = next(candidates, None)
+            if provider is None:
+                return None
+            future = executor.submit(self._call_provider, provider, text, source_lang, target_lang)
+            pending[future] = provider
+            return provider
+
+        last_launched = launch_next()
+
+        while pending:
+            # once every provider is running there is nothing left to hedge with
+            timeout = self._hedge_delay(last_launched) if last_launched else None
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                # slow answer: start the next provider in parallel
+                last_launched = launch_next()
+                continue
+
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    entry = future.result()
+                except Exception as e:
+                    errors.append(f"{provider.__class__.__name__}: {str(e)}")
+                    # failed fast: don't wait for the delay to try the next one
+                    if last_launched:
+                        last_launched = launch_next()
+                    continue
+
+                for loser, loser_provider in pending.items():
+                    if loser.cancel():
+                        self.breakers.get(loser_provider).release()
+                return entry
+
+        return None
+
+    async def _atranslate_sequential(self, text, source_lang, target_lang, errors):
+        for provider in self._candidates(errors):
+            try:
+                return await self._acall_provider(provider, text, source_lang, target_lang)
+            except Exception as e:
+                errors.append(f"{provider.__class__.__name__}: {str(e)}")
+        return None
+
+    async def _atranslate_hedged(self, text, source_lang, target_lang, errors):
+        candidates = self._candidates(errors)
+        pending = {}
+
+        def launch_next():
+            provider = next(candidates, None)
+            if provider is None:
+                return None
+            task = asyncio.ensure_future(self._acall_provider(provider, text, source_lang, target_lang))
+            pending[task] = provider
+            return provider
+
+        last_launched = launch_next()
+
+        try:
+            while pending:
+                timeout = self._hedge_delay(last_launched) if last_launched else None
+                done, _ = await asyncio.wait(list(pending), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    last_launched = launch_next()
+                    continue
+
+                for task in done:
+                    provider = pending.pop(task)
+                    try:
+                        entry = task.result()
+                    except Exception as e:
+                        errors.append(f"{provider.__class__.__name__}: {str(e)}")
+                        if last_launched:
+                            last_launched = launch_next()
+                        continue
+                    return entry
+
+            return None
+        finally:
+            # unlike threads, a running coroutine can be stopped: losers don't finish in the background
+            for loser, loser_provider in pending.items():
+                if loser.cancel():
+                    self.breakers.get(loser_provider).release()
+
+    def _candidates(self, errors):
+        """Providers that can be called now, best first"""
+        # best providers first (success rate, latency), dead ones last
+        for provider in self.breakers.order(self.providers):
+            #  check if provider is available (cached, no network call)
+            if not self.health.is_available(provider):
+                errors.append(f"{provider.__class__.__name__}: Not avaiblable")
+                continue
+
+            # skip providers that keep failing instead of waiting for their timeout
+            if not self.breakers.get(provider).allow_request():
+                errors.append(f"{provider.__class__.__name__}: Circuit open")
+                continue
+
+            yield provider
+
+    def _call_provider(self, provider, text, source_lang, target_lang) -> dict:
+        """One provider call with breaker and health bookkeeping, raises on failure"""
+        return self._tracked(provider, lambda: self._to_entry(
+            provider, provider.translate(text, source_lang, target_lang)
+        ))
+
+    async def _acall_provider(self, provider, text, source_lang, target_lang) -> dict:
+        breaker = self.breakers.get(provider)
+        started = time.monotonic()
+        try:
+            result = await provider.atranslate(text, source_lang, target_lang)
+            entry = self._to_entry(provider, result)
+        except Exception:
+            breaker.record_failure(time.monotonic() - started)
+            self.health.record_failure(provider)
+            raise
+
+        breaker.record_success(time.monotonic() - started)
+        self.health.record_success(provider)
+        return entry
+
+    def _call_provider_many(self, provider, texts, source_lang, target_lang) -> list:
+        def call():
+            results = provider.translate_many(texts, source_lang, target_lang)
+            if len(results) != len(texts):
+                raise Exception("provider returned a different number of translations")
+            return [self._to_entry(provider, result) for result in results]
+
+        return self._tracked(provider, call)
+
+    def _tracked(self, provider, call):
+        breaker = self.breakers.get(provider)
+        started = time.monotonic()
+        try:
+            # try translation
+            value = call()
+        except Exception:
+            breaker.record_failure(time.monotonic() - started)
+            self.health.record_failure(provider)
+            raise
+
+        breaker.record_success(time.monotonic() - started)
+        self.health.record_success(provider)
+        return value
+
+    @staticmethod
+    def _to_entry(provider, result) -> dict:
+        return {
+            'translation': result['translation'],
+            'pronunciation': result.get('pronunciation'),
+            'provider': provider.__class__.__name__,
+        }
+
+    def _hedge_delay(self, provider) -> float:
+        """Fixed TRANSLATION_HEDGE_DELAY, or the provider p95 when it is not set"""
+        delay = getattr(settings, 'TRANSLATION_HEDGE_DELAY', None)
+        if delay is not None:
+            return delay
+
+        p95 = self.breakers.get(provider).latency_percentile(95)
+        return p95 if p95 is not None else self.DEFAULT_HEDGE_DELAY
 
-        # if all providers failed
-        error_msg = "All providers failed:\n" + "\n".join(errors)
-        raise Exception(error_msg)
+    @staticmethod
+    def _build_result(text, source_lang, target_lang, entry, cached=False) -> dict:
+        return {
+            'original': text,
+            'translation': entry['translation'],
+            'pronunciation': entry.get('pronunciation'),
+            'source_lang': source_lang,
+            'target_lang': target_lang,
+            'provider': entry.get('provider'),
+            'cached': cached,
+        }
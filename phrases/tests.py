@@ -1,9 +1,18 @@
-from django.test import TestCase
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, AsyncMock, MagicMock
 
 from phrases.models import Phrase, Language, Category
 from phrases.serializers import (
@@ -11,6 +20,22 @@ from phrases.serializers import (
     PhraseDetailSerializer,
     PhraseCreateSerializer,
 )
+from phrases.services.translation_cache import TranslationCache
+from phrases.services.provider_health import ProviderHealth
+from phrases.benchmark import StubProviderServer, percentile
+from phrases.services.deepl_quota import DeepLQuota
+from phrases.services.circuit_breaker import CircuitBreaker, CircuitBreakerRegistry
+from parla.http_pool import PooledSession
+from phrases.services.http_pool import (
+    aclose_async_clients,
+    get_async_client,
+    get_session,
+    get_timeout,
+)
+from phrases.services.providers.mymemory import MyMemoryProvider
+from phrases.services.providers.deepl import DeepLProvider
+from phrases.services.single_flight import SingleFlight
+from phrases.services.translation_service import TranslationService
 
 User = get_user_model()
 
@@ -591,4 +616,1001 @@ class ViewIntegrationTest(APITestCase):
         
         # List all phrases
         list_response = self.client.get(phrase_url)
-        self.assertEqual(len(list_response.data['results']), 2)
\ No newline at end of file
+        self.assertEqual(len(list_response.data['results']), 2)
+
+class TranslationCacheTest(TestCase):
+    """Tests for the translation memory in front of the providers"""
+
+    def setUp(self):
+        self.cache = TranslationCache(max_size=2)
+        self.entry = {'translation': 'perro', 'pronunciation': None, 'provider': 'DeepLProvider'}
+
+    def test_miss_then_hit(self):
+        """Test that a stored translation is served from the cache"""
+        self.assertIsNone(self.cache.get('dog', 'en', 'es'))
+        self.cache.set('dog', 'en', 'es', self.entry)
+
+        self.assertEqual(self.cache.get('dog', 'en', 'es'), self.entry)
+        stats = self.cache.stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['local_hits'], 1)
+
+    def test_key_is_normalized(self):
+        """Test that extra spaces and language code case map to the same entry"""
+        self.cache.set('Good  morning', 'EN', 'es', self.entry)
+
+        self.assertEqual(self.cache.get(' Good morning ', 'en', 'ES'), self.entry)
+        self.assertIsNone(self.cache.get('Good morning', 'en', 'fr'))
+
+    def test_text_case_is_part_of_the_key(self):
+        """Test that "May" and "may" are cached separately"""
+        month = {'translation': 'mayo', 'pronunciation': None, 'provider': 'DeepLProvider'}
+        verb = {'translation': 'poder', 'pronunciation': None, 'provider': 'DeepLProvider'}
+        self.cache.set('May', 'en', 'es', month)
+
+        self.assertIsNone(self.cache.get('may', 'en', 'es'))
+        self.cache.set('may', 'en', 'es', verb)
+        self.assertEqual(self.cache.get('May', 'en', 'es'), month)
+        self.assertEqual(self.cache.get('may', 'en', 'es'), verb)
+
+    def test_local_tier_is_bounded(self):
+        """Test that the LRU evicts the least recently used entry"""
+        self.cache.set('a', 'en', 'es', self.entry)
+        self.cache.set('b', 'en', 'es', self.entry)
+        self.cache.get('a', 'en', 'es')
+        self.cache.set('c', 'en', 'es', self.entry)
+
+        self.assertEqual(self.cache.stats()['local_size'], 2)
+        self.assertNotIn(self.cache.make_key('b', 'en', 'es'), self.cache._local)
+        self.assertIn(self.cache.make_key('a', 'en', 'es'), self.cache._local)
+
+    def test_shared_tier_serves_other_processes(self):
+        """Test that an entry missing locally is found in the shared tier"""
+        self.cache.set('dog', 'en', 'es', self.entry)
+        other_process = TranslationCache(max_size=2)
+
+        self.assertEqual(other_process.get('dog', 'en', 'es'), self.entry)
+        self.assertEqual(other_process.stats()['shared_hits'], 1)
+
+
+class TranslationServiceCacheTest(TestCase):
+    """Tests for TranslationService using the translation memory"""
+
+    def setUp(self):
+        self.cache = TranslationCache(max_size=10)
+        self.service = TranslationService(
+            cache=self.cache,
+            health=ProviderHealth(ttl=60),
+            breakers=CircuitBreakerRegistry(),
+        )
+        self.provider = MagicMock()
+        self.provider.is_available.return_value = True
+        self.provider.translate.return_value = {'translation': 'perro', 'pronunciation': None}
+        self.service.providers = [self.provider]
+        self.service.health.record_success(self.provider)
+
+    def test_second_call_does_not_hit_provider(self):
+        """Test that repeated translations are served from the cache"""
+        first = self.service.translate('dog', 'en', 'es')
+        second = self.service.translate('dog', 'en', 'es')
+
+        self.assertEqual(self.provider.translate.call_count, 1)
+        self.assertFalse(first['cached'])
+        self.assertTrue(second['cached'])
+        self.assertEqual(second['translation'], 'perro')
+        self.assertEqual(second['original'], 'dog')
+
+    def test_failures_are_not_cached(self):
+        """Test that a failed translation is retried on the next call"""
+        self.provider.translate.side_effect = [Exception('timeout'), {'translation': 'perro'}]
+
+        with self.assertRaises(Exception):
+            self.service.translate('dog', 'en', 'es')
+        result = self.service.translate('dog', 'en', 'es')
+
+        self.assertEqual(result['translation'], 'perro')
+        self.assertEqual(self.provider.translate.call_count, 2)
+
+
+class ProviderHealthTest(TestCase):
+    """Tests for the cached provider availability"""
+
+    def setUp(self):
+        self.health = ProviderHealth(ttl=60)
+        self.provider = MagicMock()
+        self.provider.is_available.return_value = False
+
+    def test_unknown_provider_is_optimistic(self):
+        """Test that a provider never checked is tried instead of probed inline"""
+        with patch.object(ProviderHealth, '_refresh_in_background') as refresh:
+            self.assertTrue(self.health.is_available(self.provider))
+
+        refresh.assert_called_once_with(self.provider)
+        self.provider.is_available.assert_not_called()
+
+    def test_fresh_state_does_not_probe(self):
+        """Test that a cached result is reused until the TTL expires"""
+        self.health.refresh(self.provider)
+
+        with patch.object(ProviderHealth, '_refresh_in_background') as refresh:
+            for _ in range(5):
+                self.assertFalse(self.health.is_available(self.provider))
+
+        refresh.assert_not_called()
+        self.assertEqual(self.provider.is_available.call_count, 1)
+
+    def test_probe_errors_mark_unavailable(self):
+        """Test that a probe raising an exception counts as unavailable"""
+        self.provider.is_available.side_effect = Exception('timeout')
+
+        self.assertFalse(self.health.refresh(self.provider))
+
+    def test_success_keeps_provider_fresh(self):
+        """Test that a real translation counts as a health check"""
+        self.health.record_success(self.provider)
+
+        with patch.object(ProviderHealth, '_refresh_in_background') as refresh:
+            self.assertTrue(self.health.is_available(self.provider))
+        refresh.assert_not_called()
+
+    def test_failure_schedules_a_probe(self):
+        """Test that a failed translation triggers a background re-check"""
+        self.health.record_success(self.provider)
+        self.health.record_failure(self.provider)
+
+        with patch.object(ProviderHealth, '_refresh_in_background') as refresh:
+            self.health.is_available(self.provider)
+            self.health.is_available(self.provider)
+        refresh.assert_called_once_with(self.provider)
+
+    def test_background_probe_closes_its_connection(self):
+        """Test that the probe thread doesn't leave a db connection open, even when the probe fails"""
+        self.provider.is_available.side_effect = Exception('timeout')
+
+        with patch('phrases.services.provider_health.connection') as connection:
+            self.health._probe(self.provider)
+
+        connection.close.assert_called_once()
+        self.assertFalse(self.health.snapshot()['MagicMock']['available'])
+
+
+class TranslationServiceHealthTest(TestCase):
+    """Tests for TranslationService using cached availability"""
+
+    def test_translate_does_not_probe_healthy_provider(self):
+        """Test that only the translate request goes to the provider"""
+        health = ProviderHealth(ttl=60)
+        service = TranslationService(
+            cache=TranslationCache(max_size=10),
+            health=health,
+            breakers=CircuitBreakerRegistry(),
+        )
+        provider = MagicMock()
+        provider.translate.return_value = {'translation': 'perro'}
+        service.providers = [provider]
+        health.record_success(provider)
+
+        service.translate('dog', 'en', 'es')
+        service.translate('cat', 'en', 'es')
+
+        provider.is_available.assert_not_called()
+        self.assertEqual(provider.translate.call_count, 2)
+
+
+class CircuitBreakerTest(TestCase):
+    """Tests for the per provider circuit breaker"""
+
+    def test_opens_after_consecutive_failures(self):
+        """Test that the breaker opens once the threshold is reached"""
+        breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=30)
+
+        for _ in range(3):
+            self.assertTrue(breaker.allow_request())
+            breaker.record_failure(10.0)
+
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow_request())
+
+    def test_success_resets_failure_count(self):
+        """Test that only consecutive failures open the breaker"""
+        breaker = CircuitBreaker(failure_threshold=2)
+        breaker.record_failure(1.0)
+        breaker.record_success(0.1)
+        breaker.record_failure(1.0)
+
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_allows_a_single_trial(self):
+        """Test that after the recovery timeout only one request is let through"""
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0)
+        breaker.record_failure(1.0)
+
+        self.assertTrue(breaker.allow_request())
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertFalse(breaker.allow_request())
+
+        breaker.record_success(0.2)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_failed_trial_opens_again(self):
+        """Test that a failing half-open trial opens the breaker again"""
+        breaker = CircuitBreaker(failure_threshold=5, recovery_timeout=0)
+        for _ in range(5):
+            breaker.record_failure(1.0)
+        breaker.allow_request()
+
+        breaker.record_failure(1.0)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+    def test_latency_percentiles(self):
+        """Test percentiles only use successful calls"""
+        breaker = CircuitBreaker()
+        for latency in [0.1, 0.2, 0.3, 0.4, 0.5]:
+            breaker.record_success(latency)
+        breaker.record_failure(10.0)
+
+        self.assertEqual(breaker.latency_percentile(50), 0.3)
+        self.assertEqual(breaker.latency_percentile(100), 0.5)
+        self.assertAlmostEqual(breaker.success_rate(), 5 / 6)
+
+
+class AdaptiveOrderingTest(TestCase):
+    """Tests for provider ordering and skipping by the circuit breakers"""
+
+    def setUp(self):
+        self.breakers = CircuitBreakerRegistry()
+        self.health = ProviderHealth(ttl=60)
+        self.primary = type('PrimaryProvider', (MagicMock,), {})()
+        self.secondary = type('SecondaryProvider', (MagicMock,), {})()
+        self.primary.translate.side_effect = Exception('timeout')
+        self.secondary.translate.return_value = {'translation': 'perro'}
+        for provider in (self.primary, self.secondary):
+            self.health.record_success(provider)
+
+        self.service = TranslationService(
+            cache=TranslationCache(max_size=10),
+            health=self.health,
+            breakers=self.breakers,
+        )
+        self.service.providers = [self.primary, self.secondary]
+
+    def test_configured_order_without_data(self):
+        """Test that the configured order is kept while there are no samples"""
+        self.assertEqual(self.breakers.order([self.primary, self.secondary]), [self.primary, self.secondary])
+
+    def test_failing_provider_moves_last(self):
+        """Test that providers with a worse success rate are tried later"""
+        self.breakers.get(self.primary).record_failure(10.0)
+        self.breakers.get(self.secondary).record_success(0.2)
+
+        self.assertEqual(self.breakers.order([self.primary, self.secondary]), [self.secondary, self.primary])
+
+    def test_faster_provider_goes_first(self):
+        """Test that p50 latency breaks ties between healthy providers"""
+        self.breakers.get(self.primary).record_success(2.0)
+        self.breakers.get(self.secondary).record_success(0.2)
+
+        self.assertEqual(self.breakers.order([self.primary, self.secondary]), [self.secondary, self.primary])
+
+    def test_unmeasured_providers_keep_their_position(self):
+        """Test that a healthy measured primary stays ahead of providers without latency data"""
+        third = type('ThirdProvider', (MagicMock,), {})()
+        for _ in range(20):
+            self.breakers.get(self.primary).record_success(0.3)
+
+        self.assertEqual(
+            self.breakers.order([self.primary, self.secondary, third]),
+            [self.primary, self.secondary, third],
+        )
+
+    def test_open_breaker_is_skipped(self):
+        """Test that a provider with an open breaker is not called"""
+        breaker = self.breakers.get(self.primary)
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure(10.0)
+
+        result = self.service.translate('dog', 'en', 'es')
+
+        self.assertEqual(result['translation'], 'perro')
+        self.primary.translate.assert_not_called()
+
+    def test_outage_only_costs_the_first_request(self):
+        """Test that a failing primary is not retried on every translation"""
+        for word in ['one', 'two', 'three', 'four', 'five']:
+            result = self.service.translate(word, 'en', 'es')
+            self.assertEqual(result['translation'], 'perro')
+
+        self.assertEqual(self.primary.translate.call_count, 1)
+
+    def test_old_samples_expire(self):
+        """Test that a demoted provider gets its configured position back"""
+        self.breakers.get(self.primary).record_failure(10.0)
+        self.breakers.get(self.primary).max_age = 0
+
+        self.assertEqual(self.breakers.order([self.primary, self.secondary]), [self.primary, self.secondary])
+
+
+class HedgedTranslationTest(TestCase):
+    """Tests for the hedged (parallel) translation mode"""
+
+    def setUp(self):
+        self.health = ProviderHealth(ttl=60)
+        self.slow = type('SlowProvider', (MagicMock,), {})()
+        self.fast = type('FastProvider', (MagicMock,), {})()
+        self.release_slow = threading.Event()
+
+        def slow_translate(*args):
+            self.release_slow.wait(2)
+            return {'translation': 'lento'}
+
+        self.slow.translate.side_effect = slow_translate
+        self.fast.translate.return_value = {'translation': 'rapido'}
+        for provider in (self.slow, self.fast):
+            self.health.record_success(provider)
+
+        self.service = TranslationService(
+            cache=TranslationCache(max_size=10),
+            health=self.health,
+            breakers=CircuitBreakerRegistry(),
+            hedged=True,
+        )
+        self.service.providers = [self.slow, self.fast]
+
+    def tearDown(self):
+        self.release_slow.set()
+
+    @override_settings(TRANSLATION_HEDGE_DELAY=0.05)
+    def test_slow_primary_is_hedged(self):
+        """Test that the second provider answers when the primary is slow"""
+        started = time.monotonic()
+        result = self.service.translate('dog', 'en', 'es')
+
+        self.assertEqual(result['translation'], 'rapido')
+        self.assertEqual(result['provider'], 'FastProvider')
+        self.assertLess(time.monotonic() - started, 1)
+
+    @override_settings(TRANSLATION_HEDGE_DELAY=5)
+    def test_failed_primary_starts_next_immediately(self):
+        """Test that a failure does not wait for the hedge delay"""
+        self.slow.translate.side_effect = Exception('quota exceeded')
+
+        started = time.monotonic()
+        result = self.service.translate('dog', 'en', 'es')
+
+        self.assertEqual(result['translation'], 'rapido')
+        self.assertLess(time.monotonic() - started, 1)
+
+    @override_settings(TRANSLATION_HEDGE_DELAY=5)
+    def test_fast_primary_is_not_hedged(self):
+        """Test that the second provider is not called when the primary answers in time"""
+        self.release_slow.set()
+
+        result = self.service.translate('dog', 'en', 'es')
+
+        self.assertEqual(result['translation'], 'lento')
+        self.fast.translate.assert_not_called()
+
+    @override_settings(TRANSLATION_HEDGE_DELAY=0.01)
+    def test_all_providers_failing_raises(self):
+        """Test that hedged mode still reports every failure"""
+        self.slow.translate.side_effect = Exception('down')
+        self.fast.translate.side_effect = Exception('down')
+
+        with self.assertRaises(Exception) as ctx:
+            self.service.translate('dog', 'en', 'es')
+        self.assertIn('SlowProvider', str(ctx.exception))
+        self.assertIn('FastProvider', str(ctx.exception))
+
+
+class PooledSessionTest(TestCase):
+    """Tests for the keep-alive sessions used by the providers"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                body = b'{"responseStatus": 200, "responseData": {"translatedText": "perro"}}'
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def test_connections_are_reused(self):
+        """Test that consecutive requests share one TCP connection"""
+        session = PooledSession('test', pool_size=2, retries=0)
+
+        responses = [session.get(self.base_url, timeout=get_timeout()) for _ in range(3)]
+
+        self.assertFalse(responses[0].connection_reused)
+        self.assertTrue(responses[1].connection_reused)
+        self.assertTrue(responses[2].connection_reused)
+        stats = session.stats()
+        self.assertEqual(stats['requests'], 3)
+        self.assertEqual(stats['connections_opened'], 1)
+        self.assertEqual(stats['reused'], 2)
+
+    def test_sessions_are_shared_per_host(self):
+        """Test that providers created per request reuse the same session"""
+        self.assertIs(get_session('mymemory'), get_session('mymemory'))
+        self.assertIsNot(get_session('mymemory'), get_session('deepl'))
+
+    def test_provider_uses_pooled_session(self):
+        """Test that MyMemoryProvider goes through the shared session"""
+        provider = MyMemoryProvider()
+        provider.base_url = self.base_url
+
+        result = provider.translate('dog', 'en', 'es')
+
+        self.assertEqual(result['translation'], 'perro')
+        self.assertIs(provider.session, get_session('mymemory'))
+
+    async def test_async_provider_uses_loop_client(self):
+        """Test that atranslate goes through one keep-alive client per event loop"""
+        provider = MyMemoryProvider()
+        provider.base_url = self.base_url
+
+        try:
+            results = await asyncio.gather(*(provider.atranslate('dog', 'en', 'es') for _ in range(3)))
+            self.assertEqual([r['translation'] for r in results], ['perro'] * 3)
+            self.assertIs(get_async_client('mymemory'), get_async_client('mymemory'))
+        finally:
+            await aclose_async_clients()
+
+    @override_settings(TRANSLATION_HTTP_CONNECT_TIMEOUT=1, TRANSLATION_HTTP_TIMEOUT=7)
+    def test_timeouts_come_from_settings(self):
+        """Test that connect/read timeouts are configurable"""
+        self.assertEqual(get_timeout(), (1, 7))
+        self.assertEqual(get_timeout(read=5), (1, 5))
+
+
+class BatchTranslationTest(TestCase):
+    """Tests for TranslationService.translate_many"""
+
+    def setUp(self):
+        self.cache = TranslationCache(max_size=10)
+        self.health = ProviderHealth(ttl=60)
+        self.provider = MagicMock()
+        self.provider.translate_many.side_effect = lambda texts, s, t: [
+            {'translation': text.upper()} for text in texts
+        ]
+        self.health.record_success(self.provider)
+
+        self.service = TranslationService(
+            cache=self.cache,
+            health=self.health,
+            breakers=CircuitBreakerRegistry(),
+        )
+        self.service.providers = [self.provider]
+
+    def test_results_keep_order_and_duplicates(self):
+        """Test that duplicates are translated once but returned for every input, case counts"""
+        results = self.service.translate_many(['dog', 'cat', 'dog', 'Dog'], 'en', 'es')
+
+        self.assertEqual([r['original'] for r in results], ['dog', 'cat', 'dog', 'Dog'])
+        self.assertEqual([r['translation'] for r in results], ['DOG', 'CAT', 'DOG', 'DOG'])
+        self.provider.translate_many.assert_called_once_with(['dog', 'cat', 'Dog'], 'en', 'es')
+
+    def test_cached_texts_are_not_sent(self):
+        """Test that only cache misses go to the provider"""
+        self.cache.set('dog', 'en', 'es', {'translation': 'perro', 'provider': 'DeepLProvider'})
+
+        results = self.service.translate_many(['dog', 'cat'], 'en', 'es')
+
+        self.provider.translate_many.assert_called_once_with(['cat'], 'en', 'es')
+        self.assertTrue(results[0]['cached'])
+        self.assertEqual(results[0]['translation'], 'perro')
+        self.assertFalse(results[1]['cached'])
+
+    def test_everything_cached_makes_no_call(self):
+        """Test that a fully cached batch does not touch the providers"""
+        self.service.translate_many(['dog'], 'en', 'es')
+        self.service.translate_many(['dog', 'dog'], 'en', 'es')
+
+        self.assertEqual(self.provider.translate_many.call_count, 1)
+
+    def test_wrong_number_of_results_falls_back(self):
+        """Test that a provider returning fewer translations is treated as a failure"""
+        self.provider.translate_many.side_effect = None
+        self.provider.translate_many.return_value = [{'translation': 'x'}]
+
+        with self.assertRaises(Exception):
+            self.service.translate_many(['dog', 'cat'], 'en', 'es')
+
+
+class DeepLBatchTest(TestCase):
+    """Tests for the DeepL multi-text request"""
+
+    @override_settings(DEEPL_API_KEY='test-key')
+    def test_translate_many_sends_one_request(self):
+        """Test that several texts go in a single request with repeated text params"""
+        provider = DeepLProvider(quota=DeepLQuota())
+        provider.session = MagicMock()
+        provider.session.post.return_value.json.return_value = {
+            'translations': [{'text': 'perro'}, {'text': 'gato'}]
+        }
+
+        results = provider.translate_many(['dog', 'cat'], 'en', 'es')
+
+        self.assertEqual([r['translation'] for r in results], ['perro', 'gato'])
+        provider.session.post.assert_called_once()
+        payload = provider.session.post.call_args.kwargs['data']
+        self.assertEqual([value for key, value in payload if key == 'text'], ['dog', 'cat'])
+        self.assertIn(('target_lang', 'ES'), payload)
+
+
+class DeepLQuotaTest(TestCase):
+    """Tests for the local DeepL character count"""
+
+    def setUp(self):
+        self.quota = DeepLQuota(refresh=60, reconcile_interval=3600, character_limit=100)
+
+    def test_record_is_shared_between_processes(self):
+        """Test that characters counted by one worker are seen by another"""
+        self.quota.record(30)
+        self.quota.record(20)
+
+        other_process = DeepLQuota(character_limit=100)
+        self.assertEqual(other_process.remaining(), 50)
+        self.assertEqual(self.quota.stats()['characters'], 50)
+
+    def test_can_send_checks_remaining(self):
+        """Test that texts longer than the remaining quota are refused"""
+        self.quota.record(90)
+
+        self.assertTrue(self.quota.can_send(10))
+        self.assertFalse(self.quota.can_send(11))
+
+    def test_reconcile_replaces_local_count(self):
+        """Test that /v2/usage numbers win over the local count"""
+        self.quota.record(10)
+        self.assertTrue(self.quota.reconcile_due())
+
+        self.quota.reconcile(characters=70, limit=200)
+
+        self.assertEqual(self.quota.remaining(), 130)
+        self.assertFalse(self.quota.reconcile_due())
+
+    def test_only_one_worker_claims_the_reconcile(self):
+        """Test that a single worker calls /v2/usage per interval"""
+        other_process = DeepLQuota(reconcile_interval=3600, character_limit=100)
+
+        self.assertTrue(self.quota.claim_reconcile())
+        self.assertFalse(other_process.claim_reconcile())
+        self.assertFalse(other_process.reconcile_due())
+
+    def test_mark_exhausted(self):
+        """Test that a 456 from DeepL stops routing until the next reconcile"""
+        self.quota.mark_exhausted()
+
+        self.assertEqual(self.quota.remaining(), 0)
+        self.assertFalse(self.quota.can_send(1))
+
+
+@override_settings(DEEPL_API_KEY='test-key')
+class DeepLQuotaRoutingTest(TestCase):
+    """Tests for DeepLProvider using the local quota"""
+
+    def setUp(self):
+        self.quota = DeepLQuota(character_limit=10)
+        self.provider = DeepLProvider(quota=self.quota)
+        self.provider.session = MagicMock()
+        self.provider.session.post.return_value.json.return_value = {'translations': [{'text': 'perro'}]}
+
+    def test_successful_translation_is_counted(self):
+        """Test that the characters of the source text are recorded"""
+        self.provider.translate('dog', 'en', 'es')
+
+        self.assertEqual(self.quota.remaining(), 7)
+
+    def test_exhausted_quota_skips_request(self):
+        """Test that nothing is sent when the text doesn't fit in the quota"""
+        with self.assertRaises(Exception):
+            self.provider.translate('a very long text', 'en', 'es')
+
+        self.provider.session.post.assert_not_called()
+
+    def test_is_available_reconciles_only_when_due(self):
+        """Test that /v2/usage is called once, later checks use the local count"""
+        self.provider.session.get.return_value.json.return_value = {
+            'character_count': 4, 'character_limit': 10
+        }
+
+        self.assertTrue(self.provider.is_available())
+        self.assertTrue(self.provider.is_available())
+
+        self.provider.session.get.assert_called_once()
+        self.assertEqual(self.quota.remaining(), 6)
+
+    def test_successful_translations_reconcile_without_a_probe(self):
+        """Test that a healthy DeepL (never probed) is still reconciled, once per interval"""
+        self.provider.session.get.return_value.json.return_value = {
+            'character_count': 4, 'character_limit': 10
+        }
+
+        self.provider.translate('dog', 'en', 'es')
+        self.provider.translate('dog', 'en', 'es')
+
+        self.provider.session.get.assert_called_once()
+        self.assertEqual(self.quota.remaining(), 3)
+
+
+class TranslateBatchViewTest(APITestCase):
+    """Tests for POST /api/phrases/translate/batch/"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.url = reverse('translate-batch')
+        self.client.force_authenticate(user=self.user)
+
+    @patch('phrases.views.TranslationService')
+    def test_batch_success(self, mock_service):
+        """Test that every text gets a result in order"""
+        mock_service.return_value.translate_many.return_value = [
+            {'original': 'dog', 'translation': 'perro', 'source_lang': 'en', 'target_lang': 'es'},
+            {'original': 'cat', 'translation': 'gato', 'source_lang': 'en', 'target_lang': 'es'},
+        ]
+
+        data = {'texts': ['dog', 'cat'], 'source_lang': 'en', 'target_lang': 'es'}
+        response = self.client.post(self.url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(response.data['results'][1]['translation'], 'gato')
+
+    def test_batch_requires_texts(self):
+        """Test that an empty list is rejected"""
+        data = {'texts': [], 'source_lang': 'en', 'target_lang': 'es'}
+        response = self.client.post(self.url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch('phrases.views.TranslationService')
+    def test_batch_service_failure(self, mock_service):
+        """Test that provider failures return 503"""
+        mock_service.return_value.translate_many.side_effect = Exception('down')
+
+        data = {'texts': ['dog'], 'source_lang': 'en', 'target_lang': 'es'}
+        response = self.client.post(self.url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
+class SingleFlightTest(TestCase):
+    """Tests for the coalescing of identical in-flight translations"""
+
+    def setUp(self):
+        # locmem alias: the lock is touched from other threads in these tests
+        self.flight = SingleFlight(alias='default', wait_timeout=2, poll_interval=0.01)
+        caches['default'].clear()
+
+    def test_concurrent_callers_share_one_call(self):
+        """Test that only the leader runs the function in the same process"""
+        release = threading.Event()
+        calls = []
+
+        def translate():
+            calls.append(1)
+            release.wait(2)
+            return {'translation': 'perro'}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.flight.do('dog', translate)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        while self.flight.stats()['local_waiters'] < 4:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'translation': 'perro'}] * 5)
+
+    def test_waiters_get_the_leader_error(self):
+        """Test that a failing call is not repeated by every waiter"""
+        release = threading.Event()
+        calls = []
+
+        def translate():
+            calls.append(1)
+            release.wait(2)
+            raise Exception('All providers failed')
+
+        errors = []
+
+        def call():
+            try:
+                self.flight.do('dog', translate)
+            except Exception as e:
+                errors.append(str(e))
+
+        threads = [threading.Thread(target=call) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        while self.flight.stats()['local_waiters'] < 2:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(errors, ['All providers failed'] * 3)
+
+    def test_waits_for_other_process(self):
+        """Test that a key locked by another worker is read from the cache"""
+        caches['default'].add(f"{SingleFlight.LOCK_PREFIX}:dog", 'other-worker', timeout=10)
+        stored = {}
+        threading.Timer(0.05, lambda: stored.update(value={'translation': 'perro'})).start()
+        translate = MagicMock()
+
+        result = self.flight.do('dog', translate, lookup=lambda: stored.get('value'))
+
+        self.assertEqual(result, {'translation': 'perro'})
+        translate.assert_not_called()
+        self.assertEqual(self.flight.stats()['remote_waiters'], 1)
+
+    def test_translates_when_other_process_fails(self):
+        """Test that a released lock without result makes this worker translate"""
+        lock_key = f"{SingleFlight.LOCK_PREFIX}:dog"
+        caches['default'].add(lock_key, 'other-worker', timeout=10)
+        threading.Timer(0.05, lambda: caches['default'].delete(lock_key)).start()
+
+        result = self.flight.do('dog', lambda: {'translation': 'perro'}, lookup=lambda: None)
+
+        self.assertEqual(result, {'translation': 'perro'})
+
+    def test_remote_waiter_backs_off(self):
+        """Test that a waiter polls less and less often while the other worker holds the lock"""
+        flight = SingleFlight(alias='default', wait_timeout=1, poll_interval=0.05, max_poll_interval=0.4)
+        caches['default'].add(f"{SingleFlight.LOCK_PREFIX}:dog", 'other-worker', timeout=10)
+        lookup = MagicMock(return_value=None)
+
+        result = flight.do('dog', lambda: {'translation': 'perro'}, lookup=lookup)
+
+        self.assertEqual(result, {'translation': 'perro'})
+        # 50, 100, 200, 400ms then the rest of the second: 20 polls at a fixed 50ms
+        self.assertLessEqual(lookup.call_count, 6)
+
+    def test_result_stored_while_polling_is_not_recomputed(self):
+        """Test that a lock released between the waiter's lookup and lock check still finds the result"""
+        lock_key = f"{SingleFlight.LOCK_PREFIX}:dog"
+        caches['default'].add(lock_key, 'other-worker', timeout=10)
+        stored = {}
+
+        def lookup():
+            value = stored.get('dog')
+            # the other worker stores its result and releases right after this miss
+            stored['dog'] = {'translation': 'perro'}
+            caches['default'].delete(lock_key)
+            return value
+
+        translate = MagicMock()
+        result = self.flight.do('dog', translate, lookup=lookup)
+
+        self.assertEqual(result, {'translation': 'perro'})
+        translate.assert_not_called()
+
+    def test_lock_is_released(self):
+        """Test that the leader frees the shared lock when done"""
+        self.flight.do('dog', lambda: {'translation': 'perro'}, lookup=lambda: None)
+
+        self.assertIsNone(caches['default'].get(f"{SingleFlight.LOCK_PREFIX}:dog"))
+
+
+class AsyncTranslationServiceTest(TestCase):
+    """Tests for TranslationService.atranslate (ASGI path)"""
+
+    def setUp(self):
+        self.health = ProviderHealth(ttl=60)
+        self.slow = type('SlowProvider', (MagicMock,), {})()
+        self.fast = type('FastProvider', (MagicMock,), {})()
+        self.slow_cancelled = False
+
+        async def slow_translate(*args):
+            try:
+                await asyncio.sleep(2)
+            except asyncio.CancelledError:
+                self.slow_cancelled = True
+                raise
+            return {'translation': 'lento'}
+
+        self.slow.atranslate = AsyncMock(side_effect=slow_translate)
+        self.fast.atranslate = AsyncMock(return_value={'translation': 'rapido'})
+        for provider in (self.slow, self.fast):
+            self.health.record_success(provider)
+
+        self.breakers = CircuitBreakerRegistry()
+        self.service = TranslationService(
+            cache=TranslationCache(max_size=10, alias='default'),
+            health=self.health,
+            breakers=self.breakers,
+            single_flight=SingleFlight(alias='default'),
+        )
+        self.service.providers = [self.fast, self.slow]
+        caches['default'].clear()
+
+    async def test_atranslate_uses_cache(self):
+        """Test that the second call does not reach the provider"""
+        first = await self.service.atranslate('dog', 'en', 'es')
+        second = await self.service.atranslate('dog', 'en', 'es')
+
+        self.assertEqual(first['translation'], 'rapido')
+        self.assertFalse(first['cached'])
+        self.assertTrue(second['cached'])
+        self.assertEqual(self.fast.atranslate.await_count, 1)
+
+    async def test_atranslate_falls_back(self):
+        """Test that a failing provider is skipped"""
+        self.fast.atranslate.side_effect = Exception('quota exceeded')
+        self.slow.atranslate = AsyncMock(return_value={'translation': 'perro'})
+
+        result = await self.service.atranslate('dog', 'en', 'es')
+
+        self.assertEqual(result['translation'], 'perro')
+        self.assertEqual(self.breakers.get(self.fast).consecutive_failures, 1)
+
+    async def test_atranslate_all_failing_raises(self):
+        """Test that every provider error is reported"""
+        self.fast.atranslate.side_effect = Exception('down')
+        self.slow.atranslate = AsyncMock(side_effect=Exception('down'))
+
+        with self.assertRaises(Exception) as ctx:
+            await self.service.atranslate('dog', 'en', 'es')
+        self.assertIn('FastProvider', str(ctx.exception))
+        self.assertIn('SlowProvider', str(ctx.exception))
+
+    async def test_identical_calls_share_one_provider_call(self):
+        """Test that concurrent identical translations are coalesced"""
+        self.service.providers = [self.slow]
+
+        async def translate(*args):
+            await asyncio.sleep(0.05)
+            return {'translation': 'perro'}
+
+        self.slow.atranslate = AsyncMock(side_effect=translate)
+
+        results = await asyncio.gather(*(self.service.atranslate('dog', 'en', 'es') for _ in range(5)))
+
+        self.assertEqual({r['translation'] for r in results}, {'perro'})
+        self.assertEqual(self.slow.atranslate.await_count, 1)
+
+    @override_settings(TRANSLATION_HEDGE_DELAY=0.05)
+    async def test_hedged_loser_is_cancelled(self):
+        """Test that the slow provider call is stopped once the hedge wins"""
+        self.service.hedged = True
+        self.service.providers = [self.slow, self.fast]
+
+        started = time.monotonic()
+        result = await self.service.atranslate('dog', 'en', 'es')
+        await asyncio.sleep(0)
+
+        self.assertEqual(result['provider'], 'FastProvider')
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertTrue(self.slow_cancelled)
+        self.assertEqual(self.breakers.get(self.slow).snapshot()['state'], 'closed')
+
+
+class AsyncTranslateViewTest(TestCase):
+    """Tests for POST /api/phrases/translate/async/"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.url = reverse('translate-async')
+        self.data = {'text': 'dog', 'source_lang': 'en', 'target_lang': 'es'}
+
+    @patch('phrases.views.TranslationService')
+    def test_translate_success(self, mock_service):
+        """Test that the async view answers like TranslateView"""
+        mock_service.return_value.atranslate = AsyncMock(return_value={
+            'original': 'dog',
+            'translation': 'perro',
+            'pronunciation': None,
+            'source_lang': 'en',
+            'target_lang': 'es',
+            'provider': 'DeepLProvider',
+            'cached': False,
+        })
+        self.client.force_login(self.user)
+
+        response = self.client.post(self.url, self.data, content_type='application/json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {
+            'original': 'dog',
+            'translation': 'perro',
+            'pronunciation': None,
+            'source_lang': 'en',
+            'target_lang': 'es',
+        })
+
+    def test_requires_authentication(self):
+        """Test that anonymous requests are rejected"""
+        response = self.client.post(self.url, self.data, content_type='application/json')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_invalid_data(self):
+        """Test that serializer errors return 400"""
+        self.client.force_login(self.user)
+
+        response = self.client.post(self.url, {'text': 'dog'}, content_type='application/json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('source_lang', response.json())
+
+    @patch('phrases.views.TranslationService')
+    def test_service_failure(self, mock_service):
+        """Test that provider failures return 503"""
+        mock_service.return_value.atranslate = AsyncMock(side_effect=Exception('down'))
+        self.client.force_login(self.user)
+
+        response = self.client.post(self.url, self.data, content_type='application/json')
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
+class TranslationBenchmarkTest(TestCase):
+    """Tests for the offline benchmark harness"""
+
+    def test_percentile(self):
+        """Test the nearest-rank percentiles"""
+        values = list(range(1, 101))
+
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertIsNone(percentile([], 95))
+
+    def test_stub_quota_is_exhausted(self):
+        """Test that the stub answers like an exhausted DeepL account"""
+        with StubProviderServer('deepl', quota=5) as stub:
+            self.assertEqual(stub.handle_translate(['dog']), 200)
+            self.assertEqual(stub.handle_translate(['horse']), 456)
+            self.assertEqual(stub.stats(), {'requests': 2, 'errors': 1, 'characters': 3})
+
+    def test_command_falls_back_on_errors(self):
+        """Test a run where DeepL always fails and LibreTranslate answers"""
+        out = StringIO()
+        call_command(
+            'benchmark_translation', requests=10, concurrency=2, json=True, stdout=out,
+            deepl_latency=0, libretranslate_latency=0, mymemory_latency=0,
+            deepl_jitter=0, libretranslate_jitter=0, mymemory_jitter=0,
+            deepl_error_rate=1,
+        )
+        report = json.loads(out.getvalue())
+
+        for target in ('service', 'view'):
+            self.assertEqual(report[target]['requests'], 10)
+            self.assertEqual(report[target]['errors'], 0)
+            self.assertIsNotNone(report[target]['p99_ms'])
+            self.assertEqual(report[target]['providers']['deepl']['characters'], 0)
+            self.assertGreater(report[target]['providers']['libretranslate']['requests'], 0)
@@ -4,6 +4,9 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     PhraseViewSet,
     TranslateView,
+    TranslateBatchView,
+    TranslationQuotaView,
+    translate_async,
     CategoryViewSet,
     
 )
@@ -16,5 +19,8 @@ router.register(r'categories', CategoryViewSet, basename='category')
 
 urlpatterns = [
     path('translate/', TranslateView.as_view(), name='translate'),
+    path('translate/batch/', TranslateBatchView.as_view(), name='translate-batch'),
+    path('translate/quota/', TranslationQuotaView.as_view(), name='translate-quota'),
+    path('translate/async/', translate_async, name='translate-async'),
     path('', include(router.urls)),
 ]
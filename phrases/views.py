@@ -1,3 +1,7 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
 from django.shortcuts import render
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -11,10 +15,13 @@ from .serializers import (
     PhraseCreateSerializer,
     TranslateRequestSerializer,
     TranslateResponseSerializer,
+    TranslateBatchRequestSerializer,
 )
 from .services.translation_service import TranslationService
+from .services.deepl_quota import deepl_quota
 from .models import Phrase, Language, Category
-from rest_framework.permissions import IsAuthenticated
+from gamification.services.achievement_rules import achievement_engine
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 # Create your views here.
@@ -72,6 +79,115 @@ class TranslateView(APIView):
         response_serializer.is_valid(raise_exception=True)
 
         return Response(response_serializer.data, status=status.HTTP_200_OK)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class TranslateBatchView(APIView):
+
+    """
+    Translate several texts in one request (a subtitle line, a page selection...)
+    POST /api/phrases/translate/batch/
+
+    Example:
+        Request:  {"texts": ["dog", "cat", "dog"], "source_lang": "en", "target_lang": "es"}
+        Response: {"count": 3, "results": [{"original": "dog", "translation": "perro", ...}, ...]}
+
+    Results keep the order of `texts`. Repeated texts are translated once,
+    cached ones are not sent to the providers at all.
+
+     Response Codes:
+        - 200: Successful translation
+        - 400: Invalid input data (max 100 texts)
+        - 503: Translation service unavailable
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = TranslateBatchRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        service = TranslationService()
+
+        try:
+            results = service.translate_many(data["texts"], data["source_lang"], data["target_lang"])
+        except Exception as e:
+            return Response(
+                {"detail": "Translation failed", "error": str(e)},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+
+        response_serializer = TranslateResponseSerializer(results, many=True)
+
+        return Response(
+            {"count": len(results), "results": response_serializer.data},
+            status=status.HTTP_200_OK
+        )
+
+
+class TranslationQuotaView(APIView):
+
+    """
+    Remaining DeepL quota of the month, from the local counter (no call to DeepL)
+    GET /api/phrases/translate/quota/
+
+    Example:
+        Response: {"deepl": {"period": "2026-10", "characters": 1200, "limit": 500000,
+                             "remaining": 498800, "used_ratio": 0.0024, "reconciled_at": null}}
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({"deepl": deepl_quota.stats()}, status=status.HTTP_200_OK)
+
+
+async def translate_async(request):
+    """
+    Async version of TranslateView, meant to be served under ASGI (uvicorn/daphne)
+    POST /api/phrases/translate/async/
+
+    Same request and response as /translate/. While the providers answer the
+    worker is free to serve other requests instead of blocking one thread each.
+    DRF views are sync only, so this is a plain Django view (CSRF is already
+    skipped for /api/ by CSRFExemptAPIMiddleware).
+
+     Response Codes:
+        - 200: Successful translation
+        - 400: Invalid input data
+        - 403: Not authenticated
+        - 405: Method not allowed
+        - 503: Translation service unavailable
+    """
+    if request.method != "POST":
+        return JsonResponse({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+
+    # request.user is lazy and hits the session/db
+    is_authenticated = await sync_to_async(lambda: request.user.is_authenticated)()
+    if not is_authenticated:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=403)
+
+    try:
+        payload = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse({"detail": "JSON parse error"}, status=400)
+
+    serializer = TranslateRequestSerializer(data=payload)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
+    data = serializer.validated_data
+
+    service = TranslationService()
+
+    try:
+        result = await service.atranslate(data["text"], data["source_lang"], data["target_lang"])
+    except Exception as e:
+        return JsonResponse({"detail": "Translation failed", "error": str(e)}, status=503)
+
+    response_serializer = TranslateResponseSerializer(result)
+    return JsonResponse(response_serializer.data, status=200)
+
     
 class PhraseViewSet(viewsets.ModelViewSet):
     """
@@ -136,7 +252,11 @@ class PhraseViewSet(viewsets.ModelViewSet):
         Auto-assign current user to new phrases.
         
     """
-        serializer.save(user=self.request.user)
+        phrase = serializer.save(user=self.request.user)
+        try:
+            achievement_engine.emit(self.request.user, 'phrase_created', phrase=phrase)
+        except Exception:
+            pass
 
 class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -0,0 +1,90 @@
+"""
+Local look-alike of Google's userinfo endpoint, for tests and
+`python manage.py benchmark_google_userinfo`. Not used while serving requests.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubGoogleServer:
+    """
+    Answers GET /oauth2/v3/userinfo after `latency` seconds.
+    Tokens starting with "invalid" get a 401, any other token a profile
+    derived from it (same token, same user).
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/oauth2/v3/userinfo"
+
+    def start(self):
+        self._server = _Server(('127.0.0.1', 0), _make_handler(self))
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def userinfo(self, access_token: str):
+        with self._lock:
+            self.requests += 1
+        time.sleep(self.latency)
+
+        if access_token.startswith('invalid'):
+            return None
+        return {
+            'sub': f"stub-{access_token}",
+            'email': f"{access_token}@example.com",
+            'name': 'Stub User',
+            'picture': '',
+        }
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # the default (5) resets connections under load
+
+
+def _make_handler(stub):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            authorization = self.headers.get('Authorization', '')
+            token = authorization[len('Bearer '):] if authorization.startswith('Bearer ') else ''
+            user_info = stub.userinfo(token) if token else None
+
+            if user_info is None:
+                return self._send(401, {'error': 'invalid_request'})
+            self._send(200, user_info)
+
+        def _send(self, code, data):
+            body = json.dumps(data).encode()
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
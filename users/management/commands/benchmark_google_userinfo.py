@@ -0,0 +1,46 @@
+import json
+import uuid
+
+from django.core.management.base import BaseCommand
+
+from phrases.benchmark import run_load
+from users.benchmark import StubGoogleServer
+from users.services.google_userinfo import GoogleUserinfoClient
+
+
+class Command(BaseCommand):
+    help = "Google userinfo verification under a login burst, with and without the token cache (local stub)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='logins per run')
+        parser.add_argument('--tokens', type=int, default=20, help='distinct access tokens in the burst')
+        parser.add_argument('--concurrency', type=int, default=16, help='threads sending logins')
+        parser.add_argument('--latency', type=float, default=0.15, help='Google latency in seconds')
+        parser.add_argument('--json', action='store_true', help='print the report as json')
+
+    def handle(self, *args, **options):
+        report = {}
+
+        with StubGoogleServer(latency=options['latency']) as stub:
+            for label, ttl in (('without cache', 0), ('with cache', 300)):
+                # a fresh prefix per run: nothing cached by an earlier run is reused
+                run_id = uuid.uuid4().hex[:8]
+                tokens = [f"{run_id}-{i % options['tokens']}" for i in range(options['requests'])]
+                client = GoogleUserinfoClient(url=stub.url, ttl=ttl)
+
+                before = stub.requests
+                result = run_load(client.fetch, tokens, options['concurrency'])
+                result['google_requests'] = stub.requests - before
+                report[label] = result
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        for label, result in report.items():
+            self.stdout.write(self.style.SUCCESS(
+                f"{label:14} {result['throughput']} logins/s  p50 {result['p50_ms']}ms  "
+                f"p95 {result['p95_ms']}ms  p99 {result['p99_ms']}ms  "
+                f"google requests {result['google_requests']}  errors {result['errors']}"
+            ))
+
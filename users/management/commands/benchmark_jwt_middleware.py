@@ -0,0 +1,68 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from phrases.benchmark import percentile
+from users.middleware import JWTAuthenticationMiddleware
+from users.models import User
+from users.services.token_cache import TokenCache
+from users.services.user_cache import UserCache
+from users.views import GoogleLoginView
+
+
+class Command(BaseCommand):
+    help = "Time JWTAuthenticationMiddleware per request with and without the verified-token cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000, help='requests per run')
+        parser.add_argument('--sessions', type=int, default=50, help='distinct tokens (users) sending requests')
+
+    def handle(self, *args, **options):
+        # never saved: the user cache is primed, so only token handling is measured
+        users = [User(id=i + 1, username=f"benchmark{i}") for i in range(options['sessions'])]
+        tokens = [GoogleLoginView.create_jwt_for_user(user) for user in users]
+
+        for label, token_cache in (('without cache', None), ('with cache', TokenCache())):
+            middleware = self._middleware(users, tokens, token_cache)
+            timings = self._run(middleware, tokens, options['requests'])
+
+            line = (
+                f"{label:14} mean {sum(timings) / len(timings) * 1e6:.1f}us  "
+                f"p50 {percentile(timings, 50) * 1e6:.1f}us  p99 {percentile(timings, 99) * 1e6:.1f}us"
+            )
+            if token_cache is not None:
+                line += f"  hit rate {token_cache.stats()['hit_rate']}"
+            self.stdout.write(self.style.SUCCESS(line))
+
+    @staticmethod
+    def _middleware(users, tokens, token_cache):
+        middleware = JWTAuthenticationMiddleware(lambda request: HttpResponse())
+        middleware.token_cache = token_cache
+        middleware.user_cache = UserCache(max_size=len(users), ttl=60 * 60)
+
+        for user, token in zip(users, tokens):
+            middleware.user_cache.set(user, middleware.decode(token).get('iat'))
+        if token_cache is not None:
+            token_cache.clear()
+        return middleware
+
+    @staticmethod
+    def _run(middleware, tokens, total):
+        factory = RequestFactory()
+        timings = []
+
+        for i in range(total):
+            request = factory.get('/api/users/profile/')
+            request.COOKIES['parla_session'] = tokens[i % len(tokens)]
+            request.user = AnonymousUser()
+
+            started = time.perf_counter()
+            middleware.process_request(request)
+            # request.user is lazy, resolve it like an authenticated view does
+            request.user.is_authenticated
+            timings.append(time.perf_counter() - started)
+
+        return timings
@@ -1,64 +1,146 @@
+import logging
+import threading
+
 from django.contrib.auth.models import AnonymousUser
 from django.conf import settings
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject, empty
 import jwt
 from .models import User
+from .services.token_cache import token_cache
+from .services.user_cache import user_cache
+
+
+logger = logging.getLogger(__name__)
+
+# MiddlewareMixin: sync and async capable, under ASGI the chain stays async
+# and the async views are not pushed to a thread
+
+
+class LazyUserStats:
+    """Requests with a JWT cookie and how many of them really needed the user"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.resolved = 0
+
+    def record(self, resolved: bool):
+        with self._lock:
+            self.requests += 1
+            if resolved:
+                self.resolved += 1
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.resolved = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            unused = self.requests - self.resolved
+            return {
+                "requests": self.requests,
+                "resolved": self.resolved,
+                "unused": unused,
+                "unused_ratio": round(unused / self.requests, 4) if self.requests else 0,
+            }
+
+
+lazy_user_stats = LazyUserStats()
+
+
+class JWTLazyUser(SimpleLazyObject):
+    """request.user from the JWT cookie, decoded and loaded on first access"""
+
+    @property
+    def is_resolved(self) -> bool:
+        return self._wrapped is not empty
 
 
-class CSRFExemptAPIMiddleware:
+class CSRFExemptAPIMiddleware(MiddlewareMixin):
     """
     Middleware para eximir CSRF en endpoints API
     """
-    
-    def __init__(self, get_response):
-        self.get_response = get_response
 
-    def __call__(self, request):
+    def process_request(self, request):
         # Eximir CSRF para rutas /api/
         if request.path.startswith('/api/'):
             request._dont_enforce_csrf_checks = True
-        
-        response = self.get_response(request)
-        return response
 
 
-class JWTAuthenticationMiddleware:
+class JWTAuthenticationMiddleware(MiddlewareMixin):
     """
     Middleware para autenticar usuarios usando JWT desde cookies
+
+    Los tokens ya verificados y los usuarios se guardan en caches del proceso:
+    una sesión normal no decodifica el token ni consulta la db en cada request.
+    request.user es lazy: las rutas que no lo usan no pagan nada.
     """
-    
-    def __init__(self, get_response):
-        self.get_response = get_response
 
-    def __call__(self, request):
+    token_cache = token_cache  # None: verify every request
+    user_cache = user_cache
+
+    def process_request(self, request):
         # Obtener el token JWT de la cookie 'parla_session'
         token = request.COOKIES.get('parla_session')
         
         if token:
-            try:
-                # Decodificar el token
-                payload = jwt.decode(
-                    token,
-                    settings.SECRET_KEY,
-                    algorithms=['HS256']
-                )
-                
-                # Obtener el usuario
-                user_id = payload.get('user_id')
-                if user_id:
-                    try:
-                        user = User.objects.get(id=user_id)
-                        request.user = user
-                    except User.DoesNotExist:
-                        request.user = AnonymousUser()
-                else:
-                    request.user = AnonymousUser()
-                    
-            except jwt.ExpiredSignatureError:
-                # Token expirado
-                request.user = AnonymousUser()
-            except jwt.InvalidTokenError:
-                # Token inválido
-                request.user = AnonymousUser()
-        
-        response = self.get_response(request)
+            # nada se decodifica ni se consulta hasta que la vista usa request.user
+            request.user = JWTLazyUser(lambda: self.resolve_user(token))
+
+    def process_response(self, request, response):
+        user = getattr(request, 'user', None)
+        # isinstance() would evaluate any other lazy user (it proxies __class__)
+        if type(user) is JWTLazyUser:
+            lazy_user_stats.record(user.is_resolved)
+            if not user.is_resolved:
+                logger.debug("%s %s served without resolving the JWT user", request.method, request.path)
         return response
+
+    def resolve_user(self, token):
+        try:
+            # Decodificar el token
+            payload = self.decode(token)
+
+        except jwt.ExpiredSignatureError:
+            # Token expirado
+            return AnonymousUser()
+        except jwt.InvalidTokenError:
+            # Token inválido
+            return AnonymousUser()
+
+        # Obtener el usuario (cache del proceso, la db solo si no está)
+        user_id = payload.get('user_id')
+        if user_id:
+            return self.get_user(user_id, payload.get('iat'))
+        return AnonymousUser()
+
+    def decode(self, token):
+        if self.token_cache is not None:
+            claims = self.token_cache.get(token)
+            if claims is not None:
+                return claims
+
+        payload = jwt.decode(
+            token,
+            settings.SECRET_KEY,
+            algorithms=['HS256']
+        )
+
+        if self.token_cache is not None:
+            self.token_cache.set(token, payload)
+        return payload
+
+    def get_user(self, user_id, iat=None):
+        user = self.user_cache.get(user_id, iat)
+        if user is not None:
+            return user
+
+        try:
+            user = User.objects.get(id=user_id)
+        except User.DoesNotExist:
+            return AnonymousUser()
+
+        self.user_cache.set(user, iat)
+        return user
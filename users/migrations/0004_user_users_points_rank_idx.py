@@ -0,0 +1,17 @@
+# Generated by Django 4.2.25 on 2026-10-16 23:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_alter_user_profile_picture'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-total_points', 'id'], name='users_points_rank_idx'),
+        ),
+    ]
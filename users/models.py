@@ -16,6 +16,10 @@ class User(AbstractUser):
     
     class Meta:
         db_table = 'users'
+        indexes = [
+            # leaderboard order, rank neighbours start from it
+            models.Index(fields=['-total_points', 'id'], name='users_points_rank_idx'),
+        ]
     
     def __str__(self):
         return self.username
\ No newline at end of file
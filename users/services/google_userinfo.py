@@ -0,0 +1,69 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+from parla.http_pool import get_session
+
+
+class InvalidGoogleToken(Exception):
+    """Google rejected the access token (expired, revoked...)"""
+
+
+class GoogleUserinfoClient:
+    """
+    Profile of a Google access token (oauth2/v3/userinfo) for GoogleLoginView.
+
+    - keep-alive pooled session (parla/http_pool.py, sized by GOOGLE_USERINFO_POOL_SIZE)
+      and strict (connect, read) timeouts, a slow Google answer can't hold a worker for long
+    - valid answers are cached GOOGLE_USERINFO_CACHE_TTL seconds in the default
+      cache (shared by the workers), keyed by the sha256 of the token; ttl=0 disables it
+    - rejected tokens are never cached
+    """
+
+    KEY_PREFIX = "google_userinfo"
+
+    def __init__(self, url=None, ttl=None, alias=None):
+        self.url = url or getattr(settings, 'GOOGLE_USERINFO_URL', 'https://www.googleapis.com/oauth2/v3/userinfo')
+        self.ttl = getattr(settings, 'GOOGLE_USERINFO_CACHE_TTL', 300) if ttl is None else ttl
+        self.alias = alias or 'default'
+        self.session = get_session(
+            'google',
+            pool_size=getattr(settings, 'GOOGLE_USERINFO_POOL_SIZE', 4),
+            retries=getattr(settings, 'GOOGLE_USERINFO_RETRIES', 1),
+        )
+
+    def make_key(self, access_token: str) -> str:
+        digest = hashlib.sha256(access_token.encode('utf-8')).hexdigest()
+        return f"{self.KEY_PREFIX}:{digest}"
+
+    def fetch(self, access_token: str) -> dict:
+        key = self.make_key(access_token)
+
+        if self.ttl:
+            cached = caches[self.alias].get(key)
+            if cached is not None:
+                return cached
+
+        response = self.session.get(
+            self.url,
+            headers={'Authorization': f'Bearer {access_token}'},
+            timeout=self.timeout(),
+        )
+        if response.status_code != 200:
+            raise InvalidGoogleToken(f"userinfo answered {response.status_code}")
+
+        user_info = response.json()
+        if self.ttl:
+            caches[self.alias].set(key, user_info, self.ttl)
+        return user_info
+
+    @staticmethod
+    def timeout() -> tuple:
+        return (
+            getattr(settings, 'GOOGLE_USERINFO_CONNECT_TIMEOUT', 2),
+            getattr(settings, 'GOOGLE_USERINFO_TIMEOUT', 5),
+        )
+
+
+google_userinfo = GoogleUserinfoClient()
@@ -0,0 +1,179 @@
+import hashlib
+import threading
+import time
+from collections import Counter
+from datetime import date
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+
+
+class ResponseCache:
+    """
+    Serialized responses of the per-user read endpoints (profile, dashboard),
+    kept in the default cache so every worker shares them.
+
+    - key: (user, endpoint, query params), plus the user's generation and the day:
+      ranges like "the last 7 days" move at midnight
+    - invalidate() starts a new generation, the old entries can't be read any
+      more even by a worker that missed the event; they are also deleted
+    - locmem is enough for tests, with several workers CACHE_BACKEND must be shared:
+      RESPONSE_CACHE_TTL defaults to 0 (off) unless it is
+    - hits / misses / evictions are counted per process and added to shared
+      counters every RESPONSE_CACHE_STATS_FLUSH events, stats() reads those
+    """
+
+    KEY_PREFIX = "response"
+    EPOCH = "epoch"
+    COUNTERS = ('hits', 'misses', 'stores', 'evictions', 'invalidated')
+
+    def __init__(self, ttl=None, alias=None, stats_flush=None):
+        self._ttl = ttl
+        self.alias = alias or 'default'
+        self.stats_flush = stats_flush or getattr(settings, 'RESPONSE_CACHE_STATS_FLUSH', 100)
+
+        self._pending = Counter()
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self) -> int:
+        return getattr(settings, 'RESPONSE_CACHE_TTL', 0) if self._ttl is None else self._ttl
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def key(self, user_id, endpoint, params=()) -> str:
+        """
+        Cache key of a request. Taken once, before the view runs: a change in
+        the meantime leaves the response under the old generation, unread.
+        """
+        cache = caches[self.alias]
+        generation_key, epoch_key = self._key(user_id, 'generation'), self._key(self.EPOCH)
+        versions = cache.get_many([generation_key, epoch_key])
+        generation = versions.get(generation_key) or self._create(generation_key)
+        epoch = versions.get(epoch_key) or self._create(epoch_key)
+
+        query = hashlib.md5(urlencode(sorted(params), doseq=True).encode()).hexdigest()
+        return self._key(user_id, f"{epoch:x}.{generation:x}", f"{date.today():%Y%m%d}", endpoint, query)
+
+    def get(self, user_id, key):
+        """Cached data, None on a miss"""
+        data = caches[self.alias].get(key)
+        if data is not None:
+            self._count('hits')
+            return data
+
+        self._count('misses')
+        # stored and not invalidated: the backend dropped it (TTL, max entries, memory)
+        if key in (caches[self.alias].get(self._key(user_id, 'keys')) or ()):
+            self._count('evictions')
+        return None
+
+    def set(self, user_id, key, data):
+        cache = caches[self.alias]
+        cache.set(key, data, self.ttl)
+
+        # keys of the user's entries, for invalidate() and the eviction count;
+        # an append lost to a concurrent request only costs an entry left to expire
+        index_key = self._key(user_id, 'keys')
+        keys = [k for k in cache.get(index_key) or () if k != key]
+        cache.set(index_key, keys + [key], self.ttl)
+        self._count('stores')
+
+    def invalidate(self, user_id):
+        """Drop every cached response of this user"""
+        cache = caches[self.alias]
+        cache.set(self._key(user_id, 'generation'), time.time_ns(), self.ttl)
+
+        index_key = self._key(user_id, 'keys')
+        keys = cache.get(index_key) or []
+        cache.delete_many(keys + [index_key])
+        if keys:
+            self._count('invalidated', len(keys))
+
+    def invalidate_all(self):
+        """Every user at once (backfills), the entries are left to expire"""
+        caches[self.alias].set(self._key(self.EPOCH), time.time_ns(), self.ttl)
+
+    def stats(self) -> dict:
+        """Counters of every worker, this one's pending events included"""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        self._push(pending)
+
+        keys = {name: self._key('stats', name) for name in self.COUNTERS}
+        values = caches[self.alias].get_many(list(keys.values()))
+        counts = {name: values.get(key, 0) for name, key in keys.items()}
+
+        lookups = counts['hits'] + counts['misses']
+        counts['hit_rate'] = round(counts['hits'] / lookups, 4) if lookups else 0
+        return counts
+
+    def reset_stats(self):
+        with self._lock:
+            self._pending.clear()
+        caches[self.alias].delete_many([self._key('stats', name) for name in self.COUNTERS])
+
+    # Internal helpers
+    def _create(self, key):
+        # two workers creating it at once keep the same one; a lost generation
+        # only makes the entries unreachable
+        cache = caches[self.alias]
+        cache.add(key, time.time_ns(), self.ttl)
+        return cache.get(key) or time.time_ns()
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._pending[name] += amount
+            if sum(self._pending.values()) < self.stats_flush:
+                return
+            pending, self._pending = self._pending, Counter()
+        self._push(pending)
+
+    def _push(self, pending):
+        cache = caches[self.alias]
+        for name, amount in pending.items():
+            key = self._key('stats', name)
+            cache.add(key, 0, None)
+            try:
+                cache.incr(key, amount)
+            except ValueError:
+                # evicted between add() and incr()
+                cache.set(key, amount, None)
+
+    def _key(self, *parts) -> str:
+        return ":".join([self.KEY_PREFIX, *map(str, parts)])
+
+
+# shared by the workers through the default cache, the counters are batched per process
+response_cache = ResponseCache()
+
+
+def cached_response(get):
+    """
+    Serve a GET from response_cache, keyed by user, view and query params.
+    Only 200 responses are stored; the data is the serializer output, rendered
+    again for each request so content negotiation still applies.
+    """
+    @wraps(get)
+    def wrapper(self, request, *args, **kwargs):
+        if not response_cache.enabled:
+            return get(self, request, *args, **kwargs)
+
+        user_id = request.user.pk
+        key = response_cache.key(user_id, type(self).__name__, list(request.query_params.lists()))
+
+        data = response_cache.get(user_id, key)
+        if data is not None:
+            return Response(data, status=status.HTTP_200_OK)
+
+        response = get(self, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response_cache.set(user_id, key, response.data)
+        return response
+    return wrapper
@@ -0,0 +1,86 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class TokenCache:
+    """
+    Already verified JWTs, so the same cookie isn't decoded and checked on every request.
+
+    - key: sha256 of the token, the token itself is never kept
+    - value: the claims the middleware needs (user_id, iat, exp)
+    - an entry is never served after its exp, expired tokens go through
+      jwt.decode again and fail there
+    - bounded LRU (JWT_TOKEN_CACHE_SIZE), only valid tokens are stored
+    """
+
+    CLAIMS = ('user_id', 'iat', 'exp')
+
+    def __init__(self, max_size=None):
+        self.max_size = max_size or getattr(settings, 'JWT_TOKEN_CACHE_SIZE', 4096)
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    @staticmethod
+    def make_key(token: str) -> str:
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def get(self, token: str):
+        key = self.make_key(token)
+
+        with self._lock:
+            claims = self._entries.get(key)
+            if claims is None:
+                self.misses += 1
+                return None
+
+            exp = claims.get('exp')
+            if exp is not None and exp <= time.time():
+                del self._entries[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(claims)
+
+    def set(self, token: str, payload: dict):
+        key = self.make_key(token)
+        claims = {claim: payload.get(claim) for claim in self.CLAIMS}
+
+        with self._lock:
+            self._entries[key] = claims
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.expired = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "hit_rate": round(self.hits / total, 4) if total else 0,
+            }
+
+
+# one cache per process, the same cookie comes back on every request of a session
+token_cache = TokenCache()
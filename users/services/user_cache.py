@@ -0,0 +1,79 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class UserCache:
+    """
+    In-process cache of the users loaded by JWTAuthenticationMiddleware,
+    so an authenticated request doesn't need the users query.
+
+    - key: (user_id, token iat), a new login never gets a row cached for an older token
+    - bounded LRU (USER_CACHE_SIZE) with a short TTL (USER_CACHE_TTL): other workers
+      only learn about a change when their copy expires
+    - saving or deleting a user drops its entries in this process (users/signals.py)
+    - every get() returns a copy, requests can modify request.user freely
+    """
+
+    def __init__(self, max_size=None, ttl=None):
+        self.max_size = max_size or getattr(settings, 'USER_CACHE_SIZE', 1024)
+        self.ttl = ttl or getattr(settings, 'USER_CACHE_TTL', 30)
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id, iat=None):
+        key = (user_id, iat)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.copy(entry[0])
+
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, user, iat=None):
+        key = (user.pk, iat)
+
+        with self._lock:
+            self._entries[key] = (copy.copy(user), time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        """Drop every cached token of this user"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0,
+            }
+
+
+# one cache per process, the middleware is shared by every request
+user_cache = UserCache()
@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import User
+from .services.response_cache import response_cache
+from .services.user_cache import user_cache
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    # points, streaks or profile changed: the next request loads the row again
+    user_cache.invalidate(instance.pk)
+    response_cache.invalidate(instance.pk)
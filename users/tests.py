@@ -1,3 +1,275 @@
-from django.test import TestCase
+import time
+from unittest.mock import patch
 
-# Create your tests here.
+import jwt
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from parla.http_pool import get_session
+
+from .benchmark import StubGoogleServer
+from .middleware import JWTAuthenticationMiddleware, lazy_user_stats
+from .models import User
+from .services.google_userinfo import GoogleUserinfoClient
+from .services.response_cache import response_cache
+from .services.token_cache import TokenCache, token_cache
+from .services.user_cache import UserCache, user_cache
+from .views import GoogleLoginView
+
+
+class UserCacheTest(TestCase):
+    """Tests for the in-process user cache"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', email='test@test.com', password='testpass123')
+
+    def test_entries_are_bounded(self):
+        """Test that the oldest user is dropped when the cache is full"""
+        cache = UserCache(max_size=1, ttl=60)
+        other = User.objects.create_user(username='other', email='other@test.com', password='testpass123')
+
+        cache.set(self.user, iat=1)
+        cache.set(other, iat=1)
+
+        self.assertIsNone(cache.get(self.user.pk, 1))
+        self.assertEqual(cache.get(other.pk, 1).username, 'other')
+
+    def test_get_returns_a_copy(self):
+        """Test that changing the returned user doesn't change the cached one"""
+        cache = UserCache(ttl=60)
+        cache.set(self.user, iat=1)
+
+        cache.get(self.user.pk, 1).total_points = 999
+
+        self.assertEqual(cache.get(self.user.pk, 1).total_points, 0)
+
+    def test_other_token_misses(self):
+        """Test that a new login (different iat) doesn't reuse the row"""
+        cache = UserCache(ttl=60)
+        cache.set(self.user, iat=1)
+
+        self.assertIsNone(cache.get(self.user.pk, 2))
+
+
+class TokenCacheTest(TestCase):
+    """Tests for the verified-token cache"""
+
+    def test_only_needed_claims_are_kept(self):
+        """Test that a hit returns user_id, iat and exp"""
+        cache = TokenCache()
+        exp = int(time.time()) + 60
+        cache.set('token', {'user_id': 1, 'email': 'test@test.com', 'iat': 10, 'exp': exp})
+
+        self.assertEqual(cache.get('token'), {'user_id': 1, 'iat': 10, 'exp': exp})
+        self.assertEqual(cache.stats()['hits'], 1)
+
+    def test_expired_token_is_not_served(self):
+        """Test that an entry past its exp is dropped"""
+        cache = TokenCache()
+        cache.set('token', {'user_id': 1, 'iat': 10, 'exp': int(time.time()) - 1})
+
+        self.assertIsNone(cache.get('token'))
+        self.assertEqual(cache.stats()['expired'], 1)
+        self.assertEqual(cache.stats()['size'], 0)
+
+
+@override_settings(RESPONSE_CACHE_TTL=3600)
+class ResponseCacheTest(APITestCase):
+    """Tests for the per-user response cache of the profile"""
+
+    def setUp(self):
+        caches['default'].clear()
+        response_cache.reset_stats()
+        self.user = User.objects.create_user(username='testuser', email='test@test.com', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('user_profile')
+
+    def test_second_request_is_served_from_cache(self):
+        """Test that the same profile request costs no query the second time"""
+        self.client.get(self.url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['username'], 'testuser')
+
+    def test_saving_the_user_invalidates(self):
+        """Test that a profile change is seen on the next request"""
+        self.client.get(self.url)
+
+        self.user.first_name = 'Ana'
+        self.user.save()
+
+        self.assertEqual(self.client.get(self.url).data['first_name'], 'Ana')
+
+    def test_stored_profile_is_read_from_the_database(self):
+        """Test that a stale request.user (another worker's user_cache) is not cached"""
+        User.objects.filter(pk=self.user.pk).update(total_points=510)
+        response_cache.invalidate(self.user.pk)
+
+        # self.user still has the old total, like a copy cached before the change
+        self.assertEqual(self.client.get(self.url).data['total_points'], 510)
+        self.assertEqual(self.client.get(self.url).data['total_points'], 510)
+
+    def test_key_depends_on_user_and_query_params(self):
+        """Test that params are part of the key, in any order"""
+        key = response_cache.key(self.user.pk, 'UserProfileView', [('a', ['1']), ('b', ['2'])])
+
+        self.assertEqual(key, response_cache.key(self.user.pk, 'UserProfileView', [('b', ['2']), ('a', ['1'])]))
+        self.assertNotEqual(key, response_cache.key(self.user.pk, 'UserProfileView', [('a', ['2'])]))
+        self.assertNotEqual(key, response_cache.key(self.user.pk + 1, 'UserProfileView', [('a', ['1']), ('b', ['2'])]))
+
+    def test_stats_count_hits_and_evictions(self):
+        """Test the hit rate and an entry dropped by the backend"""
+        self.client.get(self.url)
+        self.client.get(self.url)
+        caches['default'].delete(response_cache.key(self.user.pk, 'UserProfileView', []))
+        self.client.get(self.url)
+
+        admin = User.objects.create_user(username='admin', email='admin@test.com', password='testpass123', is_staff=True)
+        self.client.force_authenticate(user=admin)
+        stats = self.client.get(reverse('response_cache_stats')).data
+
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions']), (1, 2, 1))
+        self.assertEqual(stats['hit_rate'], 0.3333)
+
+    @override_settings(RESPONSE_CACHE_TTL=0)
+    def test_disabled_cache_always_runs_the_view(self):
+        """Test that with the cache off (per-process backend) nothing is stored"""
+        self.client.get(self.url)
+
+        self.assertEqual(response_cache.stats()['stores'], 0)
+
+    def test_stats_are_for_admins(self):
+        """Test that a regular user can't read the counters"""
+        response = self.client.get(reverse('response_cache_stats'))
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class JWTAuthenticationMiddlewareTest(TestCase):
+    """Tests for the JWT cookie middleware"""
+
+    def setUp(self):
+        user_cache.clear()
+        token_cache.clear()
+        self.user = User.objects.create_user(username='testuser', email='test@test.com', password='testpass123')
+        self.token = GoogleLoginView.create_jwt_for_user(self.user)
+        self.middleware = JWTAuthenticationMiddleware(lambda request: HttpResponse())
+        self.factory = RequestFactory()
+
+    def _authenticate(self, token=None):
+        request = self.factory.get('/api/users/profile/')
+        request.COOKIES['parla_session'] = token or self.token
+        request.user = AnonymousUser()
+        self.middleware.process_request(request)
+        return request.user
+
+    def test_second_request_skips_user_query(self):
+        """Test that the user is loaded from the db only once"""
+        self.assertEqual(self._authenticate(), self.user)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self._authenticate(), self.user)
+
+    def test_saving_the_user_invalidates(self):
+        """Test that points/streak/profile changes are seen on the next request"""
+        self._authenticate()
+
+        self.user.total_points = 50
+        self.user.save(update_fields=['total_points'])
+
+        self.assertEqual(self._authenticate().total_points, 50)
+
+    def test_invalid_token_is_anonymous(self):
+        """Test that a bad cookie leaves the request unauthenticated"""
+        self.assertFalse(self._authenticate('not-a-token').is_authenticated)
+
+    def test_repeated_token_is_decoded_once(self):
+        """Test that the signature is only checked on the first request"""
+        with patch('users.middleware.jwt.decode', wraps=jwt.decode) as decode:
+            self._authenticate().is_authenticated
+            self._authenticate().is_authenticated
+
+        self.assertEqual(decode.call_count, 1)
+
+    def test_user_is_resolved_on_first_access(self):
+        """Test that a view that never reads request.user costs no query"""
+        with self.assertNumQueries(0):
+            user = self._authenticate()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(user.username, 'testuser')
+
+    def test_unused_users_are_counted(self):
+        """Test the instrumentation of requests that never needed the user"""
+        lazy_user_stats.reset()
+
+        for resolve in (False, True):
+            request = self.factory.get('/api/users/profile/')
+            request.COOKIES['parla_session'] = self.token
+            self.middleware.process_request(request)
+            if resolve:
+                request.user.is_authenticated
+            self.middleware.process_response(request, HttpResponse())
+
+        self.assertEqual(lazy_user_stats.stats()['requests'], 2)
+        self.assertEqual(lazy_user_stats.stats()['unused'], 1)
+
+
+class GoogleLoginViewTest(APITestCase):
+    """Tests for POST /api/users/google/login/ against a local Google stub"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.google = StubGoogleServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.google.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        caches['default'].clear()
+        self.url = reverse('google_login')
+        patcher = patch('users.views.google_userinfo', GoogleUserinfoClient(url=self.google.url, ttl=60))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_repeated_login_uses_cached_userinfo(self):
+        """Test that the same access token is verified with Google once"""
+        before = self.google.requests
+
+        for _ in range(2):
+            response = self.client.post(self.url, {'credential': 'token-1'}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.google.requests - before, 1)
+        self.assertTrue(User.objects.filter(email='token-1@example.com').exists())
+
+    def test_invalid_token_is_rejected_and_not_cached(self):
+        """Test that a token Google refuses returns 401 every time"""
+        before = self.google.requests
+
+        for _ in range(2):
+            response = self.client.post(self.url, {'credential': 'invalid-token'}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.assertEqual(self.google.requests - before, 2)
+
+    def test_session_uses_google_settings(self):
+        """Test that the userinfo session is sized by GOOGLE_USERINFO_*, not the translation pool"""
+        session = GoogleUserinfoClient(url=self.google.url).session
+        adapter = session.get_adapter(self.google.url)
+
+        self.assertEqual(adapter._pool_maxsize, settings.GOOGLE_USERINFO_POOL_SIZE)
+        self.assertEqual(adapter.max_retries.total, settings.GOOGLE_USERINFO_RETRIES)
+        self.assertIs(session, get_session('google'))
@@ -1,8 +1,9 @@
 from django.urls import path
-from .views import GoogleLoginView, UserProfileView, LogoutView
+from .views import GoogleLoginView, UserProfileView, LogoutView, ResponseCacheStatsView
 
 urlpatterns = [
     path('profile/', UserProfileView.as_view(), name='user_profile'),
     path('google/login/', GoogleLoginView.as_view(), name='google_login'),
     path('logout/', LogoutView.as_view(), name='logout'),
+    path('response-cache/', ResponseCacheStatsView.as_view(), name='response_cache_stats'),
 ]
@@ -1,16 +1,17 @@
 from django.shortcuts import render
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework import status
 from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from .models import User
 from .serializers import UserSerializer
+from .services.google_userinfo import InvalidGoogleToken, google_userinfo
+from .services.response_cache import cached_response, response_cache
 import jwt
 from datetime import datetime, timedelta
-import requests as http_requests
 
 
 @method_decorator(csrf_exempt, name='dispatch')
@@ -37,19 +38,14 @@ class GoogleLoginView(APIView):
             # Si no se proporciona userInfo, obtenerla de Google
             if not user_info:
                 try:
-                    google_response = http_requests.get(
-                        'https://www.googleapis.com/oauth2/v3/userinfo',
-                        headers={'Authorization': f'Bearer {access_token}'}
+                    # sesión con keep-alive, timeouts cortos y cache por token
+                    user_info = google_userinfo.fetch(access_token)
+
+                except InvalidGoogleToken:
+                    return Response(
+                        {'error': 'Token inválido o expirado'},
+                        status=status.HTTP_401_UNAUTHORIZED
                     )
-                    
-                    if google_response.status_code != 200:
-                        return Response(
-                            {'error': 'Token inválido o expirado'},
-                            status=status.HTTP_401_UNAUTHORIZED
-                        )
-                    
-                    user_info = google_response.json()
-                    
                 except Exception as e:
                     return Response(
                         {'error': f'Error al verificar token con Google: {str(e)}'},
@@ -144,10 +140,13 @@ class UserProfileView(APIView):
     """
     permission_classes = [IsAuthenticated]
     
+    @cached_response
     def get(self, request):
         """Retorna los datos del usuario autenticado"""
         try:
-            user = request.user
+            # request.user can be another worker's cached copy (user_cache.py), up to
+            # USER_CACHE_TTL old: the stored response must come from the row
+            user = User.objects.get(pk=request.user.pk)
             serializer = UserSerializer(user)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Exception as e:
@@ -157,6 +156,21 @@ class UserProfileView(APIView):
             )
 
 
+class ResponseCacheStatsView(APIView):
+    """
+    Hit rate and evictions of the per-user response cache, every worker included
+    GET /api/users/response-cache/
+
+    Example:
+        Response: {"hits": 940, "misses": 60, "stores": 60, "evictions": 2,
+                   "invalidated": 35, "hit_rate": 0.94}
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(response_cache.stats(), status=status.HTTP_200_OK)
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class LogoutView(APIView):
     """